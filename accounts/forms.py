@@ -39,12 +39,16 @@ class VolunteerRegisterForm(UserCreationForm):
     skills = forms.CharField(max_length=255, required=False)
     certifications = forms.CharField(max_length=255, required=False)
     service_limit = forms.IntegerField(initial=5)
+    location = forms.CharField(
+        max_length=255, required=False,
+        help_text="Town or neighbourhood, used to match you with nearby mothers."
+    )
 
     class Meta:
         model = CustomUser
         fields = [
             'username', 'email', 'password1', 'password2',
-            'skills', 'certifications', 'service_limit'
+            'skills', 'certifications', 'service_limit', 'location'
         ]
 
     def save(self, commit=True):
@@ -57,7 +61,8 @@ class VolunteerRegisterForm(UserCreationForm):
                 user=user,
                 skills=self.cleaned_data.get('skills'),
                 certifications=self.cleaned_data.get('certifications'),
-                service_limit=self.cleaned_data.get('service_limit')
+                service_limit=self.cleaned_data.get('service_limit'),
+                location=self.cleaned_data.get('location'),
             )
         return user
 
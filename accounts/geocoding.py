@@ -0,0 +1,75 @@
+# accounts/geocoding.py
+"""
+Offline geocoding of profile locations.
+
+Exports:
+    geocode(text) -> (latitude, longitude) | None
+    grid_cell(latitude, longitude) -> (row, col)
+    distance_km(lat1, lon1, lat2, lon2) -> float
+    GRID_DEGREES
+
+Behavior:
+ - Locations are looked up in the bundled gazetteer (accounts/data/
+   gazetteer.csv: name, latitude, longitude; aliases are extra rows). No
+   network access is needed.
+ - Lookup is case-insensitive and ignores punctuation. "Nashua, NH" is tried
+   whole, then by its first comma-separated part ("nashua").
+ - Unknown places return None; such profiles are matched without distance.
+ - Volunteers are bucketed into GRID_DEGREES x GRID_DEGREES cells
+   (grid_row, grid_col) for the nearest-volunteer search in visits.candidates.
+"""
+
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+# About 28 km north-south; narrower east-west away from the equator
+GRID_DEGREES = 0.25
+GRID_COLUMNS = int(360 / GRID_DEGREES)
+
+EARTH_RADIUS_KM = 6371.0
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s,]')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _normalize(text):
+    text = _PUNCTUATION_RE.sub(' ', (text or '').lower())
+    return _SPACE_RE.sub(' ', text).strip(' ,')
+
+
+@lru_cache(maxsize=1)
+def _gazetteer():
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as fh:
+        return {
+            _normalize(row['name']): (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(fh)
+        }
+
+
+def geocode(text):
+    """Return (latitude, longitude) for a place name, or None if unknown."""
+    name = _normalize(text)
+    if not name:
+        return None
+    places = _gazetteer()
+    return places.get(name.replace(',', '')) or places.get(name.split(',')[0].strip())
+
+
+def grid_cell(latitude, longitude):
+    row = int(math.floor((latitude + 90) / GRID_DEGREES))
+    col = int(math.floor((longitude + 180) / GRID_DEGREES)) % GRID_COLUMNS
+    return row, col
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_volunteerprofile_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='active_visit_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
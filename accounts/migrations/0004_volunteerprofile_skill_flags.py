@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+# Frozen copy of accounts.skills as of this migration
+SKILL_TAGS = {'first aid': 1, 'nurse': 2, 'midwife': 4, 'obgyn': 8}
+
+
+def skill_flags_for(text):
+    text = (text or '').lower()
+    flags = 0
+    for keyword, flag in SKILL_TAGS.items():
+        if keyword in text:
+            flags |= flag
+    return flags
+
+
+def backfill_skill_flags(apps, schema_editor):
+    VolunteerProfile = apps.get_model('accounts', 'VolunteerProfile')
+    rows = list(VolunteerProfile.objects.exclude(skills='').only('id', 'skills'))
+    for row in rows:
+        row.skill_flags = skill_flags_for(row.skills)
+    VolunteerProfile.objects.bulk_update(rows, ['skill_flags'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_volunteerprofile_active_visit_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='skill_flags',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_skill_flags, migrations.RunPython.noop),
+    ]
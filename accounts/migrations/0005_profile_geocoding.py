@@ -0,0 +1,109 @@
+# Generated by Django 6.0 on 2026-10-18 14:25
+
+import csv
+import math
+import re
+from pathlib import Path
+
+from django.db import migrations, models
+
+# Frozen copies of accounts.geocoding as of this migration (the gazetteer
+# itself is data and is read from its file)
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / 'data' / 'gazetteer.csv'
+GRID_DEGREES = 0.25
+GRID_COLUMNS = int(360 / GRID_DEGREES)
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s,]')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _normalize(text):
+    text = _PUNCTUATION_RE.sub(' ', (text or '').lower())
+    return _SPACE_RE.sub(' ', text).strip(' ,')
+
+
+def _gazetteer():
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as fh:
+        return {
+            _normalize(row['name']): (float(row['latitude']), float(row['longitude']))
+            for row in csv.DictReader(fh)
+        }
+
+
+def geocode(places, text):
+    name = _normalize(text)
+    if not name:
+        return None
+    return places.get(name.replace(',', '')) or places.get(name.split(',')[0].strip())
+
+
+def grid_cell(latitude, longitude):
+    row = int(math.floor((latitude + 90) / GRID_DEGREES))
+    col = int(math.floor((longitude + 180) / GRID_DEGREES)) % GRID_COLUMNS
+    return row, col
+
+
+def geocode_existing_profiles(apps, schema_editor):
+    MotherProfile = apps.get_model('accounts', 'MotherProfile')
+    VolunteerProfile = apps.get_model('accounts', 'VolunteerProfile')
+    places = _gazetteer()
+
+    mothers = list(MotherProfile.objects.exclude(location='').only('id', 'location'))
+    for mother in mothers:
+        mother.latitude, mother.longitude = geocode(places, mother.location) or (None, None)
+    MotherProfile.objects.bulk_update(mothers, ['latitude', 'longitude'], batch_size=500)
+
+    volunteers = list(VolunteerProfile.objects.exclude(location='').only('id', 'location'))
+    for volunteer in volunteers:
+        point = geocode(places, volunteer.location)
+        if point is not None:
+            volunteer.latitude, volunteer.longitude = point
+            volunteer.grid_row, volunteer.grid_col = grid_cell(*point)
+    VolunteerProfile.objects.bulk_update(
+        volunteers, ['latitude', 'longitude', 'grid_row', 'grid_col'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_volunteerprofile_skill_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motherprofile',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='motherprofile',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='grid_col',
+            field=models.SmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='grid_row',
+            field=models.SmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerprofile',
+            index=models.Index(fields=['grid_row', 'grid_col'], name='volunteer_grid_idx'),
+        ),
+        migrations.RunPython(geocode_existing_profiles, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from .geocoding import geocode, grid_cell
+from .skills import skill_flags_for
+
 
 # ------------------------------------------------------
 # Custom User Model With Roles
@@ -40,9 +43,23 @@ class MotherProfile(models.Model):
     # Used for distance-based volunteer matching
     location = models.CharField(max_length=255, blank=True)
 
+    # Geocoded from `location` on save (accounts.geocoding); NULL if unknown
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+
     def __str__(self):
         return f"Mother: {self.user.username}"
 
+    def locate(self):
+        self.latitude, self.longitude = geocode(self.location) or (None, None)
+
+    def save(self, *args, **kwargs):
+        self.locate()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude'}
+        super().save(*args, **kwargs)
+
 
 # ------------------------------------------------------
 # Volunteer Profile Model (Final Version)
@@ -54,16 +71,65 @@ class VolunteerProfile(models.Model):
     skills = models.CharField(max_length=255, blank=True)
     certifications = models.CharField(max_length=255, blank=True)
 
+    # Bitmask of accounts.skills tags found in `skills`; set on save
+    skill_flags = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True)
+
     # Maximum number of visits a volunteer can handle
     service_limit = models.IntegerField(default=5)
 
     # Required for distance-based matching
     location = models.CharField(max_length=255, blank=True)
 
+    # Geocoded from `location` on save, plus the accounts.geocoding grid cell
+    # used by the nearest-volunteer search; all NULL if the place is unknown
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    grid_row = models.SmallIntegerField(null=True, blank=True, editable=False)
+    grid_col = models.SmallIntegerField(null=True, blank=True, editable=False)
+
+    # Number of assigned visits in Visit.ACTIVE_STATUSES.
+    # Maintained by visits.workload on every Visit change (F() updates); never
+    # set directly. save() never writes it back once the row exists, so a
+    # stale instance (admin form, profile edit) cannot undo those updates.
+    active_visit_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['grid_row', 'grid_col'], name='volunteer_grid_idx'),
+        ]
+
     def __str__(self):
         return f"Volunteer: {self.user.username}"
 
     # Helper: count active assignments
     def active_assignments(self):
-        from visits.models import Visit
-        return Visit.objects.filter(volunteer=self, status__in=['Scheduled', 'Pending']).count()
+        return self.active_visit_count
+
+    def has_capacity(self):
+        return self.active_visit_count < self.service_limit
+
+    def locate(self):
+        point = geocode(self.location)
+        if point is None:
+            self.latitude = self.longitude = self.grid_row = self.grid_col = None
+        else:
+            self.latitude, self.longitude = point
+            self.grid_row, self.grid_col = grid_cell(*point)
+
+    def save(self, *args, **kwargs):
+        self.skill_flags = skill_flags_for(self.skills)
+        self.locate()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = set()
+            if 'skills' in update_fields:
+                derived |= {'skill_flags'}
+            if 'location' in update_fields:
+                derived |= {'latitude', 'longitude', 'grid_row', 'grid_col'}
+            kwargs['update_fields'] = set(update_fields) | derived
+        elif not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'active_visit_count'
+            ]
+        super().save(*args, **kwargs)
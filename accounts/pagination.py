@@ -0,0 +1,98 @@
+# accounts/pagination.py
+"""
+Keyset (seek) pagination for dashboard sections.
+
+Exports:
+    KeysetPage(request, name, queryset, ordering, size=DASHBOARD_PAGE_SIZE)
+
+A page is fetched with WHERE (ordering columns) > (cursor values) LIMIT size+1
+instead of OFFSET, so the cost of a page does not depend on how many rows come
+before it. The cursor for section `name` is read from the `<name>_after` GET
+parameter and is the ordering values of the last row shown, e.g.
+"2025-12-15|42" for ordering ('date', 'id').
+
+The page is lazy: nothing is queried until the template iterates it.
+"""
+
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DASHBOARD_PAGE_SIZE = 20
+CURSOR_SEPARATOR = '|'
+
+
+class KeysetPage:
+    def __init__(self, request, name, queryset, ordering, size=DASHBOARD_PAGE_SIZE):
+        self.name = name
+        self.param = f'{name}_after'
+        self.queryset = queryset
+        self.ordering = ordering
+        self.size = size
+        self.cursor = request.GET.get(self.param)
+
+    def _field(self, order):
+        return queryset_field(self.queryset, order.lstrip('-'))
+
+    def _decode(self, cursor):
+        parts = cursor.split(CURSOR_SEPARATOR)
+        if len(parts) != len(self.ordering):
+            return None
+        try:
+            return [self._field(o).to_python(p) for o, p in zip(self.ordering, parts)]
+        except ValidationError:
+            return None
+
+    def _seek_filter(self, values):
+        # (a, b) > (va, vb)  ==  a > va OR (a = va AND b > vb)
+        condition = Q()
+        for i, order in enumerate(self.ordering):
+            name = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_order, prev_value in zip(self.ordering[:i], values[:i]):
+                term &= Q(**{prev_order.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+    @cached_property
+    def _rows(self):
+        qs = self.queryset.order_by(*self.ordering)
+        values = self._decode(self.cursor) if self.cursor else None
+        if values is not None:
+            qs = qs.filter(self._seek_filter(values))
+        return list(qs[:self.size + 1])
+
+    @property
+    def items(self):
+        return self._rows[:self.size]
+
+    @property
+    def has_more(self):
+        return len(self._rows) > self.size
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+    @property
+    def next_cursor(self):
+        if not self.has_more:
+            return ''
+        last = self.items[-1]
+        return CURSOR_SEPARATOR.join(
+            str(getattr(last, o.lstrip('-'))) for o in self.ordering
+        )
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def queryset_field(queryset, name):
+    if name == 'pk':
+        return queryset.model._meta.pk
+    return queryset.model._meta.get_field(name)
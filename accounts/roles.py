@@ -0,0 +1,76 @@
+# accounts/roles.py
+"""
+The current user's role profile, resolved once per request.
+
+Exports:
+    RoleProfileMiddleware          sets request.profile
+    get_profile(request) -> MotherProfile | VolunteerProfile | None
+    role_required(*roles, message="Permission denied.")
+    mother_required, volunteer_required, admin_required
+
+Behavior:
+ - request.profile is lazy (like request.user): the profile of the user's
+   role is loaded with select_related('user') the first time it is used and
+   then reused for the rest of the request. Requests that never touch it
+   cost nothing.
+ - It is falsy for admins, anonymous users and users whose profile row is
+   missing; test it with `if not request.profile`, not `is None`.
+ - role_required() implies login_required. A user with another role, or a
+   mother / volunteer without a profile, gets `message` and is sent back to
+   the dashboard, as the views did by hand before.
+"""
+
+from functools import wraps
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+from .models import MotherProfile, VolunteerProfile
+
+PROFILE_MODELS = {
+    'mother': MotherProfile,
+    'volunteer': VolunteerProfile,
+}
+
+
+def get_profile(request):
+    if not hasattr(request, '_cached_profile'):
+        user = request.user
+        model = PROFILE_MODELS.get(user.role) if user.is_authenticated else None
+        request._cached_profile = (
+            None if model is None
+            else model.objects.select_related('user').filter(user=user).first()
+        )
+    return request._cached_profile
+
+
+class RoleProfileMiddleware:
+    """Must come after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_profile(request))
+        return self.get_response(request)
+
+
+def role_required(*roles, message="Permission denied."):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.user.role not in roles or (
+                request.user.role in PROFILE_MODELS and not request.profile
+            ):
+                messages.error(request, message)
+                return redirect('dashboard')
+            return view(request, *args, **kwargs)
+        return login_required(wrapper)
+    return decorator
+
+
+mother_required = role_required('mother')
+volunteer_required = role_required('volunteer')
+admin_required = role_required('admin')
@@ -0,0 +1,51 @@
+# accounts/skills.py
+"""
+Skill tags for volunteer matching.
+
+Exports:
+    FIRST_AID, NURSE, MIDWIFE, OBGYN    (bit flags)
+    skill_flags_for(text) -> int
+    RISK_SKILLS                         {'high': mask, 'medium': mask}
+    flag_values_matching(mask) -> list[int]
+
+VolunteerProfile.skill_flags stores the tags found in the free-text skills
+field as a bitmask. It is filled in on save, so matching never scans the text.
+SQLite has no indexable bitwise test, so "has any skill in mask" is filtered
+as skill_flags IN (every flag value that shares a bit with mask). There are
+only 2**len(SKILL_TAGS) values, and the IN list can use the index.
+"""
+
+FIRST_AID = 1
+NURSE = 2
+MIDWIFE = 4
+OBGYN = 8
+
+# Keyword (lowercase substring of VolunteerProfile.skills) -> flag
+SKILL_TAGS = {
+    'first aid': FIRST_AID,
+    'nurse': NURSE,
+    'midwife': MIDWIFE,
+    'obgyn': OBGYN,
+}
+ALL_SKILLS = FIRST_AID | NURSE | MIDWIFE | OBGYN
+
+# Skills that make a volunteer suitable for a mother's risk level
+RISK_SKILLS = {
+    'high': FIRST_AID | NURSE | MIDWIFE | OBGYN,
+    'medium': FIRST_AID | NURSE | MIDWIFE,
+}
+
+
+def skill_flags_for(text):
+    """Return the bitmask of SKILL_TAGS keywords found in free text."""
+    text = (text or '').lower()
+    flags = 0
+    for keyword, flag in SKILL_TAGS.items():
+        if keyword in text:
+            flags |= flag
+    return flags
+
+
+def flag_values_matching(mask):
+    """Every skill_flags value sharing at least one bit with mask."""
+    return [value for value in range(ALL_SKILLS + 1) if value & mask]
@@ -1,6 +1,17 @@
+from datetime import date, time, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from .models import CustomUser, MotherProfile
+from .models import CustomUser, MotherProfile, VolunteerProfile
+from .geocoding import geocode, grid_cell
+from .pagination import DASHBOARD_PAGE_SIZE
+from .skills import MIDWIFE, NURSE
+from visits.models import Visit
+from visits.notifications import notify
 
 class MotherRegistrationTest(TestCase):
     def test_mother_registration_creates_profile(self):
@@ -17,3 +28,186 @@ class MotherRegistrationTest(TestCase):
         self.assertTrue(CustomUser.objects.filter(username='testmother').exists())
         user = CustomUser.objects.get(username='testmother')
         self.assertTrue(MotherProfile.objects.filter(user=user).exists())
+
+
+class VolunteerRegistrationTest(TestCase):
+    def test_registration_sets_skill_flags(self):
+        response = self.client.post(reverse('volunteer_register'), {
+            'username': 'testvolunteer',
+            'email': 'volunteer@example.com',
+            'password1': 'Strongpass123!',
+            'password2': 'Strongpass123!',
+            'skills': 'Registered Nurse, Midwife',
+            'certifications': '',
+            'service_limit': 5,
+        })
+        self.assertEqual(response.status_code, 302)
+        profile = VolunteerProfile.objects.get(user__username='testvolunteer')
+        self.assertEqual(profile.skill_flags, NURSE | MIDWIFE)
+
+        profile.skills = 'doula'
+        profile.save(update_fields=['skills'])
+        profile.refresh_from_db()
+        self.assertEqual(profile.skill_flags, 0)
+
+    def test_full_save_keeps_active_visit_count(self):
+        profile = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_stale', role='volunteer')
+        )
+        # an assignment elsewhere (visits.workload) after this instance was loaded
+        VolunteerProfile.objects.filter(pk=profile.pk).update(active_visit_count=F('active_visit_count') + 2)
+
+        profile.service_limit = 7
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual((profile.service_limit, profile.active_visit_count), (7, 2))
+
+
+class GeocodingTest(TestCase):
+    def test_geocode_gazetteer_names(self):
+        self.assertEqual(geocode('Nashua, NH'), geocode('nashua'))
+        self.assertEqual(geocode('  Banjara-Hills '), geocode('banjara hills'))
+        self.assertEqual(geocode('Bangalore'), geocode('Bengaluru'))
+        self.assertIsNone(geocode('Atlantis'))
+        self.assertIsNone(geocode(''))
+
+    def test_profiles_are_geocoded_on_save(self):
+        user = CustomUser.objects.create(username='vol_geo', role='volunteer')
+        volunteer = VolunteerProfile.objects.create(user=user, location='Nashua')
+        lat, lon = geocode('Nashua')
+        self.assertEqual((volunteer.latitude, volunteer.longitude), (lat, lon))
+        self.assertEqual((volunteer.grid_row, volunteer.grid_col), grid_cell(lat, lon))
+
+        volunteer.location = 'Atlantis'
+        volunteer.save(update_fields=['location'])
+        volunteer.refresh_from_db()
+        self.assertIsNone(volunteer.grid_row)
+
+        user = CustomUser.objects.create(username='mother_geo', role='mother')
+        mother = MotherProfile.objects.create(user=user, location='Chennai')
+        self.assertEqual((mother.latitude, mother.longitude), geocode('Chennai'))
+
+
+class DashboardPaginationTest(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create(username='admin1', role='admin')
+        user = CustomUser.objects.create(username='mother_dash', role='mother')
+        self.mother = MotherProfile.objects.create(user=user)
+        user = CustomUser.objects.create(username='vol_dash', role='volunteer')
+        self.volunteer = VolunteerProfile.objects.create(user=user)
+        self.client.force_login(self.admin)
+
+    def add_completed(self, n, start=0):
+        Visit.objects.bulk_create([
+            Visit(mother=self.mother, volunteer=self.volunteer, status='Completed',
+                  date=date(2024, 1, 1) + timedelta(days=start + i), time=time(10, 0))
+            for i in range(n)
+        ])
+
+    def render_dashboard(self, **params):
+        cache.clear()   # full renders, not cached fragments
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.add_completed(3)
+        _, small = self.render_dashboard()
+        self.add_completed(200, start=3)
+        _, large = self.render_dashboard()
+        self.assertEqual(small, large)
+
+    def test_load_more_continues_after_cursor(self):
+        self.add_completed(DASHBOARD_PAGE_SIZE + 5)
+        response, _ = self.render_dashboard()
+        first = response.context['completed_visits']
+        self.assertTrue(first.has_more)
+
+        response, _ = self.render_dashboard(completed_after=first.next_cursor)
+        second = response.context['completed_visits']
+        self.assertEqual(len(second), 5)
+        self.assertFalse(second.has_more)
+        self.assertLess(second.items[0].date, first.items[-1].date)
+
+
+class DashboardFragmentCacheTest(TestCase):
+    LIST_TABLES = ('visits_visit', 'visits_notification', 'visits_medicalreport',
+                   'accounts_volunteerprofile')
+
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create(username='mother_cache', role='mother')
+        self.mother = MotherProfile.objects.create(user=user)
+        self.admin = CustomUser.objects.create(username='admin_cache', role='admin')
+        Visit.objects.create(mother=self.mother, date=date(2030, 1, 7), time=time(10, 0))
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, [
+            q['sql'] for q in ctx.captured_queries
+            if any(f'"{table}"' in q['sql'] for table in self.LIST_TABLES)
+        ]
+
+    def test_unchanged_refresh_runs_no_list_queries(self):
+        self.client.force_login(self.mother.user)
+        _, first = self.list_queries()
+        self.assertTrue(first)
+        response, second = self.list_queries()
+        self.assertEqual(second, [])
+        self.assertContains(response, 'Jan. 7, 2030')
+
+    def test_changes_bump_their_section(self):
+        self.client.force_login(self.mother.user)
+        self.list_queries()
+        Visit.objects.create(mother=self.mother, date=date(2030, 2, 4), time=time(9, 0))
+        notify(self.mother.user, "Visit confirmed.")
+        response, queries = self.list_queries()
+        self.assertContains(response, 'Feb. 4, 2030')
+        self.assertContains(response, 'Visit confirmed.')
+        self.assertFalse(any('visits_medicalreport' in sql for sql in queries))
+
+    def test_admin_profile_list_bumped_by_new_volunteer(self):
+        self.client.force_login(self.admin)
+        self.list_queries()
+        user = CustomUser.objects.create(username='vol_cache', role='volunteer')
+        VolunteerProfile.objects.create(user=user)
+        response, queries = self.list_queries()
+        self.assertContains(response, 'vol_cache')
+        self.assertFalse(any('"visits_visit"' in sql for sql in queries))
+
+
+class RoleProfileMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create(username='mother_role', role='mother')
+        self.mother = MotherProfile.objects.create(user=user)
+        self.admin = CustomUser.objects.create(username='admin_role', role='admin')
+
+    def test_profile_loaded_once_with_its_user(self):
+        self.client.force_login(self.mother.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Welcome, mother_role')
+        profile_queries = [
+            q['sql'] for q in ctx.captured_queries if 'FROM "accounts_motherprofile"' in q['sql']
+        ]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertIn('JOIN "accounts_customuser"', profile_queries[0])
+
+    def test_role_required_redirects_other_roles(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('request_visit'))
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_mother_cannot_cancel_another_mothers_visit(self):
+        other = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='other_role', role='mother')
+        )
+        visit = Visit.objects.create(mother=other, date=date(2030, 1, 7), time=time(10, 0))
+        self.client.force_login(self.mother.user)
+        self.client.get(reverse('cancel_visit', args=[visit.id]))
+        visit.refresh_from_db()
+        self.assertEqual(visit.status, 'Pending')
@@ -2,10 +2,40 @@ from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
+from django.utils.functional import SimpleLazyObject
 
 from .forms import MotherRegisterForm, VolunteerRegisterForm, LoginForm
 from .models import CustomUser, MotherProfile, VolunteerProfile
-from visits.models import Visit, Notification, Availability
+from .pagination import KeysetPage
+from visits.dashboards import DASHBOARD_CACHE_TIMEOUT, dashboard_versions
+from visits.models import Visit, Availability, MedicalReport
+from visits.notifications import inbox, unread_count
+
+# Columns each dashboard row actually renders
+VISIT_LIST_FIELDS = ('id', 'date', 'time', 'status')
+REPORTS_SHOWN = 10
+QUEUE_ORDERING = ('priority_rank', 'date', 'id')
+
+
+def _dashboard_context(request, sections, **context):
+    """
+    Context shared by the dashboards. Lists are left lazy (querysets,
+    KeysetPage, SimpleLazyObject) so a section served from its cached
+    fragment never queries them; `versions` keys each fragment.
+    """
+    user = request.user
+    sections = dict(
+        sections,
+        notifications=('notifications', user.pk),
+        broadcasts=('notifications', 'role', user.role),
+    )
+    context.update(
+        notifications=SimpleLazyObject(lambda: inbox(user)),
+        unread_count=unread_count(user),
+        versions=dashboard_versions(sections),
+        dashboard_cache_timeout=DASHBOARD_CACHE_TIMEOUT,
+    )
+    return context
 
 
 # ---------------------------------------------------------
@@ -85,53 +115,102 @@ def dashboard(request):
     # -----------------------------------------------------
     # MOTHER DASHBOARD
     # -----------------------------------------------------
-    if user.role == "mother":
-        mother = MotherProfile.objects.get(user=user)
-        visits = Visit.objects.filter(mother=mother).order_by('-date')
-        notifications = Notification.objects.filter(user=user, is_read=False)
-
-        return render(request, 'accounts/mother_dashboard.html', {
-            'mother': mother,
-            'visits': visits,
-            'notifications': notifications,
-        })
+    if user.role == "mother" and request.profile:
+        mother = request.profile
+        visits = KeysetPage(
+            request, 'visits',
+            Visit.objects.filter(mother=mother).only(*VISIT_LIST_FIELDS),
+            ('-date', '-id'),
+        )
+        reports = (
+            MedicalReport.objects.filter(mother=mother)
+            .only('id', 'original_name', 'size', 'uploaded_at')
+            .order_by('-uploaded_at')[:REPORTS_SHOWN]
+        )
+
+        return render(request, 'accounts/mother_dashboard.html', _dashboard_context(
+            request,
+            {'visits': ('visits', 'mother', mother.pk), 'reports': ('reports', mother.pk)},
+            mother=mother,
+            visits=visits,
+            reports=reports,
+        ))
 
     # -----------------------------------------------------
     # VOLUNTEER DASHBOARD
     # -----------------------------------------------------
-    if user.role == "volunteer":
-        volunteer = VolunteerProfile.objects.get(user=user)
-        visits = Visit.objects.filter(volunteer=volunteer).order_by('-date')
-        notifications = Notification.objects.filter(user=user, is_read=False)
-
-        return render(request, 'accounts/volunteer_dashboard.html', {
-            'volunteer': volunteer,
-            'visits': visits,
-            'notifications': notifications,
-        })
+    if user.role == "volunteer" and request.profile:
+        volunteer = request.profile
+        visits = KeysetPage(
+            request, 'visits',
+            Visit.objects.filter(volunteer=volunteer).only(*VISIT_LIST_FIELDS),
+            ('-date', '-id'),
+        )
+
+        return render(request, 'accounts/volunteer_dashboard.html', _dashboard_context(
+            request,
+            {'visits': ('visits', 'volunteer', volunteer.pk)},
+            volunteer=volunteer,
+            visits=visits,
+        ))
 
     # -----------------------------------------------------
     # ADMIN DASHBOARD — final corrected version
     # -----------------------------------------------------
     if user.role == "admin":
 
-        # Group visits for clean admin UI
-        pending_visits = Visit.objects.filter(status="Pending").order_by('date')
-        awaiting_approval = Visit.objects.filter(status="Awaiting Approval").order_by('date')
-        scheduled_visits = Visit.objects.filter(status="Scheduled").order_by('date')
-        completed_visits = Visit.objects.filter(status="Completed").order_by('-date')
-
-        volunteers = VolunteerProfile.objects.all()
-        mothers = MotherProfile.objects.all()
-
-        return render(request, 'accounts/admin_dashboard.html', {
-            'pending_visits': pending_visits,
-            'awaiting_approval': awaiting_approval,
-            'scheduled_visits': scheduled_visits,
-            'completed_visits': completed_visits,
-            'volunteers': volunteers,
-            'mothers': mothers,
-        })
+        # Group visits for clean admin UI; each section is its own keyset
+        # page and joins only the usernames it shows
+        open_visits = Visit.objects.select_related(
+            'mother__user', 'suggested_volunteer__user'
+        ).only(
+            *VISIT_LIST_FIELDS, 'priority', 'priority_rank',
+            'mother__user__username', 'suggested_volunteer__user__username',
+        )
+        assigned_visits = Visit.objects.select_related(
+            'mother__user', 'volunteer__user'
+        ).only(
+            *VISIT_LIST_FIELDS,
+            'mother__user__username', 'volunteer__user__username',
+        )
+
+        # Open queues: most urgent first (priority, then date, then request age)
+        pending_visits = KeysetPage(
+            request, 'pending', open_visits.filter(status="Pending"), QUEUE_ORDERING
+        )
+        awaiting_approval = KeysetPage(
+            request, 'awaiting', open_visits.filter(status="Awaiting Approval"), QUEUE_ORDERING
+        )
+        scheduled_visits = KeysetPage(
+            request, 'scheduled', assigned_visits.filter(status="Scheduled"), ('date', 'id')
+        )
+        completed_visits = KeysetPage(
+            request, 'completed', assigned_visits.filter(status="Completed"), ('-date', '-id')
+        )
+
+        volunteers = KeysetPage(
+            request, 'volunteers',
+            VolunteerProfile.objects.select_related('user')
+            .only('id', 'skills', 'service_limit', 'user__username'),
+            ('id',),
+        )
+        mothers = KeysetPage(
+            request, 'mothers',
+            MotherProfile.objects.select_related('user')
+            .only('id', 'due_date', 'risk_level', 'user__username'),
+            ('id',),
+        )
+
+        return render(request, 'accounts/admin_dashboard.html', _dashboard_context(
+            request,
+            {'visits': ('visits',), 'profiles': ('profiles',)},
+            pending_visits=pending_visits,
+            awaiting_approval=awaiting_approval,
+            scheduled_visits=scheduled_visits,
+            completed_visits=completed_visits,
+            volunteers=volunteers,
+            mothers=mothers,
+        ))
 
     # If user has no valid role
     messages.error(request, "Permission denied.")
@@ -0,0 +1,169 @@
+# perinatal_support_scheduler/middleware.py
+"""
+Per-request SQL profiling (opt-in, works with DEBUG off).
+
+Exports:
+    QueryProfileMiddleware
+    QueryProfile                  (execute_wrapper that records one request)
+    query_shape(sql) -> str
+
+Settings:
+    SQL_PROFILE = False           enable the middleware
+    SQL_PROFILE_LOG               rolling log file (JSON lines)
+    SQL_PROFILE_LOG_BYTES / SQL_PROFILE_LOG_BACKUPS
+    SQL_PROFILE_REPEAT_THRESHOLD  same-shape queries per request that count as N+1
+    SQL_PROFILE_SLOWEST           slowest statements kept per request
+
+Behavior:
+ - Disabled, the middleware raises MiddlewareNotUsed at startup and is
+   dropped from the chain, so it costs nothing.
+ - Enabled, every statement goes through connection.execute_wrapper (not
+   connection.queries, which needs DEBUG). The response gets a Server-Timing
+   header ("db;dur=..;desc=\"N queries\", app;dur=..") and one JSON line per
+   request is written to the log; manage.py sql_report ranks the views.
+ - Queries are grouped by shape (SQL with literals and IN lists collapsed);
+   a shape run REPEAT_THRESHOLD times or more in one request is flagged as
+   an N+1 and logged as a warning.
+ - Queries run while a streaming response is consumed are not counted.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('perinatal_support_scheduler.sql')
+profile_log = logging.getLogger('perinatal_support_scheduler.sql.profile')
+
+DEFAULT_REPEAT_THRESHOLD = 5
+DEFAULT_SLOWEST = 3
+DEFAULT_LOG_BYTES = 5 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 5
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """SQL with literals replaced by ? and IN lists collapsed, for grouping."""
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+class QueryProfile:
+    """Records the statements run through it (see connection.execute_wrapper)."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []   # (seconds, sql)
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.statements.append((elapsed, sql))
+            self.shapes[query_shape(sql)] += 1
+
+    def slowest(self, n):
+        return sorted(self.statements, key=lambda s: s[0], reverse=True)[:n]
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+class QueryProfileMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_PROFILE', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.repeat_threshold = getattr(
+            settings, 'SQL_PROFILE_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD
+        )
+        self.slowest = getattr(settings, 'SQL_PROFILE_SLOWEST', DEFAULT_SLOWEST)
+        self._configure_log()
+
+    def _configure_log(self):
+        # A LOGGING setting for this logger takes precedence
+        path = getattr(settings, 'SQL_PROFILE_LOG', None)
+        if not path or profile_log.handlers:
+            return
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=getattr(settings, 'SQL_PROFILE_LOG_BYTES', DEFAULT_LOG_BYTES),
+            backupCount=getattr(settings, 'SQL_PROFILE_LOG_BACKUPS', DEFAULT_LOG_BACKUPS),
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        profile_log.addHandler(handler)
+        profile_log.setLevel(logging.INFO)
+        profile_log.propagate = False
+
+    def __call__(self, request):
+        profile = QueryProfile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        view = self._view_name(request)
+        repeated = profile.repeated(self.repeat_threshold)
+        response['Server-Timing'] = self._server_timing(profile, total, repeated)
+
+        for shape, n in repeated:
+            logger.warning("Possible N+1 in %s: %d x %s", view, n, shape)
+
+        profile_log.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': profile.count,
+            'db_ms': round(profile.duration * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'repeated': [{'sql': shape, 'count': n} for shape, n in repeated],
+            'slowest': [
+                {'sql': sql, 'ms': round(elapsed * 1000, 2)}
+                for elapsed, sql in profile.slowest(self.slowest)
+            ],
+        }))
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match._func_path
+
+    @staticmethod
+    def _server_timing(profile, total, repeated):
+        metrics = [
+            f'db;dur={profile.duration * 1000:.2f};desc="{profile.count} queries"',
+            f'app;dur={total * 1000:.2f}',
+        ]
+        if repeated:
+            metrics.append(f'n-plus-one;desc="{len(repeated)} repeated shapes"')
+        return ', '.join(metrics)
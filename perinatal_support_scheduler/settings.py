@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,11 +30,13 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ----------------------------------------------------
 MIDDLEWARE = [
+    'perinatal_support_scheduler.middleware.QueryProfileMiddleware',  # off unless SQL_PROFILE
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.roles.RoleProfileMiddleware',  # lazy request.profile
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,9 +80,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Writers take the lock at BEGIN and wait for each other instead
+            # of failing with "database is locked" when a read upgrades
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file, not shared-cache memory, so tests exercise real locking
+        # between threads (visits.tests.ConcurrentApprovalTest)
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# ----------------------------------------------------
+# CACHE ('default' is shared by every process on this
+# host: the web server and run_matching_worker read and
+# bump the same candidate pool generation, dashboard
+# versions and unread counts. 'candidates' holds each
+# process's own candidate pools, checked against that
+# generation; visits/candidates.py)
+# ----------------------------------------------------
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        # The test runner points this at a throwaway directory
+        'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / 'cache'),
+        # Version and generation keys never expire; keep culling
+        # (which drops a share of all entries) rare.
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'candidates': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'candidate-pools',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Tests get their own file cache (perinatal_support_scheduler/test_runner.py)
+TEST_RUNNER = 'perinatal_support_scheduler.test_runner.TestRunner'
+
+# ----------------------------------------------------
+# SQL PROFILING (query count, DB time and N+1 warnings per
+# request; summarise the log with manage.py sql_report)
+# ----------------------------------------------------
+SQL_PROFILE = False
+SQL_PROFILE_LOG = BASE_DIR / 'logs' / 'sql_profile.log'
+SQL_PROFILE_REPEAT_THRESHOLD = 5
+
 # ----------------------------------------------------
 # PASSWORD VALIDATION
 # ----------------------------------------------------
@@ -117,6 +164,15 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Medical report uploads stream to a temporary file chunk by chunk while
+# being hashed (visits/uploads.py, installed by that view only); nothing is
+# buffered in memory
+MEDICAL_REPORT_MAX_BYTES = 25 * 1024 * 1024
+
+# Longest acceptable wait from visit request to assigned volunteer, per
+# priority (Matching SLA page, visits/sla.py)
+VISIT_SLA_HOURS = {'High': 24, 'Medium': 72, 'Low': 168}
+
 # ----------------------------------------------------
 # CUSTOM USER MODEL & LOGIN SETTINGS
 # ----------------------------------------------------
@@ -0,0 +1,43 @@
+# perinatal_support_scheduler/test_runner.py
+"""
+Test runner with a private file cache.
+
+Exports:
+    TestRunner                    settings.TEST_RUNNER
+
+Behavior:
+ - The default cache is a directory shared by the dev server and
+   run_matching_worker. Tests clear it and render fragments keyed by user
+   pks that are reused from run to run, so the run gets a fresh temporary
+   directory instead, removed afterwards.
+ - The directory is also exported as CACHE_DIR, which settings.py reads, so
+   processes the tests start (visits.tests.SharedCacheTest) share it.
+"""
+
+import os
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.TemporaryDirectory(prefix='pss-test-cache-')
+        self._saved_cache_dir = os.environ.get('CACHE_DIR')
+        os.environ['CACHE_DIR'] = self._cache_dir.name
+        caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+        caches['default']['LOCATION'] = self._cache_dir.name
+        self._cache_settings = override_settings(CACHES=caches)
+        self._cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_settings.disable()
+        if self._saved_cache_dir is None:
+            os.environ.pop('CACHE_DIR', None)
+        else:
+            os.environ['CACHE_DIR'] = self._saved_cache_dir
+        self._cache_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
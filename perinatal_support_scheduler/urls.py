@@ -9,6 +9,7 @@ urlpatterns = [
     path('', home, name='home'),
     path('accounts/', include('accounts.urls')),
     path('visits/', include('visits.urls')),
+    path('api/v1/', include('visits.api_urls')),
 ]
 
 # Serve media files in development
@@ -1,3 +1,33 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from .models import Visit
+from .assignment import run_batch_assignment
+from .services import AssignmentError, approve_suggestions
 
-# Register your models here.
+
+@admin.register(Visit)
+class VisitAdmin(admin.ModelAdmin):
+    list_display = ('id', 'mother', 'date', 'time', 'priority', 'status',
+                    'suggested_volunteer', 'volunteer')
+    list_filter = ('status', 'priority')
+    list_select_related = ('mother__user', 'suggested_volunteer__user', 'volunteer__user')
+    actions = ['batch_assign', 'approve_suggested']
+
+    @admin.action(description="Suggest volunteers (batch assignment)")
+    def batch_assign(self, request, queryset):
+        result = run_batch_assignment(visits=queryset)
+        self.message_user(
+            request,
+            f"{result['suggested']} of {result['visits']} open visits have a suggestion."
+        )
+
+    @admin.action(description="Approve suggested volunteers")
+    def approve_suggested(self, request, queryset):
+        try:
+            result = approve_suggestions(queryset.values_list('id', flat=True))
+        except AssignmentError as exc:
+            self.message_user(request, str(exc), level=messages.ERROR)
+            return
+        self.message_user(
+            request,
+            f"Approved {len(result['approved'])} visits; skipped {len(result['skipped'])}."
+        )
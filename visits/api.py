@@ -0,0 +1,173 @@
+# visits/api.py
+"""
+Read-only JSON API (version 1) for polling clients.
+
+Exports:
+    visits(request)          GET /api/v1/visits/          the user's visits
+    notifications(request)   GET /api/v1/notifications/   unread inbox
+    queues(request)          GET /api/v1/queues/          admin: open visits
+
+Behavior:
+ - Every collection has a version stamp: its row count plus its latest
+   change (Visit.updated_at, or the newest notification id), read with one
+   aggregate query. The stamp is the ETag.
+ - A request whose If-None-Match matches gets 304 Not Modified from
+   django.views.decorators.http.condition before the view runs: nothing is
+   loaded or serialized.
+ - Mothers see their visits, volunteers the visits assigned to them;
+   admins poll the queues instead, most urgent first (priority, then
+   date). Lists hold at most API_LIMIT rows (a user's visits: upcoming and
+   most recent first); the stamp covers the whole collection, so it changes
+   whenever any of it does.
+ - Unauthenticated requests get 401 JSON instead of the login redirect.
+"""
+
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition, require_GET
+
+from .models import Visit
+from .notifications import inbox, unread_for
+
+API_LIMIT = 100
+
+OPEN_STATUSES = ('Pending', 'Awaiting Approval')
+
+VISIT_FIELDS = (
+    'id', 'date', 'time', 'status', 'priority',
+    'mother__user__username', 'volunteer__user__username',
+    'suggested_volunteer__user__username', 'updated_at',
+)
+
+
+def _user_visits(user):
+    if user.role == 'mother':
+        return Visit.objects.filter(mother__user=user)
+    if user.role == 'volunteer':
+        return Visit.objects.filter(volunteer__user=user)
+    return None
+
+
+def _open_visits():
+    return Visit.objects.filter(status__in=OPEN_STATUSES)
+
+
+def _stamp(queryset, latest_field):
+    row = queryset.aggregate(n=Count('id'), latest=Max(latest_field))
+    latest = row['latest']
+    if hasattr(latest, 'timestamp'):
+        latest = int(latest.timestamp() * 1_000_000)
+    return f"{row['n']}-{latest or 0}"
+
+
+def _visits_version(request):
+    queryset = _user_visits(request.user)
+    return None if queryset is None else _stamp(queryset, 'updated_at')
+
+
+def _notifications_version(request):
+    return _stamp(unread_for(request.user), 'id')
+
+
+def _queues_version(request):
+    if request.user.role != 'admin':
+        return None
+    return _stamp(_open_visits(), 'updated_at')
+
+
+def api_view(version_func):
+    """GET-only, JSON 401 for anonymous users, ETag from version_func."""
+    def etag(request, *args, **kwargs):
+        request.api_version = version_func(request)
+        if request.api_version is None:
+            return None
+        return f'"{request.user.pk}-{request.api_version}"'
+
+    def decorator(view):
+        conditional = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': "Authentication required."}, status=401)
+            response = conditional(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+
+        return require_GET(wrapper)
+    return decorator
+
+
+def _forbidden():
+    return JsonResponse({'error': "Permission denied."}, status=403)
+
+
+def _visit_rows(queryset):
+    return [
+        {
+            'id': row['id'],
+            'date': row['date'],
+            'time': row['time'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'mother': row['mother__user__username'],
+            'volunteer': row['volunteer__user__username'],
+            'suggested_volunteer': row['suggested_volunteer__user__username'],
+            'updated_at': row['updated_at'],
+        }
+        for row in queryset.values(*VISIT_FIELDS)[:API_LIMIT]
+    ]
+
+
+# ======================================================
+#  MOTHER / VOLUNTEER — VISITS
+# ======================================================
+@api_view(_visits_version)
+def visits(request):
+    queryset = _user_visits(request.user)
+    if queryset is None:
+        return _forbidden()
+    return JsonResponse({
+        'version': request.api_version,
+        'visits': _visit_rows(queryset.order_by('-date', '-id')),
+    })
+
+
+# ======================================================
+#  ALL ROLES — UNREAD NOTIFICATIONS
+# ======================================================
+@api_view(_notifications_version)
+def notifications(request):
+    unread = int(request.api_version.split('-')[0])
+    return JsonResponse({
+        'version': request.api_version,
+        'unread_count': unread,
+        'notifications': [
+            {
+                'id': note.id,
+                'message': note.message,
+                'created_at': note.created_at,
+                'broadcast': note.is_broadcast,
+            }
+            for note in inbox(request.user)
+        ],
+    })
+
+
+# ======================================================
+#  ADMIN — OPEN VISIT QUEUES
+# ======================================================
+@api_view(_queues_version)
+def queues(request):
+    if request.user.role != 'admin':
+        return _forbidden()
+    open_visits = _open_visits().order_by('priority_rank', 'date', 'time', 'id')
+    return JsonResponse({
+        'version': request.api_version,
+        'pending': _visit_rows(open_visits.filter(status='Pending')),
+        'awaiting_approval': _visit_rows(open_visits.filter(status='Awaiting Approval')),
+    })
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import api
+
+urlpatterns = [
+    path('visits/', api.visits, name='api_visits'),
+    path('notifications/', api.notifications, name='api_notifications'),
+    path('queues/', api.queues, name='api_queues'),
+]
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class VisitsConfig(AppConfig):
     name = 'visits'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,300 @@
+# visits/assignment.py
+"""
+Global batch assignment engine.
+
+Exports:
+    run_batch_assignment(visits=None, commit=True) -> dict
+
+Behavior:
+ - Loads every open visit (Pending / Awaiting Approval with no volunteer yet)
+   and every volunteer with remaining service_limit capacity.
+ - Visits sharing date, time, risk and priority score identically, so they
+   are grouped and each group becomes one demand node of the matching.
+ - A group's candidates pass the same checks as suggest_volunteer
+   (visits.utils): available that weekday, not already booked at that time
+   (visits.bookings, one query over the dates of the open visits) and, for
+   Medium / High risk, holding a matching skill when any such candidate is
+   left.
+ - Priority tiers are solved in order (High, Medium, Low). Within a tier the
+   best-scoring edges are taken first, then augmenting paths shift earlier
+   allocations onto volunteers with spare capacity, so each tier is served as
+   fully as capacity allows without giving up a higher-priority allocation.
+ - Writes suggested_volunteer / status (and updated_at, and suggested_at
+   for a visit's first suggestion) for every changed visit in one
+   executemany() UPDATE.
+ - The statistics rollups of the affected days are refreshed after commit
+   (visits.stats).
+"""
+
+from collections import defaultdict, deque
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .bookings import slots_from_bytes, visit_mask
+from .dashboards import bump_visit_dashboards
+from .models import Availability, Visit, VolunteerBooking
+from .stats import schedule_stats_refresh
+from .timeslots import minute_of_day
+from .utils import score_candidate
+from accounts.models import VolunteerProfile
+from accounts.skills import RISK_SKILLS
+
+OPEN_STATUSES = ['Pending', 'Awaiting Approval']
+PRIORITY_ORDER = sorted(Visit.PRIORITY_RANK, key=Visit.PRIORITY_RANK.get)
+
+
+def _load_volunteers():
+    """Return {volunteer_id: VolunteerProfile} for volunteers with spare capacity."""
+    volunteers = (
+        VolunteerProfile.objects
+        .filter(active_visit_count__lt=F('service_limit'))
+        .only('id', 'skill_flags', 'service_limit', 'active_visit_count')
+    )
+    return {v.id: v for v in volunteers}
+
+
+def _load_slots(volunteer_ids):
+    """Return {weekday: {volunteer_id: [(start_minute, end_minute), ...]}}."""
+    slots = defaultdict(lambda: defaultdict(list))
+    rows = (
+        Availability.objects
+        .filter(weekday__isnull=False)
+        .values_list('volunteer_id', 'weekday', 'start_minute', 'end_minute')
+    )
+    for volunteer_id, weekday, start, end in rows:
+        if volunteer_id in volunteer_ids:
+            slots[weekday][volunteer_id].append((start, end))
+    return slots
+
+
+def _load_bookings(volunteer_ids, dates):
+    """Return {(volunteer_id, date): booked slot mask} for these dates."""
+    if not dates:
+        return {}
+    rows = (
+        VolunteerBooking.objects
+        .filter(date__range=(min(dates), max(dates)))
+        .values_list('volunteer_id', 'date', 'slots')
+    )
+    return {
+        (volunteer_id, day): slots_from_bytes(slots)
+        for volunteer_id, day, slots in rows
+        if volunteer_id in volunteer_ids
+    }
+
+
+def _eligible(day_slots, bookings, volunteers, day, mask, risk):
+    """The weekday's {volunteer_id: slots} minus volunteers booked at `mask`
+    that day; only skilled ones for Medium / High risk when any is left."""
+    free = {
+        vid: vid_slots for vid, vid_slots in day_slots.items()
+        if not bookings.get((vid, day), 0) & mask
+    }
+    required = RISK_SKILLS.get(risk)
+    if required:
+        skilled = {vid: v for vid, v in free.items() if volunteers[vid].skill_flags & required}
+        if skilled:
+            return skilled
+    return free
+
+
+class _Matcher:
+    """Capacitated matching between visit groups and volunteers."""
+
+    def __init__(self, demand, pools, remaining):
+        self.demand = demand          # group -> visits still unassigned
+        self.pools = pools            # group -> {volunteer_id: score}
+        self.remaining = remaining    # volunteer_id -> spare capacity
+        self.alloc = defaultdict(lambda: defaultdict(int))    # group -> vid -> n
+        self.holders = defaultdict(lambda: defaultdict(int))  # vid -> group -> n
+        self.dead_groups = set()
+        self.dead_volunteers = set()
+
+    def _move(self, group, volunteer_id, amount):
+        self.alloc[group][volunteer_id] += amount
+        self.holders[volunteer_id][group] += amount
+        if not self.alloc[group][volunteer_id]:
+            del self.alloc[group][volunteer_id]
+            del self.holders[volunteer_id][group]
+
+    def solve_tier(self, groups):
+        # 1) Greedy: best-scoring edges first
+        edges = sorted(
+            ((score, g, vid) for g in groups for vid, score in self.pools[g].items()),
+            key=lambda e: -e[0],
+        )
+        for _, g, vid in edges:
+            take = min(self.demand[g], self.remaining[vid])
+            if take > 0:
+                self._move(g, vid, take)
+                self.demand[g] -= take
+                self.remaining[vid] -= take
+
+        # 2) Augment: serve what greedy left unassigned by re-routing
+        for g in groups:
+            while self.demand[g] > 0 and g not in self.dead_groups:
+                if not self._augment(g):
+                    break
+
+    def _augment(self, start):
+        """Find and apply one augmenting path from `start`; False if none."""
+        parent = {}  # volunteer_id -> (group it was reached from)
+        via = {}     # group -> volunteer_id it was reached through
+        seen_groups = {start}
+        queue = deque([start])
+        free = None
+
+        while queue and free is None:
+            g = queue.popleft()
+            for vid in self.pools[g]:
+                if vid in parent or vid in self.dead_volunteers:
+                    continue
+                parent[vid] = g
+                if self.remaining[vid] > 0:
+                    free = vid
+                    break
+                for h, units in self.holders[vid].items():
+                    if units > 0 and h not in seen_groups:
+                        seen_groups.add(h)
+                        via[h] = vid
+                        queue.append(h)
+
+        if free is None:
+            # Nothing reachable from here can ever free capacity again
+            self.dead_groups |= seen_groups
+            self.dead_volunteers |= set(parent)
+            return False
+
+        # Walk back from the free volunteer and find the bottleneck
+        path = []
+        vid = free
+        while True:
+            g = parent[vid]
+            path.append((g, vid))
+            if g == start:
+                break
+            vid = via[g]
+        amount = min(self.demand[start], self.remaining[free])
+        for g, vid in path:
+            if g != start:
+                amount = min(amount, self.alloc[g][via[g]])
+
+        for g, vid in path:
+            self._move(g, vid, amount)
+            if g != start:
+                self._move(g, via[g], -amount)
+        self.demand[start] -= amount
+        self.remaining[free] -= amount
+        return True
+
+
+def _write_suggestions(changed):
+    """
+    Persist suggested_volunteer / status for many visits at once.
+
+    One prepared UPDATE run with executemany: bulk_update() builds a CASE
+    expression per row, which dominates the run time at this scale.
+    """
+    qn = connection.ops.quote_name
+    opts = Visit._meta
+    suggested_at = qn(opts.get_field('suggested_at').column)
+    sql = 'UPDATE {} SET {} = %s, {} = %s, {} = %s, {} = COALESCE({}, %s) WHERE {} = %s'.format(
+        qn(opts.db_table),
+        qn(opts.get_field('suggested_volunteer').column),
+        qn(opts.get_field('status').column),
+        qn(opts.get_field('updated_at').column),
+        suggested_at, suggested_at,
+        qn(opts.pk.column),
+    )
+    now = opts.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+    rows = [
+        (v.suggested_volunteer_id, v.status, now, now if v.suggested_volunteer_id else None, v.pk)
+        for v in changed
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+        schedule_stats_refresh((v.date, None) for v in changed)
+        bump_visit_dashboards([v.mother_id for v in changed], [])
+
+
+def run_batch_assignment(visits=None, commit=True):
+    """
+    Suggest volunteers for all open visits at once.
+
+    `visits` optionally narrows the run to a Visit queryset (capacity is still
+    accounted globally). Returns a summary dict with counts.
+    """
+    open_visits = Visit.objects if visits is None else visits
+    open_visits = list(
+        open_visits
+        .filter(status__in=OPEN_STATUSES, volunteer__isnull=True)
+        .select_related('mother')
+        .only('id', 'date', 'time', 'priority', 'status',
+              'suggested_volunteer_id', 'mother__risk_level')
+        .order_by('date', 'time', 'id')
+    )
+
+    volunteers = _load_volunteers()
+    slots = _load_slots(volunteers.keys())
+    bookings = _load_bookings(volunteers.keys(), {visit.date for visit in open_visits})
+    remaining = {
+        vid: v.service_limit - v.active_visit_count for vid, v in volunteers.items()
+    }
+
+    # 1) Group interchangeable visits and score each group's pool once
+    groups = defaultdict(list)
+    for visit in open_visits:
+        key = (
+            visit.date,
+            minute_of_day(visit.time),
+            (visit.mother.risk_level or '').lower(),
+            visit.priority,
+        )
+        groups[key].append(visit)
+
+    pools = {}
+    for key, group_visits in groups.items():
+        day, minute, risk, _ = key
+        eligible = _eligible(
+            slots[day.weekday()], bookings, volunteers, day, visit_mask(group_visits[0].time), risk,
+        )
+        pools[key] = {
+            vid: score_candidate(
+                volunteers[vid], volunteers[vid].active_visit_count, risk,
+                any(start <= minute < end for start, end in day_slots),
+            )
+            for vid, day_slots in eligible.items()
+        }
+
+    # 2) Solve tier by tier
+    matcher = _Matcher({k: len(v) for k, v in groups.items()}, pools, remaining)
+    tiers = PRIORITY_ORDER + sorted({k[3] for k in groups} - set(PRIORITY_ORDER))
+    for priority in tiers:
+        matcher.solve_tier([k for k in groups if k[3] == priority])
+
+    # 3) Hand out each group's allocation, best volunteer to earliest visit
+    changed = []
+    suggested = 0
+    for key, group_visits in groups.items():
+        allocation = sorted(
+            matcher.alloc[key].items(), key=lambda item: -pools[key][item[0]]
+        )
+        picks = [vid for vid, units in allocation for _ in range(units)]
+        for i, visit in enumerate(group_visits):
+            vid = picks[i] if i < len(picks) else None
+            status = 'Awaiting Approval' if vid else 'Pending'
+            suggested += bool(vid)
+            if visit.suggested_volunteer_id != vid or visit.status != status:
+                visit.suggested_volunteer_id = vid
+                visit.status = status
+                changed.append(visit)
+
+    if commit and changed:
+        _write_suggestions(changed)
+
+    return {
+        'visits': len(open_visits),
+        'suggested': suggested,
+        'unmatched': len(open_visits) - suggested,
+        'changed': len(changed),
+    }
@@ -0,0 +1,195 @@
+# visits/bookings.py
+"""
+Booked-slot index for double-booking checks.
+
+Exports:
+    visit_mask(time) -> int                  (slots a visit at `time` occupies)
+    slots_from_bytes(data) -> int, slots_to_bytes(mask) -> bytes
+    refresh_bookings(days)                   days: iterable of (volunteer_id, date)
+    booked_slots(days) -> {(volunteer_id, date): mask}
+    rebuild_bookings() -> int
+    booking_conflicts(from_date=None) -> list[dict]
+
+Behavior:
+ - Each VolunteerBooking row is a 96-bit map of one volunteer's day, one bit
+   per SLOT_MINUTES slot. A Scheduled visit occupies VISIT_MINUTES from its
+   start time. A candidate conflicts when visit_mask(time) & slots != 0, an
+   O(1) test once the row is loaded.
+ - Rows are recomputed from the volunteer's Scheduled visits that day (never
+   patched bit by bit), so overlapping or removed visits cannot leave stale
+   bits. Visit.save(), the post_delete signal and visits.services refresh
+   the days they touch; bulk writes call refresh_bookings() or
+   rebuild_bookings() themselves.
+ - booking_conflicts() is the admin report: one query over upcoming
+   Scheduled visits and suggestions, one pass in (volunteer, date, time)
+   order.
+"""
+
+from collections import defaultdict
+from datetime import date as Date
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Visit, VolunteerBooking
+from .timeslots import MINUTES_PER_DAY, minute_of_day
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES     # 96
+SLOT_BYTES = SLOTS_PER_DAY // 8                     # 12
+VISIT_MINUTES = 60
+
+
+def visit_mask(t, minutes=VISIT_MINUTES):
+    start = minute_of_day(t)
+    first = start // SLOT_MINUTES
+    last = min(SLOTS_PER_DAY, -(-(start + minutes) // SLOT_MINUTES))
+    return ((1 << (last - first)) - 1) << first
+
+
+def slots_from_bytes(data):
+    return int.from_bytes(bytes(data), 'big') if data else 0
+
+
+def slots_to_bytes(mask):
+    return mask.to_bytes(SLOT_BYTES, 'big')
+
+
+def _days_condition(days, volunteer_field='volunteer_id'):
+    by_date = defaultdict(set)
+    for volunteer_id, day in days:
+        by_date[day].add(volunteer_id)
+    return reduce(or_, (
+        Q(date=day, **{f'{volunteer_field}__in': ids}) for day, ids in by_date.items()
+    ))
+
+
+def _normalize(days):
+    to_date = Visit._meta.get_field('date').to_python
+    return {(vid, to_date(day)) for vid, day in days if vid is not None}
+
+
+def booked_slots(days):
+    """{(volunteer_id, date): mask} for the requested days (missing = free)."""
+    days = _normalize(days)
+    if not days:
+        return {}
+    rows = (
+        VolunteerBooking.objects.filter(_days_condition(days))
+        .values_list('volunteer_id', 'date', 'slots')
+    )
+    return {(vid, day): slots_from_bytes(slots) for vid, day, slots in rows}
+
+
+def refresh_bookings(days):
+    """Recompute the VolunteerBooking rows of (volunteer_id, date) days."""
+    days = _normalize(days)
+    if not days:
+        return
+    masks = dict.fromkeys(days, 0)
+    visits = (
+        Visit.objects
+        .filter(_days_condition(days), status__in=Visit.BOOKED_STATUSES)
+        .values_list('volunteer_id', 'date', 'time')
+    )
+    for vid, day, t in visits:
+        masks[(vid, day)] |= visit_mask(t)
+
+    # Idempotent, so it simply runs in the caller's transaction
+    free = [day for day, mask in masks.items() if not mask]
+    if free:
+        VolunteerBooking.objects.filter(_days_condition(free)).delete()
+    VolunteerBooking.objects.bulk_create(
+        [
+            VolunteerBooking(volunteer_id=vid, date=day, slots=slots_to_bytes(mask))
+            for (vid, day), mask in masks.items() if mask
+        ],
+        update_conflicts=True,
+        unique_fields=['volunteer', 'date'],
+        update_fields=['slots'],
+    )
+
+
+def rebuild_bookings():
+    """Rebuild every row from the visits; returns the number of rows."""
+    masks = defaultdict(int)
+    visits = (
+        Visit.objects
+        .filter(status__in=Visit.BOOKED_STATUSES, volunteer__isnull=False)
+        .values_list('volunteer_id', 'date', 'time')
+    )
+    for vid, day, t in visits.iterator():
+        masks[(vid, day)] |= visit_mask(t)
+
+    with transaction.atomic():
+        VolunteerBooking.objects.all().delete()
+        VolunteerBooking.objects.bulk_create(
+            [
+                VolunteerBooking(volunteer_id=vid, date=day, slots=slots_to_bytes(mask))
+                for (vid, day), mask in masks.items()
+            ],
+            batch_size=1000,
+        )
+    return len(masks)
+
+
+def booking_conflicts(from_date=None):
+    """
+    Upcoming double bookings, one entry per volunteer and day:
+    {'volunteer': username, 'date': date, 'visits': [visit ids], 'kind': ...}
+    where kind is 'double-booked' (overlapping Scheduled visits) or
+    'suggestion' (a suggested volunteer already busy at that time).
+    """
+    from_date = from_date or Date.today()
+    rows = (
+        Visit.objects
+        .filter(
+            Q(status__in=Visit.BOOKED_STATUSES, volunteer__isnull=False)
+            | Q(status='Awaiting Approval', volunteer__isnull=True,
+                suggested_volunteer__isnull=False),
+            date__gte=from_date,
+        )
+        .values_list(
+            'id', 'status', 'date', 'time',
+            'volunteer_id', 'volunteer__user__username',
+            'suggested_volunteer_id', 'suggested_volunteer__user__username',
+        )
+    )
+
+    # Scheduled visits first within each day, so suggestions see the full day
+    entries = sorted(
+        (
+            (vid or sid, day, status not in Visit.BOOKED_STATUSES, t, visit_id, name or sname)
+            for visit_id, status, day, t, vid, name, sid, sname in rows
+        ),
+        key=lambda e: e[:4],
+    )
+
+    conflicts = []
+    current_day, booked, by_slot = None, 0, {}
+    for person, day, suggestion, t, visit_id, name in entries:
+        if (person, day) != current_day:
+            current_day, booked, by_slot = (person, day), 0, {}
+        mask = visit_mask(t)
+        if mask & booked:
+            clashing = sorted({v for bit, v in by_slot.items() if bit & mask})
+            conflicts.append({
+                'volunteer': name,
+                'date': day,
+                'visits': clashing + [visit_id],
+                'kind': 'suggestion' if suggestion else 'double-booked',
+            })
+        if not suggestion:
+            booked |= mask
+            for bit in _bits(mask):
+                by_slot.setdefault(bit, visit_id)
+    return conflicts
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low
+        mask ^= low
@@ -0,0 +1,187 @@
+# visits/candidates.py
+"""
+Cached candidate pool for suggest_volunteer.
+
+Exports:
+    candidate_pool(weekday, minute) -> list[Candidate]
+    nearby_candidates(weekday, minute, latitude, longitude)
+        -> list[(distance_km, Candidate)]
+    invalidate_candidate_pools()
+    candidate_pool_stats() -> {'hits': int, 'misses': int}
+    reset_candidate_pool_stats()
+
+Behavior:
+ - A pool is cached per (weekday, BUCKET_MINUTES time bucket). It holds the
+   static inputs of every volunteer available that weekday: id, user_id,
+   skill_flags, service_limit, and the parts of their slots that fall inside
+   the bucket (to tell whether a slot covers the visit time).
+ - nearby_candidates() reads the volunteers within MAX_RING accounts.geocoding
+   grid cells of the point (one bounding-box query on the indexed grid_row /
+   grid_col, cached as a single entry per weekday, bucket and centre cell)
+   and returns them nearest first.
+ - Workload (active_visit_count) changes with every assignment and is read
+   live, so Visit changes never invalidate a pool.
+ - Pools are kept in the process-local 'candidates' cache (settings.CACHES),
+   where a lookup costs microseconds. Saving or deleting an Availability or
+   VolunteerProfile bumps one generation in the shared default cache
+   (visits/signals.py), read once per lookup, so every process sees it. Each
+   pool is stored with the generation it was built under and rebuilt when
+   the generations differ; a generation missing from the cache (never
+   bumped, or evicted) is created fresh, so no pool outlives it. Bulk writes
+   that skip signals (bulk_create, queryset.update) must call
+   invalidate_candidate_pools() themselves.
+ - Hits and misses are counted per process, next to the pools.
+"""
+
+import time
+from typing import NamedTuple
+
+from django.core.cache import cache, caches
+
+from accounts.geocoding import GRID_COLUMNS, distance_km, grid_cell
+from accounts.models import VolunteerProfile
+
+from .models import Availability
+
+BUCKET_MINUTES = 30
+POOL_CACHE_TIMEOUT = 60 * 60
+
+NEAREST_K = 20
+MAX_RING = 8                # cells around the centre: 2 degrees at 0.25
+
+GENERATION_KEY = 'candidates:generation'
+HITS_KEY = 'candidates:hits'
+MISSES_KEY = 'candidates:misses'
+
+
+class Candidate(NamedTuple):
+    id: int
+    user_id: int
+    skill_flags: int
+    service_limit: int
+    latitude: float | None
+    longitude: float | None
+    free: tuple        # ((start, end), ...) clipped to the bucket
+
+    def is_free_at(self, minute):
+        return any(start <= minute < end for start, end in self.free)
+
+
+def _pool_key(weekday, bucket):
+    return f'candidates:pool:{weekday}:{bucket}'
+
+
+def _area_key(weekday, bucket, cell):
+    return f'candidates:area:{weekday}:{bucket}:{cell[0]}:{cell[1]}'
+
+
+def _pools():
+    return caches['candidates']
+
+
+def _count(key):
+    pools = _pools()
+    try:
+        pools.incr(key)
+    except ValueError:
+        if not pools.add(key, 1, None):
+            pools.incr(key)
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        cache.add(GENERATION_KEY, generation, None)
+        generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_candidate_pools():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def candidate_pool_stats():
+    counts = _pools().get_many([HITS_KEY, MISSES_KEY])
+    return {'hits': counts.get(HITS_KEY, 0), 'misses': counts.get(MISSES_KEY, 0)}
+
+
+def reset_candidate_pool_stats():
+    _pools().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def _cached(key, build):
+    """The pool under `key`, rebuilt with build() unless current."""
+    generation = _generation()
+    entry = _pools().get(key)
+    if entry is not None and entry[0] == generation:
+        _count(HITS_KEY)
+        return entry[1]
+
+    _count(MISSES_KEY)
+    pool = build()
+    _pools().set(key, (generation, pool), POOL_CACHE_TIMEOUT)
+    return pool
+
+
+def _collect(rows, bucket):
+    """Candidates from (static fields..., start_minute, end_minute) rows."""
+    bucket_start = bucket * BUCKET_MINUTES
+    bucket_end = bucket_start + BUCKET_MINUTES
+    pool = {}
+    for *static, start, end in rows:
+        _, free = pool.setdefault(static[0], (static, []))
+        if start < bucket_end and end > bucket_start:
+            free.append((max(start, bucket_start), min(end, bucket_end)))
+    return [Candidate(*static, free=tuple(free)) for static, free in pool.values()]
+
+
+def _build_pool(weekday, bucket):
+    rows = (
+        Availability.objects.on_weekday(weekday)
+        .order_by('volunteer_id')
+        .values_list(
+            'volunteer_id', 'volunteer__user_id', 'volunteer__skill_flags',
+            'volunteer__service_limit', 'volunteer__latitude', 'volunteer__longitude',
+            'start_minute', 'end_minute',
+        )
+    )
+    return _collect(rows, bucket)
+
+
+def _build_area(weekday, bucket, cell):
+    """Candidates within MAX_RING cells of `cell`, from one bounding-box query."""
+    row, col = cell
+    rows = (
+        VolunteerProfile.objects
+        .filter(
+            grid_row__range=(row - MAX_RING, row + MAX_RING),
+            grid_col__range=(max(0, col - MAX_RING), min(GRID_COLUMNS - 1, col + MAX_RING)),
+            availability__weekday=weekday,
+        )
+        .order_by('id')
+        .values_list(
+            'id', 'user_id', 'skill_flags', 'service_limit', 'latitude', 'longitude',
+            'availability__start_minute', 'availability__end_minute',
+        )
+    )
+    return _collect(rows, bucket)
+
+
+def candidate_pool(weekday, minute):
+    """Volunteers with an availability row on `weekday` (any time that day)."""
+    bucket = minute // BUCKET_MINUTES
+    return _cached(_pool_key(weekday, bucket), lambda: _build_pool(weekday, bucket))
+
+
+def nearby_candidates(weekday, minute, latitude, longitude):
+    """
+    (distance_km, Candidate) for volunteers available on `weekday` within
+    MAX_RING grid cells of a point, nearest first.
+    """
+    bucket = minute // BUCKET_MINUTES
+    cell = grid_cell(latitude, longitude)
+    area = _cached(_area_key(weekday, bucket, cell), lambda: _build_area(weekday, bucket, cell))
+    found = [(distance_km(latitude, longitude, c.latitude, c.longitude), c) for c in area]
+    found.sort(key=lambda item: item[0])
+    return found
@@ -0,0 +1,69 @@
+# visits/dashboards.py
+"""
+Version keys for the dashboards' cached template fragments.
+
+Exports:
+    DASHBOARD_CACHE_TIMEOUT
+    dashboard_versions(sections) -> {name: version}   sections: {name: key parts}
+    bump_dashboards(sections)                          sections: iterable of key parts
+    bump_visit_dashboards(mother_ids, volunteer_ids)
+
+Behavior:
+ - Each dashboard section ({% cache %} block) is keyed by a version read from
+   the cache: the mother's or volunteer's visits, all visits (admin queues),
+   a user's notifications, a role's broadcasts, a mother's reports and the
+   profile lists. An unchanged refresh costs one get_many and renders the
+   lists from cached fragments, with no query for them.
+ - Writers bump the versions of what they changed, immediately and again
+   once the transaction commits, so a fragment rendered from uncommitted
+   rows meanwhile is not kept. Bumping is a cache write: nothing is deleted,
+   old fragments simply stop being looked up and expire.
+ - A version missing from the cache (never bumped, or evicted) is created
+   fresh, never assumed, so an evicted version cannot bring back a fragment
+   rendered before it.
+ - Versions and fragments live in the shared cache (settings.CACHES), so
+   what run_matching_worker bumps is seen by the web process.
+ - Usernames are rendered into fragments but do not bump anything; renamed
+   users show up once the fragments expire (DASHBOARD_CACHE_TIMEOUT).
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 60
+
+
+def _version_key(parts):
+    return 'dashboard:version:' + ':'.join(str(p) for p in parts)
+
+
+def dashboard_versions(sections):
+    keys = {name: _version_key(parts) for name, parts in sections.items()}
+    versions = cache.get_many(keys.values())
+    for key in set(keys.values()) - versions.keys():
+        version = time.time_ns()
+        cache.add(key, version, None)
+        versions[key] = cache.get(key, version)
+    return {name: versions[key] for name, key in keys.items()}
+
+
+def _bump(keys):
+    cache.set_many(dict.fromkeys(keys, time.time_ns()), None)
+
+
+def bump_dashboards(sections):
+    keys = {_version_key(parts) for parts in sections}
+    if keys:
+        _bump(keys)
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_visit_dashboards(mother_ids, volunteer_ids):
+    """Visits of these mothers and volunteers changed (and so the admin queues)."""
+    bump_dashboards(
+        [('visits',)]
+        + [('visits', 'mother', mid) for mid in set(mother_ids) if mid is not None]
+        + [('visits', 'volunteer', vid) for vid in set(volunteer_ids) if vid is not None]
+    )
@@ -0,0 +1,191 @@
+# visits/exports.py
+"""
+Streaming CSV / JSON exports for admins.
+
+Exports:
+    EXPORTS                       {name: Export}
+    FORMATS                       ('csv', 'json')
+    export_rows(name, from_date=None, to_date=None, status=None) -> (columns, rows)
+    stream_export(columns, rows, fmt) -> iterator of str
+
+Behavior:
+ - Each export is one joined projection (values_list over the related
+   columns) read with QuerySet.iterator(chunk_size=EXPORT_CHUNK_ROWS): no
+   model instances and no result cache, so memory stays flat whatever the
+   number of rows.
+ - Rows are encoded into blocks of about EXPORT_BLOCK_BYTES before being
+   yielded, so the response starts after the first chunk and a large
+   export does not cost one write per row.
+ - CSV text cells starting with a spreadsheet formula character (= + - @,
+   tab or carriage return) are prefixed with a single quote, so a value
+   such as a volunteer's skills cannot run as a formula when the file is
+   opened in Excel or LibreOffice. JSON output is left as stored.
+ - from_date / to_date filter on the export's date column (visit date,
+   notification or registration time); status filters visits by status and
+   notifications by "read" / "unread".
+"""
+
+import csv
+import io
+from datetime import datetime, time, timedelta
+from typing import NamedTuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from accounts.models import VolunteerProfile
+
+from .models import Notification, Visit
+
+EXPORT_CHUNK_ROWS = 2000
+EXPORT_BLOCK_BYTES = 64 * 1024
+FORMATS = ('csv', 'json')
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Export(NamedTuple):
+    model: type
+    columns: tuple            # (header, lookup) pairs
+    date_field: str
+    timestamp: bool           # date_field is a DateTimeField
+    statuses: dict            # status parameter -> filter kwargs
+    ordering: tuple = ('id',)  # indexed, so rows stream without a sort first
+
+
+EXPORTS = {
+    'visits': Export(
+        Visit,
+        (
+            ('id', 'id'),
+            ('date', 'date'),
+            ('time', 'time'),
+            ('status', 'status'),
+            ('priority', 'priority'),
+            ('mother', 'mother__user__username'),
+            ('risk_level', 'mother__risk_level'),
+            ('volunteer', 'volunteer__user__username'),
+            ('suggested_volunteer', 'suggested_volunteer__user__username'),
+            ('created_at', 'created_at'),
+            ('suggested_at', 'suggested_at'),
+            ('assigned_at', 'assigned_at'),
+        ),
+        'date',
+        False,
+        {status: {'status': status} for status, _ in Visit.STATUS_CHOICES},
+        ('date', 'id'),
+    ),
+    'volunteers': Export(
+        VolunteerProfile,
+        (
+            ('id', 'id'),
+            ('username', 'user__username'),
+            ('email', 'user__email'),
+            ('date_joined', 'user__date_joined'),
+            ('skills', 'skills'),
+            ('certifications', 'certifications'),
+            ('location', 'location'),
+            ('service_limit', 'service_limit'),
+            ('active_visits', 'active_visit_count'),
+        ),
+        'user__date_joined',
+        True,
+        {},
+    ),
+    'notifications': Export(
+        Notification,
+        (
+            ('id', 'id'),
+            ('created_at', 'created_at'),
+            ('recipient', 'user__username'),
+            ('audience_role', 'audience_role'),
+            ('message', 'message'),
+            ('is_read', 'is_read'),
+        ),
+        'created_at',
+        True,
+        {'read': {'user__isnull': False, 'is_read': True},
+         'unread': {'user__isnull': False, 'is_read': False}},
+    ),
+}
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _date_range(queryset, export, from_date, to_date):
+    field = export.date_field
+    if not export.timestamp:
+        if from_date:
+            queryset = queryset.filter(**{f'{field}__gte': from_date})
+        if to_date:
+            queryset = queryset.filter(**{f'{field}__lte': to_date})
+        return queryset
+
+    # Whole local days, compared on the column itself (no __date transform)
+    if from_date:
+        queryset = queryset.filter(**{f'{field}__gte': _start_of(from_date)})
+    if to_date:
+        queryset = queryset.filter(**{f'{field}__lt': _start_of(to_date + timedelta(days=1))})
+    return queryset
+
+
+def export_rows(name, from_date=None, to_date=None, status=None):
+    """(headers, row iterator) for export `name`. Raises KeyError for an
+    unknown export and ValueError for an unsupported status."""
+    export = EXPORTS[name]
+    queryset = _date_range(export.model._default_manager.all(), export, from_date, to_date)
+    if status:
+        if status not in export.statuses:
+            raise ValueError(f"Unknown status {status!r} for {name}.")
+        queryset = queryset.filter(**export.statuses[status])
+
+    headers = [header for header, _ in export.columns]
+    rows = (
+        queryset
+        .order_by(*export.ordering)
+        .values_list(*(lookup for _, lookup in export.columns))
+        .iterator(chunk_size=EXPORT_CHUNK_ROWS)
+    )
+    return headers, rows
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_blocks(headers, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        if buffer.tell() >= EXPORT_BLOCK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json_blocks(headers, rows):
+    encoder = DjangoJSONEncoder()
+    parts, size, separator = ['['], 1, '\n'
+    for row in rows:
+        item = encoder.encode(dict(zip(headers, row)))
+        parts.append(separator + item)
+        separator = ',\n'
+        size += len(item) + 2
+        if size >= EXPORT_BLOCK_BYTES:
+            yield ''.join(parts)
+            parts, size = [], 0
+    parts.append('\n]\n')
+    yield ''.join(parts)
+
+
+def stream_export(headers, rows, fmt):
+    """Encoded blocks of the export in `fmt` ('csv' or 'json')."""
+    if fmt == 'json':
+        return _json_blocks(headers, rows)
+    return _csv_blocks(headers, rows)
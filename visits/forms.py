@@ -1,5 +1,7 @@
 from django import forms
-from .models import Visit, MedicalReport, Availability
+from django.conf import settings
+from .models import Visit, VisitSeries, MedicalReport, Availability
+from .timeslots import parse_weekday, parse_time_slot
 
 
 class VisitRequestForm(forms.ModelForm):
@@ -12,13 +14,65 @@ class VisitRequestForm(forms.ModelForm):
         }
 
 
+class VisitSeriesForm(forms.ModelForm):
+    class Meta:
+        model = VisitSeries
+        fields = ['weekday', 'time', 'start_date', 'end_date', 'count', 'notes']
+        widgets = {
+            'time': forms.TimeInput(attrs={'type': 'time'}),
+            'start_date': forms.DateInput(attrs={'type': 'date'}),
+            'end_date': forms.DateInput(attrs={'type': 'date'}),
+        }
+        help_texts = {
+            'end_date': "Last possible visit date, or leave empty and give a number of visits.",
+            'count': f"Number of weekly visits (at most {VisitSeries.MAX_VISITS}).",
+        }
+
+    def clean(self):
+        cleaned = super().clean()
+        end_date, count = cleaned.get('end_date'), cleaned.get('count')
+        if end_date is None and not count:
+            raise forms.ValidationError("Give an end date or a number of visits.")
+        if count and count > VisitSeries.MAX_VISITS:
+            self.add_error('count', f"At most {VisitSeries.MAX_VISITS} visits per series.")
+        elif not self.errors:
+            series = VisitSeries(**{name: cleaned.get(name) for name in self._meta.fields})
+            if not series.dates():
+                raise forms.ValidationError("No visit falls between the start and end dates.")
+        return cleaned
+
+
 class MedicalReportForm(forms.ModelForm):
     class Meta:
         model = MedicalReport
         fields = ['file']
 
+    def clean_file(self):
+        uploaded = self.cleaned_data['file']
+        limit = settings.MEDICAL_REPORT_MAX_BYTES
+        if getattr(uploaded, 'exceeds_limit', False) or uploaded.size > limit:
+            raise forms.ValidationError(
+                f"Reports can be at most {limit // (1024 * 1024)} MB."
+            )
+        return uploaded
+
 
 class AvailabilityForm(forms.ModelForm):
     class Meta:
         model = Availability
         fields = ['day', 'time_slot']
+        help_texts = {
+            'time_slot': "e.g. 9:00-11:00 or 2pm to 5pm.",
+        }
+
+    def clean_day(self):
+        day = self.cleaned_data['day']
+        if parse_weekday(day) is None:
+            raise forms.ValidationError("Enter a weekday, e.g. Monday.")
+        return day
+
+    def clean_time_slot(self):
+        time_slot = self.cleaned_data['time_slot']
+        if parse_time_slot(time_slot) is None:
+            raise forms.ValidationError("Enter a time range, e.g. 9:00-11:00.")
+        return time_slot
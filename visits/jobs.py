@@ -0,0 +1,197 @@
+# visits/jobs.py
+"""
+DB-backed queue for volunteer matching (no outside broker).
+
+Exports:
+    enqueue_matching(visit) -> MatchingJob
+    enqueue_series_matching(series, visits) -> MatchingJob
+    claim_next_job(worker_id) -> MatchingJob | None
+    claim_candidates(now) -> [QuerySet, QuerySet]
+    run_job(job)
+    match_visit(visit)
+    match_series(series)
+
+Behavior:
+ - request_visit only inserts the Visit and a Queued MatchingJob; a
+   recurring series (visits.series) gets one job for all of its visits.
+ - A series is matched in one scoring run: one volunteer for every Pending
+   visit of it when someone has the capacity and the time free on each
+   date, otherwise the visits are shared out by the batch engine
+   (visits.assignment), which also scores them as one group.
+ - Workers (manage.py run_matching_worker) claim a job with one conditional
+   UPDATE, so several worker processes can poll the same table safely: only
+   the worker whose UPDATE changed the row owns the job.
+ - Runnable jobs are claimed by priority (High first), then visit date,
+   then request age (CLAIM_ORDERING), so when volunteers are scarce the most
+   urgent visits take the remaining capacity. Both are copied onto the job
+   when queued. Queued jobs and jobs with an expired lock are read by two
+   queries that each walk matchingjob_priority_idx in order (an OR of the
+   two would need a sort) and merged.
+ - A failing job is retried with exponential backoff and marked Failed after
+   MAX_ATTEMPTS. A job whose worker died is reclaimed after LOCK_TIMEOUT.
+"""
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .assignment import run_batch_assignment
+from .dashboards import bump_visit_dashboards
+from .models import MatchingJob, Visit, VisitSeries
+from .notifications import broadcast
+from .stats import schedule_stats_refresh
+from .utils import suggest_series_volunteer, suggest_volunteer
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 10
+LOCK_TIMEOUT = timedelta(minutes=5)
+CLAIM_BATCH = 10
+CLAIM_ORDERING = ('priority_rank', 'visit_date', 'id')
+
+
+def enqueue_matching(visit):
+    return MatchingJob.objects.create(
+        visit=visit, priority_rank=Visit.rank_of(visit.priority), visit_date=visit.date,
+    )
+
+
+def enqueue_series_matching(series, visits):
+    first = min(visits, key=lambda v: v.date)
+    return MatchingJob.objects.create(
+        series=series, priority_rank=Visit.rank_of(first.priority), visit_date=first.date,
+    )
+
+
+def _claimable(now):
+    return (
+        Q(status='Queued', run_after__lte=now)
+        | Q(status='Running', locked_at__lt=now - LOCK_TIMEOUT)
+    )
+
+
+def claim_candidates(now):
+    """The two claim queries: runnable Queued jobs and jobs whose lock expired,
+    each the CLAIM_BATCH most urgent as CLAIM_ORDERING tuples."""
+    return [
+        MatchingJob.objects.filter(condition)
+        .order_by(*CLAIM_ORDERING).values_list(*CLAIM_ORDERING)[:CLAIM_BATCH]
+        for condition in (
+            Q(status='Queued', run_after__lte=now),
+            Q(status='Running', locked_at__lt=now - LOCK_TIMEOUT),
+        )
+    ]
+
+
+def _urgency(row):
+    rank, visit_date, job_id = row
+    return rank, visit_date is not None, visit_date or date.min, job_id  # NULLs first, as SQL
+
+
+def claim_next_job(worker_id):
+    """Claim the most urgent runnable job for this worker, or return None."""
+    now = timezone.now()
+    rows = sorted((row for qs in claim_candidates(now) for row in qs), key=_urgency)
+    for *_, job_id in rows[:CLAIM_BATCH]:
+        claimed = (
+            MatchingJob.objects
+            .filter(_claimable(now), pk=job_id)
+            .update(
+                status='Running',
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=F('attempts') + 1,
+            )
+        )
+        if claimed:
+            return MatchingJob.objects.get(pk=job_id)
+    return None
+
+
+def match_visit(visit):
+    """Suggest a volunteer for a Pending visit and notify the admins."""
+    if visit.status != 'Pending' or visit.volunteer_id:
+        return None  # already handled (batch run, manual assignment, cancel)
+
+    suggested = suggest_volunteer(visit)
+
+    if suggested:
+        visit.suggested_volunteer = suggested
+        visit.status = "Awaiting Approval"
+        visit.save(update_fields=['suggested_volunteer', 'status'])
+
+        broadcast('admin', f"Suggested: {suggested.user.username} for Visit #{visit.id}.")
+    else:
+        broadcast('admin', f"No volunteer found for Visit #{visit.id}. Manual assignment needed.")
+    return suggested
+
+
+def match_series(series):
+    """Suggest one volunteer for all Pending visits of `series`, or share
+    them out with the batch engine when nobody can take them all."""
+    open_visits = series.visits.filter(status='Pending', volunteer__isnull=True)
+    visits = list(open_visits.select_related('mother').order_by('date'))
+    if not visits:
+        return None
+
+    suggested = suggest_series_volunteer(visits)
+
+    if suggested is None:
+        result = run_batch_assignment(open_visits)
+        broadcast(
+            'admin',
+            f"No single volunteer for the {len(visits)} visits of series #{series.id}: "
+            f"{result['suggested']} suggested, {result['unmatched']} need manual assignment.",
+        )
+        return None
+
+    now = timezone.now()
+    open_visits.filter(pk__in=[v.pk for v in visits]).update(
+        suggested_volunteer=suggested, status='Awaiting Approval',
+        suggested_at=Coalesce('suggested_at', Value(now)), updated_at=now,
+    )
+    schedule_stats_refresh((v.date, None) for v in visits)
+    bump_visit_dashboards([series.mother_id], [])
+    broadcast(
+        'admin',
+        f"Suggested: {suggested.user.username} for the {len(visits)} visits of series #{series.id}.",
+    )
+    return suggested
+
+
+def run_job(job):
+    """Run one claimed job, recording success, a retry or a final failure."""
+    try:
+        with transaction.atomic():
+            if job.series_id:
+                match_series(VisitSeries.objects.get(pk=job.series_id))
+            else:
+                visit = (
+                    Visit.objects.select_for_update()
+                    .select_related('mother')
+                    .get(pk=job.visit_id)
+                )
+                match_visit(visit)
+    except Exception as exc:
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        if job.attempts >= MAX_ATTEMPTS:
+            job.status = 'Failed'
+        else:
+            job.status = 'Queued'
+            delay = BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1)
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+    else:
+        job.status = 'Done'
+        job.last_error = ''
+
+    # Release the lock, unless another worker reclaimed this job meanwhile
+    MatchingJob.objects.filter(pk=job.pk, status='Running', locked_by=job.locked_by).update(
+        status=job.status,
+        run_after=job.run_after,
+        last_error=job.last_error,
+        locked_by='',
+        locked_at=None,
+    )
+    return job
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from visits.assignment import run_batch_assignment
+
+
+class Command(BaseCommand):
+    help = "Suggest volunteers for every open visit in one global matching pass."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Solve the assignment but do not write any suggestions.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        result = run_batch_assignment(commit=not options['dry_run'])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['suggested']} of {result['visits']} open visits have a suggestion "
+            f"({result['unmatched']} unmatched, {result['changed']} changed) "
+            f"in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,177 @@
+import json
+import statistics
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser, MotherProfile, VolunteerProfile
+from visits.assignment import run_batch_assignment
+from visits.candidates import candidate_pool_stats, reset_candidate_pool_stats
+from visits.models import Availability, Notification, Visit
+from visits.sla import percentile
+from visits.utils import suggest_volunteer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the scheduler's hot paths against the current database and report "
+        "p50/p95 latency and query counts. Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--output',
+            help="JSON file for the results (default: bench_results/bench-<timestamp>.json).",
+        )
+        parser.add_argument('--compare', help="Earlier results JSON to compare against.")
+        parser.add_argument('--only', nargs='*', help="Run only these benchmarks.")
+
+    def handle(self, *args, **options):
+        self.iterations = options['iterations']
+        if self.iterations < 1:
+            raise CommandError("--iterations must be at least 1.")
+        self.setup_fixtures()
+
+        benchmarks = {
+            'suggest_volunteer': self.bench_suggest_volunteer,
+            'request_visit': self.bench_request_visit,
+            'dashboard_mother': lambda: self.get('dashboard', user=self.mother.user),
+            'dashboard_volunteer': lambda: self.get('dashboard', user=self.volunteer.user),
+            'dashboard_admin': lambda: self.get('dashboard', user=self.admin),
+            'choose_volunteer': lambda: self.get('choose_volunteer', self.open_visit.pk, user=self.admin),
+            'assign_volunteer': self.bench_assign_volunteer,
+            'batch_assignment': lambda: run_batch_assignment(commit=False),
+        }
+        if options['only']:
+            unknown = set(options['only']) - set(benchmarks)
+            if unknown:
+                raise CommandError(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+            benchmarks = {k: v for k, v in benchmarks.items() if k in options['only']}
+
+        results = {}
+        reset_candidate_pool_stats()
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for name, fn in benchmarks.items():
+                results[name] = self.measure(fn)
+                self.report(name, results[name])
+
+        payload = {
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'rows': {
+                'users': CustomUser.objects.count(),
+                'visits': Visit.objects.count(),
+                'availability': Availability.objects.count(),
+                'notifications': Notification.objects.count(),
+            },
+            'results': results,
+            'candidate_pool': candidate_pool_stats(),
+        }
+        self.stdout.write(
+            "candidate pool cache: {hits} hits, {misses} misses".format(**payload['candidate_pool'])
+        )
+        output = Path(options['output'] or f"bench_results/bench-{timezone.now():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(payload, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options['compare']:
+            self.compare(json.loads(Path(options['compare']).read_text()), payload)
+
+    # -----------------------------------------------------
+    # Fixtures: real rows from the current database
+    # -----------------------------------------------------
+    def setup_fixtures(self):
+        self.admin = CustomUser.objects.filter(role='admin').first()
+        self.mother = (
+            MotherProfile.objects.select_related('user')
+            .filter(visit__isnull=False).order_by('id').first()
+        )
+        self.volunteer = (
+            VolunteerProfile.objects.select_related('user')
+            .filter(assigned_visits__isnull=False).order_by('id').first()
+        )
+        self.open_visit = (
+            Visit.objects.select_related('mother')
+            .filter(status__in=['Pending', 'Awaiting Approval'], volunteer__isnull=True)
+            .order_by('id').first()
+        )
+        if not all([self.admin, self.mother, self.volunteer, self.open_visit]):
+            raise CommandError("Not enough data to benchmark; run manage.py seed_load first.")
+        self.client = Client()
+
+    # -----------------------------------------------------
+    # Benchmarks
+    # -----------------------------------------------------
+    def get(self, url_name, *args, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse(url_name, args=args))
+        if response.status_code != 200:
+            raise CommandError(f"{url_name} returned {response.status_code}")
+
+    def bench_suggest_volunteer(self):
+        suggest_volunteer(self.open_visit)
+
+    def bench_request_visit(self):
+        self.client.force_login(self.mother.user)
+        self.client.post(reverse('request_visit'), {
+            'date': (date.today() + timedelta(days=14)).isoformat(),
+            'time': '10:30',
+            'notes': 'bench',
+        })
+
+    def bench_assign_volunteer(self):
+        volunteer = VolunteerProfile.objects.filter(active_visit_count__lt=F('service_limit')).order_by('id').first()
+        self.client.force_login(self.admin)
+        self.client.get(reverse('assign_volunteer', args=[self.open_visit.pk, volunteer.pk]))
+
+    # -----------------------------------------------------
+    # Measurement and reporting
+    # -----------------------------------------------------
+    def measure(self, fn):
+        timings, queries = [], []
+        for _ in range(self.iterations):
+            reset_queries()  # keep the capped query log from overflowing
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    fn()
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(ctx.captured_queries))
+                transaction.set_rollback(True)
+
+        timings.sort()
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'max_ms': round(timings[-1], 2),
+            'queries': int(statistics.median(queries)),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f"{name:<22} p50 {result['p50_ms']:>9.2f} ms   p95 {result['p95_ms']:>9.2f} ms   "
+            f"queries {result['queries']:>4}"
+        )
+
+    def compare(self, before, after):
+        self.stdout.write(f"\nCompared with {before['timestamp']}:")
+        for name, now in after['results'].items():
+            then = before['results'].get(name)
+            if not then:
+                continue
+            change = (now['p95_ms'] - then['p95_ms']) / then['p95_ms'] * 100 if then['p95_ms'] else 0.0
+            self.stdout.write(
+                f"{name:<22} p95 {then['p95_ms']:>9.2f} -> {now['p95_ms']:>9.2f} ms ({change:+.0f}%)   "
+                f"queries {then['queries']} -> {now['queries']}"
+            )
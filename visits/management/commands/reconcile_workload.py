@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from visits.workload import recount_workload
+
+
+class Command(BaseCommand):
+    help = "Recount volunteers' active visits and repair drifted active_visit_count values."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report drift without repairing it.",
+        )
+
+    def handle(self, *args, **options):
+        drift = recount_workload(commit=not options['dry_run'])
+
+        for volunteer_id, stored, actual in drift:
+            self.stdout.write(f"Volunteer #{volunteer_id}: stored {stored}, actual {actual}")
+
+        verb = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drift)} drifted counter(s)."))
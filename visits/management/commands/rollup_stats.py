@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from visits.stats import rebuild_stats
+
+
+def _date(text):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise CommandError(f"Invalid date {text!r}; use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Rebuild the visit statistics rollups (run nightly to catch up missed refreshes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_date', type=_date,
+                            help="First visit date to rebuild (default: the beginning).")
+        parser.add_argument('--to', dest='to_date', type=_date,
+                            help="Last visit date to rebuild (default: the end).")
+
+    def handle(self, *args, **options):
+        daily, monthly = rebuild_stats(options['from_date'], options['to_date'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {daily} daily and {monthly} volunteer-month rollup rows."
+        ))
@@ -0,0 +1,53 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from visits.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Process queued volunteer-matching jobs. Run several to work in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Exit when no job is ready instead of polling.",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty (default: 1).",
+        )
+        parser.add_argument(
+            '--worker-id',
+            default=f"{socket.gethostname()}:{os.getpid()}",
+            help="Name recorded on claimed jobs (default: host:pid).",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id']
+        processed = 0
+
+        try:
+            while True:
+                job = claim_next_job(worker_id)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                run_job(job)
+                processed += 1
+                if job.status != 'Done':
+                    self.stderr.write(
+                        f"Job {job.id} ({job.subject}) {job.status.lower()}: {job.last_error}"
+                    )
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker_id} processed {processed} job(s)."))
@@ -0,0 +1,224 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser, MotherProfile, VolunteerProfile
+from accounts.skills import skill_flags_for
+from visits.bookings import rebuild_bookings
+from visits.candidates import invalidate_candidate_pools
+from visits.dashboards import bump_dashboards
+from visits.models import Availability, Notification, Visit
+from visits.stats import rebuild_stats
+from visits.workload import recount_workload
+
+BATCH_SIZE = 1000
+
+# Weekday names as volunteers type them, weighted towards weekdays
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_WEIGHTS = [10, 9, 9, 8, 7, 3, 2]
+
+TIME_SLOTS = ['9:00-12:00', '9am to 5pm', '13:00-17:00', '18:00-20:00', '10:00', '']
+TIME_SLOT_WEIGHTS = [6, 4, 5, 2, 1, 1]
+
+VISIT_TIMES = [time(h, m) for h in range(8, 19) for m in (0, 30)]
+RISK_LEVELS = ['Low', 'Medium', 'High']
+RISK_WEIGHTS = [6, 3, 1]
+SKILLS = ['', 'first aid', 'nurse', 'midwife', 'doula', 'obgyn', 'first aid, doula']
+SKILL_WEIGHTS = [5, 4, 2, 2, 4, 1, 2]
+LOCATIONS = [
+    'Hyderabad', 'Kukatpally', 'Gachibowli', 'Secunderabad', 'Uppal', 'Warangal',
+    'Nashua', 'Manchester', 'Concord', 'Lowell', 'Boston',
+    'Chennai', 'Bengaluru', 'Nowhere Town', '',
+]
+
+
+class Command(BaseCommand):
+    help = "Generate a realistic synthetic data set (users, availability, visit history, notifications)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mothers', type=int, default=7000)
+        parser.add_argument('--volunteers', type=int, default=2950)
+        parser.add_argument('--admins', type=int, default=50)
+        parser.add_argument('--years', type=int, default=3, help="Years of visit history.")
+        parser.add_argument('--visits-per-mother', type=int, default=8,
+                            help="Average visits per mother over the whole history.")
+        parser.add_argument('--prefix', default='seed', help="Username prefix for generated users.")
+        parser.add_argument('--seed', type=int, default=699, help="Random seed.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if CustomUser.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f"Users with prefix '{prefix}_' already exist; use another --prefix.")
+
+        self.rnd = random.Random(options['seed'])
+        # Hash once: every generated user shares the same password
+        self.password = make_password(f'{prefix}-password')
+        # Joined before the history starts, so back-dated broadcasts apply
+        self.joined = timezone.now() - timedelta(days=365 * options['years'] + 30)
+
+        with transaction.atomic():
+            mothers = self.create_mothers(prefix, options['mothers'])
+            volunteers = self.create_volunteers(prefix, options['volunteers'])
+            admins = self.create_users(prefix, 'admin', options['admins'])
+            self.create_availability(volunteers)
+            visits = self.create_visits(mothers, volunteers, options['years'], options['visits_per_mother'])
+            notes = self.create_notifications(visits, admins)
+            recount_workload()
+            rebuild_bookings()  # bulk_create skips Visit.save()
+            rebuild_stats()
+            # Seeded users are new; only the admin-wide lists can be stale
+            bump_dashboards([('visits',), ('profiles',)])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(mothers)} mothers, {len(volunteers)} volunteers, {len(admins)} admins, "
+            f"{Availability.objects.count()} availability rows, {len(visits)} visits and "
+            f"{notes} notifications. Password: {prefix}-password"
+        ))
+
+    # -----------------------------------------------------
+    # Users and profiles
+    # -----------------------------------------------------
+    def create_users(self, prefix, role, n):
+        return CustomUser.objects.bulk_create([
+            CustomUser(username=f'{prefix}_{role}_{i}', role=role, password=self.password,
+                       email=f'{prefix}_{role}_{i}@example.com', date_joined=self.joined)
+            for i in range(n)
+        ], batch_size=BATCH_SIZE)
+
+    def create_mothers(self, prefix, n):
+        today = date.today()
+        mothers = []
+        for user in self.create_users(prefix, 'mother', n):
+            mother = MotherProfile(
+                user=user,
+                risk_level=self.rnd.choices(RISK_LEVELS, RISK_WEIGHTS)[0],
+                due_date=today + timedelta(days=self.rnd.randint(-180, 270)),
+                location=self.rnd.choice(LOCATIONS),
+            )
+            mother.locate()  # bulk_create skips save()
+            mothers.append(mother)
+        return MotherProfile.objects.bulk_create(mothers, batch_size=BATCH_SIZE)
+
+    def create_volunteers(self, prefix, n):
+        volunteers = []
+        for user in self.create_users(prefix, 'volunteer', n):
+            skills = self.rnd.choices(SKILLS, SKILL_WEIGHTS)[0]
+            volunteer = VolunteerProfile(
+                user=user,
+                skills=skills,
+                skill_flags=skill_flags_for(skills),  # bulk_create skips save()
+                service_limit=self.rnd.choice([2, 3, 5, 5, 5, 8, 10]),
+                location=self.rnd.choice(LOCATIONS),
+            )
+            volunteer.locate()
+            volunteers.append(volunteer)
+        return VolunteerProfile.objects.bulk_create(volunteers, batch_size=BATCH_SIZE)
+
+    def create_availability(self, volunteers):
+        rows = []
+        for volunteer in volunteers:
+            # Skewed: most volunteers give one or two slots, a few give many
+            n = min(7, int(self.rnd.paretovariate(1.5)))
+            for day in set(self.rnd.choices(DAYS, DAY_WEIGHTS, k=n)):
+                row = Availability(
+                    volunteer=volunteer,
+                    day=day,
+                    time_slot=self.rnd.choices(TIME_SLOTS, TIME_SLOT_WEIGHTS)[0],
+                )
+                row.parse_interval()  # bulk_create skips save()
+                rows.append(row)
+        Availability.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        transaction.on_commit(invalidate_candidate_pools)  # bulk_create sends no signals
+
+    # -----------------------------------------------------
+    # Visit history
+    # -----------------------------------------------------
+    def create_visits(self, mothers, volunteers, years, per_mother):
+        today = date.today()
+        start = today - timedelta(days=365 * years)
+        span = (today - start).days + 60  # plus two months of upcoming visits
+        capacity = {v.pk: v.service_limit for v in volunteers}
+        now = timezone.now()
+
+        visits = []
+        for mother in mothers:
+            for _ in range(self.rnd.randint(1, per_mother * 2 - 1)):
+                day = start + timedelta(days=self.rnd.randrange(span))
+                visit = Visit(
+                    mother=mother,
+                    date=day,
+                    time=self.rnd.choice(VISIT_TIMES),
+                    priority=mother.risk_level,
+                    priority_rank=Visit.rank_of(mother.risk_level),
+                )
+                visit.created_at = min(now, timezone.make_aware(
+                    datetime.combine(day, visit.time)
+                ) - timedelta(days=self.rnd.randint(3, 30)))
+                volunteer = self.rnd.choice(volunteers) if volunteers else None
+                if day < today:
+                    visit.status = 'Cancelled' if self.rnd.random() < 0.08 else 'Completed'
+                    visit.volunteer = volunteer
+                elif volunteer and capacity[volunteer.pk] > 0 and self.rnd.random() < 0.5:
+                    visit.status = 'Scheduled'
+                    visit.volunteer = volunteer
+                    capacity[volunteer.pk] -= 1
+                elif volunteer and self.rnd.random() < 0.5:
+                    visit.status = 'Awaiting Approval'
+                    visit.suggested_volunteer = volunteer
+                    visit.suggested_at = min(
+                        now, visit.created_at + timedelta(minutes=self.rnd.randint(1, 120))
+                    )
+                else:
+                    visit.status = 'Pending'
+                if visit.status in ('Completed', 'Scheduled'):
+                    visit.assigned_at = min(
+                        now, visit.created_at + timedelta(hours=self.rnd.randint(1, 72))
+                    )
+                visits.append(visit)
+
+        return Visit.objects.bulk_create(visits, batch_size=BATCH_SIZE)
+
+    def create_notifications(self, visits, admins):
+        notes, sent_at = [], []
+        for visit in visits:
+            when = timezone.make_aware(datetime.combine(visit.date, visit.time)) - timedelta(
+                days=self.rnd.randint(1, 14)
+            )
+            notes.append(Notification(
+                user=visit.mother.user,
+                message=f"Visit #{visit.id} {visit.status.lower()}.",
+                is_read=visit.status in ('Completed', 'Cancelled'),
+            ))
+            sent_at.append(when)
+            if visit.volunteer:
+                notes.append(Notification(
+                    user=visit.volunteer.user,
+                    message=f"You have been assigned to Visit #{visit.id}.",
+                    is_read=visit.status != 'Scheduled',
+                ))
+                sent_at.append(when)
+            if visit.status == 'Awaiting Approval' and admins:
+                notes.append(Notification(
+                    audience_role='admin',
+                    message=f"Suggested: {visit.suggested_volunteer.user.username} for Visit #{visit.id}.",
+                ))
+                sent_at.append(when)
+        created = Notification.objects.bulk_create(notes, batch_size=BATCH_SIZE)
+
+        # Back-date to the visit (auto_now_add stamps "now" on insert)
+        opts = Notification._meta
+        qn = connection.ops.quote_name
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+            qn(opts.db_table), qn(opts.get_field('created_at').column), qn(opts.pk.column)
+        )
+        field = opts.get_field('created_at')
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                (field.get_db_prep_value(when, connection), note.pk)
+                for note, when in zip(created, sent_at)
+            ])
+        return len(created)
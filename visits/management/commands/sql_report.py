@@ -0,0 +1,78 @@
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from visits.sla import percentile
+
+SORT_KEYS = {
+    'db': lambda row: row['db_total_ms'],
+    'queries': lambda row: row['queries_p95'],
+    'repeats': lambda row: row['max_repeat'],
+    'requests': lambda row: row['requests'],
+}
+
+
+class Command(BaseCommand):
+    help = "Rank views by database cost using the SQL_PROFILE log (and its rotated backups)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help="Log file (default: settings.SQL_PROFILE_LOG).")
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='db',
+                            help="db = total DB time (default), queries = p95 query count, "
+                                 "repeats = worst N+1, requests = traffic.")
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        path = Path(options['log'] or getattr(settings, 'SQL_PROFILE_LOG', ''))
+        files = sorted(path.parent.glob(path.name + '*')) if path.name else []
+        if not files:
+            raise CommandError(f"No SQL profile log at {path}. Set SQL_PROFILE = True first.")
+
+        entries = defaultdict(list)
+        for file in files:
+            with open(file, encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry['view']].append(entry)
+
+        rows = [self.summarise(view, items) for view, items in entries.items()]
+        rows.sort(key=SORT_KEYS[options['sort']], reverse=True)
+
+        self.stdout.write(
+            f"{'view':40} {'requests':>8} {'queries p50/p95':>16} "
+            f"{'db ms p95':>10} {'db ms total':>12} {'max repeat':>10}"
+        )
+        for row in rows[:options['limit']]:
+            self.stdout.write(
+                f"{row['view'][:40]:40} {row['requests']:>8} "
+                f"{row['queries_p50']:>7}/{row['queries_p95']:<8} "
+                f"{row['db_p95_ms']:>10.1f} {row['db_total_ms']:>12.1f} {row['max_repeat']:>10}"
+            )
+            if row['worst_shape']:
+                self.stdout.write(f"    N+1: {row['worst_shape'][:110]}")
+
+    @staticmethod
+    def summarise(view, items):
+        queries = sorted(e['queries'] for e in items)
+        db_ms = sorted(e['db_ms'] for e in items)
+        repeats = Counter()
+        for entry in items:
+            for item in entry.get('repeated', []):
+                repeats[item['sql']] = max(repeats[item['sql']], item['count'])
+        worst = repeats.most_common(1)
+        return {
+            'view': view,
+            'requests': len(items),
+            'queries_p50': percentile(queries, 50),
+            'queries_p95': percentile(queries, 95),
+            'db_p95_ms': percentile(db_ms, 95),
+            'db_total_ms': sum(db_ms),
+            'max_repeat': worst[0][1] if worst else 0,
+            'worst_shape': worst[0][0] if worst else '',
+        }
@@ -0,0 +1,106 @@
+# Generated by Django 6.0 on 2026-10-18 14:08
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of visits.timeslots as of this migration
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_SLOT_MINUTES = 60
+
+_TIME_RE = re.compile(r'^(\d{1,2})(?:[:.](\d{2}))?(?::\d{2})?\s*([ap]\.?m\.?)?$')
+_RANGE_RE = re.compile(r'\s*(?:-|–|—|\bto\b)\s*')
+
+
+def parse_weekday(text):
+    word = (text or '').strip().lower().rstrip('.')
+    if len(word) < 3:
+        return None
+    for index, name in enumerate(WEEKDAYS):
+        if name.startswith(word):
+            return index
+    return None
+
+
+def parse_time(text):
+    match = _TIME_RE.match((text or '').strip().lower())
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.startswith('p') else 0)
+    if hour > 24 or minute > 59 or (hour == 24 and minute):
+        return None
+    return hour * 60 + minute
+
+
+def parse_time_slot(text):
+    text = (text or '').strip().lower()
+    if not text:
+        return 0, MINUTES_PER_DAY
+
+    parts = _RANGE_RE.split(text)
+    if len(parts) == 1:
+        start = parse_time(parts[0])
+        if start is None or start >= MINUTES_PER_DAY:
+            return None
+        return start, min(start + DEFAULT_SLOT_MINUTES, MINUTES_PER_DAY)
+
+    if len(parts) != 2:
+        return None
+    start, end = parse_time(parts[0]), parse_time(parts[1])
+    if start is None or end is None or start >= MINUTES_PER_DAY:
+        return None
+    if end <= start and end < 12 * 60 and end + 12 * 60 > start:
+        end += 12 * 60
+    if end <= start:
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def parse_existing_availability(apps, schema_editor):
+    Availability = apps.get_model('visits', 'Availability')
+    rows = list(Availability.objects.only('id', 'day', 'time_slot'))
+    for row in rows:
+        weekday = parse_weekday(row.day)
+        interval = parse_time_slot(row.time_slot)
+        if weekday is not None and interval is not None:
+            row.weekday = weekday
+            row.start_minute, row.end_minute = interval
+    Availability.objects.bulk_update(
+        rows, ['weekday', 'start_minute', 'end_minute'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_volunteerprofile_location'),
+        ('visits', '0002_visit_priority_visit_suggested_volunteer_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='availability',
+            name='end_minute',
+            field=models.SmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='availability',
+            name='start_minute',
+            field=models.SmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='availability',
+            name='weekday',
+            field=models.SmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='availability',
+            index=models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='availability_interval_idx'),
+        ),
+        migrations.RunPython(parse_existing_availability, migrations.RunPython.noop),
+    ]
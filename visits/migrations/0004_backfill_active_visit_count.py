@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 14:09
+
+from django.db import migrations
+from django.db.models import Count
+
+ACTIVE_STATUSES = ('Pending', 'Awaiting Approval', 'Scheduled')
+
+
+def backfill_active_visit_count(apps, schema_editor):
+    Visit = apps.get_model('visits', 'Visit')
+    VolunteerProfile = apps.get_model('accounts', 'VolunteerProfile')
+    counts = (
+        Visit.objects
+        .filter(status__in=ACTIVE_STATUSES, volunteer__isnull=False)
+        .values('volunteer_id')
+        .annotate(n=Count('id'))
+    )
+    for row in counts:
+        VolunteerProfile.objects.filter(pk=row['volunteer_id']).update(active_visit_count=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_volunteerprofile_active_visit_count'),
+        ('visits', '0003_availability_interval'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_active_visit_count, migrations.RunPython.noop),
+    ]
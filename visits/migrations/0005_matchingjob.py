@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 14:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0004_backfill_active_visit_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Queued', 'Queued'), ('Running', 'Running'), ('Done', 'Done'), ('Failed', 'Failed')], default='Queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('visit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matching_jobs', to='visits.visit')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='matchingjob_queue_idx')],
+            },
+        ),
+    ]
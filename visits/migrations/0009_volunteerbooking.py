@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-18 14:32
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# Frozen copies of visits.bookings as of this migration
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOT_BYTES = SLOTS_PER_DAY // 8
+VISIT_MINUTES = 60
+
+
+def visit_mask(t):
+    start = t.hour * 60 + t.minute
+    first = start // SLOT_MINUTES
+    last = min(SLOTS_PER_DAY, -(-(start + VISIT_MINUTES) // SLOT_MINUTES))
+    return ((1 << (last - first)) - 1) << first
+
+
+def slots_to_bytes(mask):
+    return mask.to_bytes(SLOT_BYTES, 'big')
+
+
+def backfill_bookings(apps, schema_editor):
+    Visit = apps.get_model('visits', 'Visit')
+    VolunteerBooking = apps.get_model('visits', 'VolunteerBooking')
+    masks = defaultdict(int)
+    visits = (
+        Visit.objects
+        .filter(status='Scheduled', volunteer__isnull=False)
+        .values_list('volunteer_id', 'date', 'time')
+    )
+    for volunteer_id, day, t in visits.iterator():
+        masks[(volunteer_id, day)] |= visit_mask(t)
+    VolunteerBooking.objects.bulk_create(
+        [
+            VolunteerBooking(volunteer_id=volunteer_id, date=day, slots=slots_to_bytes(mask))
+            for (volunteer_id, day), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_geocoding'),
+        ('visits', '0008_visit_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slots', models.BinaryField(max_length=12)),
+                ('volunteer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='accounts.volunteerprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('volunteer', 'date'), name='unique_volunteer_booking_day')],
+            },
+        ),
+        migrations.RunPython(backfill_bookings, migrations.RunPython.noop),
+    ]
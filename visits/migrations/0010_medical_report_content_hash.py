@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 14:35
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_report_hashes(apps, schema_editor):
+    # Existing files keep their paths; only new uploads are content-addressed
+    MedicalReport = apps.get_model('visits', 'MedicalReport')
+    for report in MedicalReport.objects.filter(sha256='').exclude(file='').iterator():
+        report.original_name = report.file.name.rsplit('/', 1)[-1][:255]
+        try:
+            with report.file.open('rb') as fh:
+                digest = hashlib.sha256()
+                for chunk in fh.chunks():
+                    digest.update(chunk)
+                report.size = report.file.size
+        except FileNotFoundError:
+            report.save(update_fields=['original_name'])
+            continue
+        report.sha256 = digest.hexdigest()
+        report.save(update_fields=['original_name', 'sha256', 'size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0009_volunteerbooking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalreport',
+            name='original_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='medicalreport',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='medicalreport',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_report_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 6.0 on 2026-10-18 14:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    # Counts only: no existing visit has created_at / assigned_at yet
+    Visit = apps.get_model('visits', 'Visit')
+    DailyVisitStats = apps.get_model('visits', 'DailyVisitStats')
+    MonthlyVolunteerStats = apps.get_model('visits', 'MonthlyVolunteerStats')
+    daily = (
+        Visit.objects
+        .values('date', 'status', 'priority', 'mother__risk_level')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    DailyVisitStats.objects.bulk_create(
+        [
+            DailyVisitStats(
+                date=row['date'], status=row['status'], priority=row['priority'],
+                risk_level=row['mother__risk_level'] or '', visits=row['n'],
+            )
+            for row in daily
+        ],
+        batch_size=1000,
+    )
+    monthly = (
+        Visit.objects.filter(volunteer__isnull=False)
+        .values('volunteer_id', 'status', month=TruncMonth('date'))
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    MonthlyVolunteerStats.objects.bulk_create(
+        [
+            MonthlyVolunteerStats(
+                month=row['month'], volunteer_id=row['volunteer_id'],
+                status=row['status'], visits=row['n'],
+            )
+            for row in monthly
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_geocoding'),
+        ('visits', '0010_medical_report_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyVisitStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('priority', models.CharField(max_length=10)),
+                ('risk_level', models.CharField(max_length=10)),
+                ('visits', models.PositiveIntegerField(default=0)),
+                ('assigned', models.PositiveIntegerField(default=0)),
+                ('assignment_seconds', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyVolunteerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('visits', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='assigned_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        # Existing visits keep NULL (creation time unknown); new ones get now()
+        migrations.AddField(
+            model_name='visit',
+            name='created_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='visit',
+            name='created_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['date'], name='visit_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyvisitstats',
+            constraint=models.UniqueConstraint(fields=('date', 'status', 'priority', 'risk_level'), name='unique_daily_visit_stats'),
+        ),
+        migrations.AddField(
+            model_name='monthlyvolunteerstats',
+            name='volunteer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='accounts.volunteerprofile'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyvolunteerstats',
+            constraint=models.UniqueConstraint(fields=('month', 'volunteer', 'status'), name='unique_monthly_volunteer_stats'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
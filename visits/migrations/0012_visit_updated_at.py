@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_geocoding'),
+        ('visits', '0011_visit_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['status', 'updated_at'], name='visit_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_geocoding'),
+        ('visits', '0012_visit_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchingjob',
+            name='visit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matching_jobs', to='visits.visit'),
+        ),
+        migrations.CreateModel(
+            name='VisitSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.SmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('time', models.TimeField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('count', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('mother', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visit_series', to='accounts.motherprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'visit series',
+            },
+        ),
+        migrations.AddField(
+            model_name='matchingjob',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matching_jobs', to='visits.visitseries'),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visits', to='visits.visitseries'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_priority_rank(apps, schema_editor):
+    Visit = apps.get_model('visits', 'Visit')
+    MatchingJob = apps.get_model('visits', 'MatchingJob')
+    for rank, priority in enumerate(('High', 'Medium', 'Low')):
+        Visit.objects.filter(priority=priority).update(priority_rank=rank)
+    visit = Visit.objects.filter(pk=OuterRef('visit_id'))
+    MatchingJob.objects.filter(visit__isnull=False).update(
+        priority_rank=Subquery(visit.values('priority_rank')[:1]),
+        visit_date=Subquery(visit.values('date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_geocoding'),
+        ('visits', '0013_visit_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchingjob',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2),
+        ),
+        migrations.AddField(
+            model_name='matchingjob',
+            name='visit_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='suggested_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='matchingjob',
+            index=models.Index(fields=['status', 'priority_rank', 'visit_date'], name='matchingjob_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['created_at'], name='visit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['status', 'priority_rank', 'date'], name='visit_queue_idx'),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+    ]
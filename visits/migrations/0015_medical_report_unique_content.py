@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 19:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_reports(apps, schema_editor):
+    # Keep the first report of each (mother, content); the blob is shared
+    MedicalReport = apps.get_model('visits', 'MedicalReport')
+    duplicates = (
+        MedicalReport.objects.exclude(sha256='')
+        .values('mother_id', 'sha256')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        MedicalReport.objects.filter(
+            mother_id=row['mother_id'], sha256=row['sha256'], id__gt=row['keep']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_geocoding'),
+        ('visits', '0014_matching_priority_sla'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_reports, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='medicalreport',
+            constraint=models.UniqueConstraint(condition=models.Q(('sha256', ''), _negated=True), fields=('mother', 'sha256'), name='unique_mother_report_content'),
+        ),
+    ]
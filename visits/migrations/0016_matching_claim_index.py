@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 20:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0015_medical_report_unique_content'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='matchingjob',
+            name='matchingjob_queue_idx',
+        ),
+    ]
@@ -1,5 +1,13 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
 from accounts.models import MotherProfile, VolunteerProfile, CustomUser
+from .timeslots import WEEKDAYS, parse_weekday, parse_time_slot
+
+
+# Marker for "previous state not loaded"
+UNKNOWN = object()
 
 
 # ------------------------------------------------------
@@ -7,9 +15,24 @@ from accounts.models import MotherProfile, VolunteerProfile, CustomUser
 # ------------------------------------------------------
 class MedicalReport(models.Model):
     mother = models.ForeignKey(MotherProfile, on_delete=models.CASCADE)
+    # Content-addressed (visits.reports): identical files share one stored
+    # blob, so deleting a report never deletes the file
     file = models.FileField(upload_to='medical_reports/')
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    size = models.PositiveBigIntegerField(default=0, editable=False)
+    original_name = models.CharField(max_length=255, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # One report per content and mother (rows from before hashing
+            # whose file was missing keep a blank sha256)
+            models.UniqueConstraint(
+                fields=['mother', 'sha256'], condition=~models.Q(sha256=''),
+                name='unique_mother_report_content',
+            ),
+        ]
+
     def __str__(self):
         return f"Report by {self.mother.user.username} ({self.uploaded_at.date()})"
 
@@ -26,12 +49,21 @@ class Visit(models.Model):
         ('Cancelled', 'Cancelled'),
     ]
 
+    # Statuses that count towards a volunteer's active workload
+    ACTIVE_STATUSES = ('Pending', 'Awaiting Approval', 'Scheduled')
+
+    # Statuses that occupy the volunteer's time (visits.bookings)
+    BOOKED_STATUSES = ('Scheduled',)
+
     PRIORITY_CHOICES = [
         ('Low', 'Low'),
         ('Medium', 'Medium'),
         ('High', 'High'),
     ]
 
+    # Queue order of the priorities: High first (visits.jobs, dashboards)
+    PRIORITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+
     mother = models.ForeignKey(MotherProfile, on_delete=models.CASCADE)
 
     # Final assigned volunteer (after approval)
@@ -58,42 +90,399 @@ class Visit(models.Model):
     # Visit urgency: derived from mother's risk level (or set manually)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='Low')
 
+    # PRIORITY_RANK[priority], set on save so queues can ORDER BY it;
+    # bulk_create callers must set it themselves
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
+
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
 
     notes = models.TextField(blank=True)
 
+    # Recurring series this visit was created by (visits.series), if any
+    series = models.ForeignKey(
+        'VisitSeries',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='visits'
+    )
+
+    # Time to assignment (visits.stats) and to the first suggestion
+    # (visits.sla); NULL for visits older than these fields
+    created_at = models.DateTimeField(null=True, blank=True, default=timezone.now, editable=False)
+    suggested_at = models.DateTimeField(null=True, blank=True, editable=False)
+    assigned_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Version stamps of the JSON API (visits.api); queryset.update() callers
+    # must set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Statistics rollups: WHERE date IN (...)
+            models.Index(fields=['date'], name='visit_date_idx'),
+            # SLA report: WHERE created_at >= ? AND created_at < ?
+            models.Index(fields=['created_at'], name='visit_created_idx'),
+            # Admin queues: WHERE status = ? ORDER BY priority_rank, date, id
+            models.Index(fields=['status', 'priority_rank', 'date'], name='visit_queue_idx'),
+            # API queue version stamp: COUNT / MAX(updated_at) WHERE status IN (...)
+            models.Index(fields=['status', 'updated_at'], name='visit_status_updated_idx'),
+            # Admin queues and batch assignment: WHERE status = ? ORDER BY date
+            models.Index(fields=['status', 'date'], name='visit_status_date_idx'),
+            # Volunteer workload: WHERE volunteer = ? AND status IN (...)
+            models.Index(fields=['volunteer', 'status'], name='visit_volunteer_status_idx'),
+            # Mother dashboard: WHERE mother = ? ORDER BY date DESC
+            models.Index(fields=['mother', 'date'], name='visit_mother_date_idx'),
+        ]
+
     def __str__(self):
         return f"Visit {self.id} - {self.mother.user.username}"
 
-    # Returns True if volunteer still has capacity
-    def volunteer_has_capacity(self, volunteer: VolunteerProfile):
-        assigned = Visit.objects.filter(
-            volunteer=volunteer,
-            status__in=['Pending', 'Scheduled']
-        ).count()
-        return assigned < volunteer.service_limit
-        
+    # Volunteer whose workload this visit counts towards (or None)
+    @property
+    def workload_volunteer_id(self):
+        if self.status in self.ACTIVE_STATUSES:
+            return self.volunteer_id
+        return None
+
+    # (volunteer_id, date, time) this visit books in visits.bookings (or None)
+    @property
+    def booking(self):
+        if self.status in self.BOOKED_STATUSES and self.volunteer_id:
+            return (self.volunteer_id, self.date, self.time)
+        return None
+
+    # Everything the visits.stats rollups group this visit by
+    @property
+    def stats_key(self):
+        return (self.date, self.status, self.priority, self.volunteer_id, self.assigned_at)
+
+    @classmethod
+    def rank_of(cls, priority):
+        return cls.PRIORITY_RANK.get(priority, len(cls.PRIORITY_RANK))
+
+    # Fields the save() snapshot below is built from
+    STATE_FIELDS = ('status', 'volunteer_id', 'date', 'time', 'priority', 'assigned_at')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_state()
+        return instance
+
+    def _remember_loaded_state(self):
+        # Only trust the snapshot when every field it uses was actually loaded
+        loaded = self.__dict__
+        if all(name in loaded for name in self.STATE_FIELDS):
+            self._loaded_state = (self.workload_volunteer_id, self.booking, self.stats_key)
+        else:
+            self._loaded_state = UNKNOWN
+
+    def _previous_state(self):
+        """(workload_volunteer_id, booking, stats_key) as stored before this save."""
+        if self._state.adding or self.pk is None:
+            return None, None, None
+        previous = getattr(self, '_loaded_state', UNKNOWN)
+        if previous is UNKNOWN:
+            row = Visit.objects.filter(pk=self.pk).only(*self.STATE_FIELDS).first()
+            return (None, None, None) if row is None else row._loaded_state
+        return previous
+
+    def save(self, *args, **kwargs):
+        from .bookings import refresh_bookings
+        from .dashboards import bump_visit_dashboards
+        from .stats import schedule_stats_refresh
+        from .workload import move_workload
+
+        derived = {'updated_at', 'priority_rank'}
+        self.priority_rank = self.rank_of(self.priority)
+        if self.status == 'Awaiting Approval' and self.suggested_at is None:
+            self.suggested_at = timezone.now()
+            derived.add('suggested_at')
+        if self.status in self.BOOKED_STATUSES and self.assigned_at is None:
+            self.assigned_at = timezone.now()
+            derived.add('assigned_at')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | derived
+
+        with transaction.atomic():
+            previous_volunteer_id, previous_booking, previous_stats = self._previous_state()
+            super().save(*args, **kwargs)
+            move_workload(previous_volunteer_id, self.workload_volunteer_id)
+            if previous_booking != self.booking:
+                refresh_bookings(b[:2] for b in (previous_booking, self.booking) if b)
+            if previous_stats != self.stats_key:
+                schedule_stats_refresh(
+                    (key[0], key[3]) for key in (previous_stats, self.stats_key) if key
+                )
+            bump_visit_dashboards(
+                [self.mother_id], [self.volunteer_id, previous_stats and previous_stats[3]]
+            )
+        self._remember_loaded_state()
+
+
+# ------------------------------------------------------
+# Recurring visits: one weekday and time, weekly (visits.series)
+# ------------------------------------------------------
+class VisitSeries(models.Model):
+    WEEKDAY_CHOICES = [(i, name.title()) for i, name in enumerate(WEEKDAYS)]
+
+    # Upper bound on occurrences, whatever end_date / count say
+    MAX_VISITS = 52
+
+    mother = models.ForeignKey(MotherProfile, on_delete=models.CASCADE, related_name='visit_series')
+    weekday = models.SmallIntegerField(choices=WEEKDAY_CHOICES)   # Monday = 0
+    time = models.TimeField()
+
+    # First occurrence is the first `weekday` on or after start_date; the
+    # series ends at end_date or after `count` visits
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    count = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'visit series'
+
+    def __str__(self):
+        return f"Series {self.id}: {self.get_weekday_display()}s at {self.time:%H:%M}"
+
+    def dates(self):
+        """The occurrence dates, earliest first."""
+        day = self.start_date + timedelta(days=(self.weekday - self.start_date.weekday()) % 7)
+        limit = min(self.count or self.MAX_VISITS, self.MAX_VISITS)
+        dates = []
+        while len(dates) < limit and (self.end_date is None or day <= self.end_date):
+            dates.append(day)
+            day += timedelta(weeks=1)
+        return dates
+
+
+# ------------------------------------------------------
+# Booked time per volunteer per day (maintained by visits.bookings)
+# ------------------------------------------------------
+class VolunteerBooking(models.Model):
+    volunteer = models.ForeignKey(VolunteerProfile, on_delete=models.CASCADE, related_name='bookings')
+    date = models.DateField()
+
+    # 96 bits, one per 15-minute slot of the day (bit 0 = 00:00-00:15),
+    # set for every slot covered by the volunteer's Scheduled visits
+    slots = models.BinaryField(max_length=12)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['volunteer', 'date'], name='unique_volunteer_booking_day'),
+        ]
+
+    def __str__(self):
+        return f"Bookings of volunteer {self.volunteer_id} on {self.date}"
+
+
+# ------------------------------------------------------
+# Statistics rollups (maintained by visits.stats)
+# ------------------------------------------------------
+class DailyVisitStats(models.Model):
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    priority = models.CharField(max_length=10)
+    risk_level = models.CharField(max_length=10)   # the mother's, when rolled up
+
+    visits = models.PositiveIntegerField(default=0)
+    # Visits with both created_at and assigned_at, and their total wait
+    assigned = models.PositiveIntegerField(default=0)
+    assignment_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'status', 'priority', 'risk_level'], name='unique_daily_visit_stats'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.visits} {self.status} visits on {self.date}"
+
+
+class MonthlyVolunteerStats(models.Model):
+    month = models.DateField()   # first day of the month
+    volunteer = models.ForeignKey(VolunteerProfile, on_delete=models.CASCADE, related_name='monthly_stats')
+    status = models.CharField(max_length=20)
+    visits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'volunteer', 'status'], name='unique_monthly_volunteer_stats'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.visits} {self.status} visits of volunteer {self.volunteer_id} in {self.month:%Y-%m}"
+
+
+# ------------------------------------------------------
+# Background matching jobs (processed by run_matching_worker)
+# ------------------------------------------------------
+class MatchingJob(models.Model):
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),     # Waiting for a worker (or for its retry time)
+        ('Running', 'Running'),   # Claimed by a worker
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),     # Gave up after MAX_ATTEMPTS
+    ]
+
+    # One visit, or every Pending visit of a series matched together
+    visit = models.ForeignKey(
+        Visit, on_delete=models.CASCADE, null=True, blank=True, related_name='matching_jobs'
+    )
+    series = models.ForeignKey(
+        VisitSeries, on_delete=models.CASCADE, null=True, blank=True, related_name='matching_jobs'
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+
+    # Claim order: priority, then visit date (of the first visit of a
+    # series), then request age (id); copied from the visit when queued
+    priority_rank = models.PositiveSmallIntegerField(default=2)
+    visit_date = models.DateField(null=True, blank=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    # Worker that claimed the job; stale locks are reclaimed after a timeout
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Claim order (visits.jobs.CLAIM_ORDERING) within a status; run_after
+            # and locked_at are filtered while walking it, with no sort
+            models.Index(fields=['status', 'priority_rank', 'visit_date'], name='matchingjob_priority_idx'),
+        ]
+
+    def __str__(self):
+        return f"Matching job {self.id} for {self.subject} ({self.status})"
+
+    @property
+    def subject(self):
+        if self.series_id:
+            return f"Series #{self.series_id}"
+        return f"Visit #{self.visit_id}"
+
 
 # ------------------------------------------------------
 # Volunteer Availability
 # ------------------------------------------------------
+class AvailabilityQuerySet(models.QuerySet):
+    def on_weekday(self, weekday):
+        return self.filter(weekday=weekday)
+
+    # Single range query on the (weekday, start_minute, end_minute) index
+    def free_at(self, weekday, minute):
+        return self.filter(weekday=weekday, start_minute__lte=minute, end_minute__gt=minute)
+
+    def volunteer_ids_free_at(self, weekday, minute):
+        return self.free_at(weekday, minute).values_list('volunteer_id', flat=True).distinct()
+
+
 class Availability(models.Model):
     volunteer = models.ForeignKey(VolunteerProfile, on_delete=models.CASCADE)
+
+    # Raw text as entered by the volunteer (kept for display)
     day = models.CharField(max_length=20)
     time_slot = models.CharField(max_length=50)
 
+    # Normalized interval parsed from day / time_slot on save.
+    # weekday: Monday = 0 ... Sunday = 6; minutes are after midnight, end exclusive.
+    # All three are NULL when the text could not be parsed.
+    weekday = models.SmallIntegerField(null=True, blank=True, editable=False)
+    start_minute = models.SmallIntegerField(null=True, blank=True, editable=False)
+    end_minute = models.SmallIntegerField(null=True, blank=True, editable=False)
+
+    objects = AvailabilityQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['weekday', 'start_minute', 'end_minute'],
+                         name='availability_interval_idx'),
+        ]
+
     def __str__(self):
         return f"{self.volunteer.user.username} - {self.day} ({self.time_slot})"
 
+    def parse_interval(self):
+        weekday = parse_weekday(self.day)
+        interval = parse_time_slot(self.time_slot)
+        if weekday is None or interval is None:
+            self.weekday = self.start_minute = self.end_minute = None
+        else:
+            self.weekday = weekday
+            self.start_minute, self.end_minute = interval
+
+    def save(self, *args, **kwargs):
+        self.parse_interval()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'weekday', 'start_minute', 'end_minute'}
+        super().save(*args, **kwargs)
+
 
 # ------------------------------------------------------
 # Notifications (Mother, Volunteer, Admin)
 # ------------------------------------------------------
 class Notification(models.Model):
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # Direct notifications have a user; broadcasts have an audience_role
+    # instead, are stored once and shown to every user with that role
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True)
+    audience_role = models.CharField(
+        max_length=20, choices=CustomUser.ROLE_CHOICES, blank=True
+    )
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+    # Only used by direct notifications; broadcasts use NotificationRead
     is_read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Unread inbox: WHERE user = ? AND NOT is_read ORDER BY created_at DESC.
+            # Partial on is_read because the ORM emits "NOT is_read", which
+            # SQLite cannot match against an is_read index column.
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_inbox_idx',
+            ),
+            models.Index(fields=['audience_role', 'created_at'], name='notification_broadcast_idx'),
+        ]
+
+    @property
+    def is_broadcast(self):
+        return bool(self.audience_role)
+
     def __str__(self):
+        if self.is_broadcast:
+            return f"Broadcast to {self.audience_role} users"
         return f"Notification to {self.user.username}"
+
+
+# ------------------------------------------------------
+# Per-user read markers for broadcast notifications
+# ------------------------------------------------------
+class NotificationRead(models.Model):
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='reads')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'user'], name='unique_notification_read'),
+        ]
+
+    def __str__(self):
+        return f"Notification {self.notification_id} read by {self.user_id}"
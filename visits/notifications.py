@@ -0,0 +1,132 @@
+# visits/notifications.py
+"""
+Notification fan-out.
+
+Exports:
+    notify(user, message) -> Notification
+    bulk_notify(pairs) -> list[Notification]       (one INSERT for all pairs)
+    notify_users(users, message) -> list[Notification]
+    broadcast(role, message) -> Notification       (one row for a whole role)
+    unread_for(user) -> QuerySet
+    inbox(user, limit=INBOX_SIZE) -> list[Notification]   (most recent unread)
+    unread_count(user) -> int                            (cached)
+    mark_all_read(user)
+    mark_broadcasts_read(user, notifications)
+
+Messages meant for everyone with a role (e.g. all admins) should use
+broadcast(): it costs one write however many users have that role, and each
+user's reads are tracked with NotificationRead markers. A user only sees
+broadcasts sent after they joined.
+
+Unread counts are cached per user together with the broadcast generation of
+their role. Direct notifications delete the recipients' entries; a broadcast
+bumps the role's generation, which invalidates every member's entry at once.
+Both live in the shared cache (settings.CACHES), so broadcasts sent by
+run_matching_worker reach the counts the web process shows.
+The dashboards' cached notification lists (visits.dashboards) are bumped the
+same way: per recipient, or once per role for a broadcast.
+"""
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+from .dashboards import bump_dashboards
+from .models import Notification, NotificationRead
+
+INBOX_SIZE = 10
+UNREAD_CACHE_TIMEOUT = 60 * 60
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _generation_key(role):
+    return f'notifications:broadcast-generation:{role}'
+
+
+def _forget_unread(user_ids):
+    cache.delete_many([_unread_key(uid) for uid in user_ids])
+    bump_dashboards(('notifications', uid) for uid in user_ids)
+
+
+def notify(user, message):
+    note = Notification.objects.create(user=user, message=message)
+    _forget_unread([user.pk])
+    return note
+
+
+def bulk_notify(pairs):
+    """Create one direct notification per (user, message) pair in one INSERT."""
+    notes = Notification.objects.bulk_create([
+        Notification(user=user, message=message) for user, message in pairs
+    ])
+    _forget_unread({n.user_id for n in notes})
+    return notes
+
+
+def notify_users(users, message):
+    return bulk_notify((user, message) for user in users)
+
+
+def broadcast(role, message):
+    note = Notification.objects.create(audience_role=role, message=message)
+    cache.set(_generation_key(role), note.pk, None)
+    bump_dashboards([('notifications', 'role', role)])
+    return note
+
+
+def unread_for(user):
+    """Direct unread notifications plus broadcasts to the user's role not yet read."""
+    condition = Q(user=user, is_read=False)
+    if user.role:
+        read_marker = NotificationRead.objects.filter(notification=OuterRef('pk'), user=user)
+        condition |= (
+            Q(audience_role=user.role, created_at__gte=user.date_joined)
+            & ~Exists(read_marker)
+        )
+    return Notification.objects.filter(condition)
+
+
+def inbox(user, limit=INBOX_SIZE):
+    """The `limit` most recent unread notifications."""
+    return list(
+        unread_for(user)
+        .only('id', 'message', 'created_at', 'audience_role')
+        .order_by('-created_at', '-id')[:limit]
+    )
+
+
+def unread_count(user):
+    key, generation_key = _unread_key(user.pk), _generation_key(user.role)
+    cached = cache.get_many([key, generation_key])
+    generation = cached.get(generation_key)
+    entry = cached.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+
+    count = unread_for(user).count()
+    cache.set(key, (generation, count), UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def mark_all_read(user):
+    """
+    Mark everything read: one UPDATE for direct notifications and one INSERT
+    of read markers for the user's unread broadcasts.
+    """
+    Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    if user.role:
+        unread_broadcasts = (
+            unread_for(user).filter(audience_role=user.role).only('id', 'audience_role')
+        )
+        mark_broadcasts_read(user, unread_broadcasts)
+    _forget_unread([user.pk])
+
+
+def mark_broadcasts_read(user, notifications):
+    NotificationRead.objects.bulk_create(
+        [NotificationRead(notification=n, user=user) for n in notifications if n.is_broadcast],
+        ignore_conflicts=True,
+    )
+    _forget_unread([user.pk])
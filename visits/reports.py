@@ -0,0 +1,160 @@
+# visits/reports.py
+"""
+Medical report storage and download.
+
+Exports:
+    store_report(mother, uploaded) -> (MedicalReport, created)
+    report_path(sha256) -> str
+    can_view_report(user, report) -> bool
+    report_response(request, report) -> FileResponse | StreamingHttpResponse
+
+Behavior:
+ - Files are stored once per content under medical_reports/<aa>/<sha256>.
+   An upload whose content is already stored only gets a new row; the same
+   mother uploading the same file again gets the existing report back
+   (unique per mother and sha256, so concurrent uploads cannot both add one).
+ - The hash comes from visits.uploads.HashingUploadHandler when the upload
+   went through it, otherwise it is computed chunk by chunk.
+ - Reports are visible to their mother, admins and volunteers with a
+   Scheduled or Completed visit for that mother.
+ - Downloads stream from storage in chunks. A single "Range: bytes=a-b"
+   (or "a-", "-n") is answered with 206 Partial Content; unsatisfiable
+   ranges get 416. The content hash is the ETag. A report whose stored file
+   is missing is a 404.
+"""
+
+import hashlib
+import mimetypes
+import re
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .models import MedicalReport, Visit
+
+STREAM_CHUNK_BYTES = 256 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def report_path(sha256):
+    return f'medical_reports/{sha256[:2]}/{sha256}'
+
+
+def _sha256(uploaded):
+    digest = getattr(uploaded, 'sha256', None)
+    if digest:
+        return digest
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks(STREAM_CHUNK_BYTES):
+        digest.update(chunk)
+    uploaded.seek(0)
+    return digest.hexdigest()
+
+
+def store_report(mother, uploaded):
+    """Store `uploaded` for `mother`; returns (report, created)."""
+    sha256 = _sha256(uploaded)
+    existing = MedicalReport.objects.filter(mother=mother, sha256=sha256).first()
+    if existing is not None:
+        return existing, False
+
+    name = report_path(sha256)
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, uploaded)
+        if saved != name:
+            # Stored concurrently by another upload of the same content
+            default_storage.delete(saved)
+
+    with transaction.atomic():
+        return MedicalReport.objects.get_or_create(
+            mother=mother,
+            sha256=sha256,
+            defaults={'file': name, 'size': uploaded.size, 'original_name': uploaded.name[:255]},
+        )
+
+
+def can_view_report(user, report):
+    if user.role == 'admin':
+        return True
+    if user.role == 'mother':
+        return report.mother.user_id == user.id
+    if user.role == 'volunteer':
+        return Visit.objects.filter(
+            mother_id=report.mother_id,
+            volunteer__user=user,
+            status__in=('Scheduled', 'Completed'),
+        ).exists()
+    return False
+
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single-range header; None = whole file;
+    False = unsatisfiable."""
+    match = _RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(fh, start, length):
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(STREAM_CHUNK_BYTES, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def report_response(request, report):
+    """Stream `report`, honouring a single byte range."""
+    name = report.original_name or report.file.name.rsplit('/', 1)[-1]
+    try:
+        size = report.file.size
+        fh = report.file.open('rb')
+    except (FileNotFoundError, ValueError):
+        raise Http404("Report file is unavailable.")
+
+    byte_range = _byte_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range.strip('"') != report.sha256:
+        byte_range = None   # changed since the client's partial copy
+
+    if byte_range is None:
+        response = FileResponse(fh, as_attachment=True, filename=name)
+    elif byte_range is False:
+        fh.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(fh, start, end - start + 1),
+            status=206,
+            content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = content_disposition_header(True, name)
+
+    response['Accept-Ranges'] = 'bytes'
+    if report.sha256:
+        response['ETag'] = f'"{report.sha256}"'
+    response['Cache-Control'] = 'private'
+    return response
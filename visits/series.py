@@ -0,0 +1,54 @@
+# visits/series.py
+"""
+Recurring visit series.
+
+Exports:
+    create_series(series) -> list[Visit]
+    visit_priority(mother) -> str
+
+Behavior:
+ - A VisitSeries is one weekday and time, weekly from start_date until
+   end_date or for `count` visits (at most VisitSeries.MAX_VISITS).
+ - create_series() saves the series, creates every occurrence with one
+   bulk_create and queues a single MatchingJob for the whole series
+   (visits.jobs.match_series): three INSERTs however long the series.
+ - bulk_create skips Visit.save(), so the statistics refresh and the
+   dashboard versions it would have triggered are done here. New visits are
+   Pending with no volunteer: they book no time and count towards nobody's
+   workload yet.
+"""
+
+from django.db import transaction
+
+from .dashboards import bump_visit_dashboards
+from .jobs import enqueue_series_matching
+from .models import Visit
+from .stats import schedule_stats_refresh
+
+
+def visit_priority(mother):
+    """Visit priority from the mother's risk level."""
+    risk = mother.risk_level
+    return "High" if risk == "High" else "Medium" if risk == "Medium" else "Low"
+
+
+def create_series(series):
+    """Save `series` (mother set, not yet saved), create its visits and queue
+    their matching. Returns the visits."""
+    mother = series.mother
+    priority = visit_priority(mother)
+    with transaction.atomic():
+        series.save()
+        visits = Visit.objects.bulk_create([
+            Visit(
+                mother=mother, series=series, date=day, time=series.time,
+                priority=priority, priority_rank=Visit.rank_of(priority),
+                status='Pending', notes=series.notes,
+            )
+            for day in series.dates()
+        ])
+        if visits:
+            enqueue_series_matching(series, visits)
+        schedule_stats_refresh((visit.date, None) for visit in visits)
+        bump_visit_dashboards([mother.pk], [])
+    return visits
@@ -0,0 +1,239 @@
+# visits/services.py
+"""
+Volunteer assignment service.
+
+Exports:
+    assign_visit(visit, volunteer) -> Visit
+    approve_suggestions(visit_ids=None) -> {'approved': [...], 'skipped': [...]}
+    AssignmentError, VisitNotAssignable, VolunteerAtCapacity, VolunteerDoubleBooked
+
+Behavior:
+ - Capacity is claimed with one conditional UPDATE on the volunteer
+   (active_visit_count < service_limit), so two admins approving at the same
+   moment cannot push a volunteer past their service_limit: only one of the
+   UPDATEs changes the row.
+ - The visit is then written with a compare-and-set UPDATE of just volunteer
+   and status, conditioned on the state read at the start. If another request
+   changed the visit meanwhile, nothing is written and the capacity claim is
+   rolled back with the transaction.
+ - Reassigning a Scheduled visit releases the previous volunteer's slot in the
+   same transaction.
+ - The first assignment of a visit sets assigned_at (time to assignment in
+   visits.stats); statistics are refreshed once the transaction commits.
+ - A volunteer already booked at the visit time (visits.bookings) is
+   refused; the booked-slot rows of both volunteers are refreshed in the
+   same transaction.
+ - approve_suggestions() approves many Awaiting Approval visits in one
+   transaction: capacity is checked per volunteer for all their visits at
+   once (High priority and earliest visits first), claimed with one
+   conditional UPDATE per distinct amount, the visits are scheduled with one
+   UPDATE and both parties are notified with one INSERT. Visits that would
+   double-book their volunteer are skipped.
+"""
+
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import VolunteerProfile
+
+from .bookings import booked_slots, refresh_bookings, visit_mask
+from .dashboards import bump_visit_dashboards
+from .models import Visit
+from .notifications import bulk_notify
+from .stats import schedule_stats_refresh
+from .workload import adjust_workload
+
+
+class AssignmentError(Exception):
+    pass
+
+
+class VisitNotAssignable(AssignmentError):
+    pass
+
+
+class VolunteerAtCapacity(AssignmentError):
+    pass
+
+
+class VolunteerDoubleBooked(AssignmentError):
+    pass
+
+
+def claim_capacity(volunteer_id):
+    """Take one slot of the volunteer's service_limit; False if none is left."""
+    return bool(
+        VolunteerProfile.objects
+        .filter(pk=volunteer_id, active_visit_count__lt=F('service_limit'))
+        .update(active_visit_count=F('active_visit_count') + 1)
+    )
+
+
+def assign_visit(visit, volunteer):
+    """
+    Assign `volunteer` to `visit` and schedule it. Updates `visit` in place.
+    Raises VisitNotAssignable, VolunteerAtCapacity or VolunteerDoubleBooked
+    (nothing is written).
+    """
+    with transaction.atomic():
+        current = (
+            Visit.objects.filter(pk=visit.pk)
+            .values('status', 'volunteer_id', 'date', 'time', 'assigned_at').first()
+        )
+        if current is None or current['status'] not in Visit.ACTIVE_STATUSES:
+            raise VisitNotAssignable(f"Visit #{visit.pk} is no longer open.")
+        previous = current['volunteer_id']
+        day = current['date']
+        was_booked = previous is not None and current['status'] in Visit.BOOKED_STATUSES
+
+        if not (was_booked and previous == volunteer.pk):
+            booked = booked_slots([(volunteer.pk, day)]).get((volunteer.pk, day), 0)
+            if booked & visit_mask(current['time']):
+                raise VolunteerDoubleBooked(
+                    f"Volunteer #{volunteer.pk} is already booked at that time."
+                )
+
+        if previous != volunteer.pk:
+            if not claim_capacity(volunteer.pk):
+                raise VolunteerAtCapacity(f"Volunteer #{volunteer.pk} has reached service limit.")
+
+        now = timezone.now()
+        assigned_at = current['assigned_at'] or now
+        written = (
+            Visit.objects
+            .filter(pk=visit.pk, status=current['status'], volunteer_id=previous)
+            .update(
+                volunteer_id=volunteer.pk, status='Scheduled',
+                assigned_at=assigned_at, updated_at=now,
+            )
+        )
+        if not written:
+            raise VisitNotAssignable(f"Visit #{visit.pk} was changed by someone else; try again.")
+
+        if previous != volunteer.pk:
+            adjust_workload(previous, -1)
+        refresh_bookings([(volunteer.pk, day)] + ([(previous, day)] if was_booked else []))
+        schedule_stats_refresh([(day, volunteer.pk), (day, previous)])
+        bump_visit_dashboards([visit.mother_id], [volunteer.pk, previous])
+
+    visit.volunteer = volunteer
+    visit.status = 'Scheduled'
+    visit.assigned_at = assigned_at
+    visit.updated_at = now
+    visit._remember_loaded_state()
+    return visit
+
+
+def approve_suggestions(visit_ids=None):
+    """
+    Approve the suggested volunteer of every Awaiting Approval visit in
+    `visit_ids` (all of them when None). Returns
+    {'approved': [visit_id, ...], 'skipped': [(visit_id, reason), ...]}.
+    Raises AssignmentError (nothing is written) if visits or capacity were
+    changed by someone else meanwhile.
+    """
+    eligible = Visit.objects.filter(
+        status='Awaiting Approval', volunteer__isnull=True, suggested_volunteer__isnull=False
+    )
+    if visit_ids is not None:
+        visit_ids = set(visit_ids)
+        eligible = eligible.filter(pk__in=visit_ids)
+
+    with transaction.atomic():
+        visits = sorted(
+            eligible
+            .select_related('mother__user', 'suggested_volunteer__user')
+            .only('id', 'date', 'time', 'priority', 'suggested_volunteer_id',
+                  'mother__user__username', 'suggested_volunteer__user__username'),
+            key=lambda v: (Visit.rank_of(v.priority), v.date, v.time, v.id),
+        )
+        skipped = [
+            (visit_id, "not awaiting approval with a suggested volunteer")
+            for visit_id in sorted((visit_ids or set()) - {v.id for v in visits})
+        ]
+
+        # 1) Capacity per volunteer, for all of their visits at once
+        remaining = {
+            vid: limit - active
+            for vid, limit, active in (
+                VolunteerProfile.objects.select_for_update()
+                .filter(pk__in={v.suggested_volunteer_id for v in visits})
+                .values_list('id', 'service_limit', 'active_visit_count')
+            )
+        }
+        booked = booked_slots((v.suggested_volunteer_id, v.date) for v in visits)
+        approved = defaultdict(list)   # volunteer_id -> [Visit]
+        for visit in visits:
+            vid = visit.suggested_volunteer_id
+            username = visit.suggested_volunteer.user.username
+            mask = visit_mask(visit.time)
+            if booked.get((vid, visit.date), 0) & mask:
+                skipped.append((visit.id, f"{username} is already booked at that time"))
+            elif remaining.get(vid, 0) > 0:
+                remaining[vid] -= 1
+                booked[(vid, visit.date)] = booked.get((vid, visit.date), 0) | mask
+                approved[vid].append(visit)
+            else:
+                skipped.append((visit.id, f"{username} has reached service limit"))
+
+        if approved:
+            # 2) Claim it: one conditional UPDATE per distinct number of visits
+            by_amount = defaultdict(list)
+            for vid, granted in approved.items():
+                by_amount[len(granted)].append(vid)
+            for amount, vids in by_amount.items():
+                claimed = (
+                    VolunteerProfile.objects
+                    .filter(pk__in=vids, active_visit_count__lte=F('service_limit') - amount)
+                    .update(active_visit_count=F('active_visit_count') + amount)
+                )
+                if claimed != len(vids):
+                    raise AssignmentError("Volunteer capacity changed meanwhile; try again.")
+
+            # 3) Schedule every approved visit with its suggested volunteer
+            now = timezone.now()
+            condition = reduce(or_, (
+                Q(suggested_volunteer_id=vid, pk__in=[v.id for v in granted])
+                for vid, granted in approved.items()
+            ))
+            approved_visits = [v for granted in approved.values() for v in granted]
+            written = (
+                Visit.objects
+                .filter(condition, status='Awaiting Approval', volunteer__isnull=True)
+                .update(
+                    volunteer=F('suggested_volunteer'),
+                    status='Scheduled',
+                    assigned_at=Coalesce('assigned_at', Value(now)),
+                    updated_at=now,
+                )
+            )
+            if written != len(approved_visits):
+                raise AssignmentError("Some visits were changed meanwhile; try again.")
+            refresh_bookings((v.suggested_volunteer_id, v.date) for v in approved_visits)
+            schedule_stats_refresh((v.date, v.suggested_volunteer_id) for v in approved_visits)
+            bump_visit_dashboards(
+                [v.mother_id for v in approved_visits],
+                [v.suggested_volunteer_id for v in approved_visits],
+            )
+
+            # 4) Notify mothers and volunteers in one INSERT
+            pairs = []
+            for visit in approved_visits:
+                volunteer_user = visit.suggested_volunteer.user
+                pairs.append((
+                    visit.mother.user,
+                    f"Volunteer {volunteer_user.username} assigned to Visit #{visit.id}.",
+                ))
+                pairs.append((volunteer_user, f"You have been assigned to Visit #{visit.id}."))
+            bulk_notify(pairs)
+
+    return {
+        'approved': sorted(v.id for granted in approved.values() for v in granted),
+        'skipped': sorted(skipped),
+    }
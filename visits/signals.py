@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import MotherProfile, VolunteerProfile
+
+from .bookings import refresh_bookings
+from .candidates import invalidate_candidate_pools
+from .dashboards import bump_dashboards, bump_visit_dashboards
+from .models import Availability, MedicalReport, Visit
+from .stats import schedule_stats_refresh
+from .workload import move_workload
+
+
+@receiver(post_delete, sender=Visit)
+def release_workload_on_delete(sender, instance, **kwargs):
+    previous_volunteer_id, previous_booking, previous_stats = instance._previous_state()
+    move_workload(previous_volunteer_id, None)
+    if previous_booking:
+        refresh_bookings([previous_booking[:2]])
+    if previous_stats:
+        schedule_stats_refresh([(previous_stats[0], previous_stats[3])])
+    bump_visit_dashboards(
+        [instance.mother_id], [instance.volunteer_id, previous_stats and previous_stats[3]]
+    )
+
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+@receiver(post_save, sender=VolunteerProfile)
+@receiver(post_delete, sender=VolunteerProfile)
+def invalidate_candidates(sender, **kwargs):
+    # Again on commit, in case a pool was rebuilt from uncommitted rows meanwhile
+    invalidate_candidate_pools()
+    transaction.on_commit(invalidate_candidate_pools)
+
+
+@receiver(post_save, sender=VolunteerProfile)
+@receiver(post_delete, sender=VolunteerProfile)
+@receiver(post_save, sender=MotherProfile)
+@receiver(post_delete, sender=MotherProfile)
+def bump_profile_dashboards(sender, **kwargs):
+    bump_dashboards([('profiles',)])
+
+
+@receiver(post_save, sender=MedicalReport)
+@receiver(post_delete, sender=MedicalReport)
+def bump_report_dashboards(sender, instance, **kwargs):
+    bump_dashboards([('reports', instance.mother_id)])
@@ -0,0 +1,113 @@
+# visits/sla.py
+"""
+Matching service levels: how long requests wait for a suggestion and for
+an assigned volunteer, per priority.
+
+Exports:
+    sla_targets() -> {priority: hours}
+    sla_report(from_date, to_date, now=None) -> list[dict]
+    percentile(sorted_values, p) -> value | None
+
+Settings:
+    VISIT_SLA_HOURS = {'High': 24, 'Medium': 72, 'Low': 168}
+                                  maximum time from request to assignment
+
+Behavior:
+ - Covers visits requested (created_at) between from_date and to_date,
+   whole local days. Visits created before created_at existed are left out.
+ - Time to suggestion is created_at -> suggested_at (the first suggestion,
+   by the matching worker or a batch run); time to assignment is
+   created_at -> assigned_at. Both are reported as p50 / p95 hours
+   (nearest-rank percentiles over the visits that reached that step).
+ - `breached` counts assigned visits that waited longer than the target;
+   `overdue` counts visits still open (Pending / Awaiting Approval) whose
+   request is older than the target now (so cancelled visits never are).
+ - One query (a values_list iterator over the range); the percentiles are
+   computed in Python, as SQLite has no percentile aggregate.
+"""
+
+import math
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Visit
+
+DEFAULT_SLA_HOURS = {'High': 24, 'Medium': 72, 'Low': 168}
+OPEN_STATUSES = ('Pending', 'Awaiting Approval')
+
+
+def sla_targets():
+    return getattr(settings, 'VISIT_SLA_HOURS', DEFAULT_SLA_HOURS)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank p-th percentile of an ascending list (None if empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _hours(start, end):
+    if start is None or end is None or end < start:
+        return None
+    return (end - start).total_seconds() / 3600
+
+
+def sla_report(from_date, to_date, now=None):
+    """
+    One row per priority (High first) for visits requested within
+    [from_date, to_date]: {'priority', 'target_hours', 'requests',
+    'suggestion_p50', 'suggestion_p95', 'assigned', 'assignment_p50',
+    'assignment_p95', 'breached', 'overdue'}; times in hours.
+    """
+    now = now or timezone.now()
+    targets = sla_targets()
+    rows = (
+        Visit.objects
+        .filter(created_at__gte=_start_of(from_date),
+                created_at__lt=_start_of(to_date + timedelta(days=1)))
+        .values_list('priority', 'status', 'created_at', 'suggested_at', 'assigned_at')
+        .iterator()
+    )
+
+    requests = defaultdict(int)
+    suggestion_hours = defaultdict(list)
+    assignment_hours = defaultdict(list)
+    overdue = defaultdict(int)
+    for priority, status, created_at, suggested_at, assigned_at in rows:
+        requests[priority] += 1
+        waited = _hours(created_at, suggested_at)
+        if waited is not None:
+            suggestion_hours[priority].append(waited)
+        waited = _hours(created_at, assigned_at)
+        if waited is not None:
+            assignment_hours[priority].append(waited)
+        elif status in OPEN_STATUSES and priority in targets:
+            overdue[priority] += (_hours(created_at, now) or 0) > targets[priority]
+
+    report = []
+    for priority in sorted(requests, key=Visit.rank_of):
+        suggested = sorted(suggestion_hours[priority])
+        assigned = sorted(assignment_hours[priority])
+        target = targets.get(priority)
+        report.append({
+            'priority': priority,
+            'target_hours': target,
+            'requests': requests[priority],
+            'suggestion_p50': percentile(suggested, 50),
+            'suggestion_p95': percentile(suggested, 95),
+            'assigned': len(assigned),
+            'assignment_p50': percentile(assigned, 50),
+            'assignment_p95': percentile(assigned, 95),
+            'breached': 0 if target is None else sum(h > target for h in assigned),
+            'overdue': overdue[priority],
+        })
+    return report
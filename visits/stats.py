@@ -0,0 +1,213 @@
+# visits/stats.py
+"""
+Visit statistics rollups.
+
+Exports:
+    schedule_stats_refresh(keys)          keys: iterable of (date, volunteer_id)
+    refresh_stats(keys)
+    rebuild_stats(from_date=None, to_date=None) -> (daily rows, volunteer rows)
+    visit_statistics(from_date, to_date) -> dict
+
+Behavior:
+ - DailyVisitStats holds, per visit date, status, priority and the mother's
+   risk level: the number of visits and their total time to assignment
+   (created_at -> assigned_at). MonthlyVolunteerStats holds visits per
+   volunteer, month and status.
+ - Rows are recomputed from the visits of the touched days and volunteer
+   months (never incremented), so a repeated or lost refresh cannot leave
+   them wrong for long. Visit.save(), the post_delete signal and the bulk
+   writers in visits.services / visits.assignment schedule a refresh for
+   after their transaction commits, so the rollups add no work while the
+   write lock is held; bulk writers refresh all their visits at once.
+ - The rollup_stats command rebuilds a date range (or everything) nightly
+   to catch what incremental refreshes missed: changes to a mother's risk
+   level, raw SQL and failed refreshes.
+ - visit_statistics() reads only the rollup tables (two queries, whatever
+   the number of visits). Volunteer counts are per month, so the busiest
+   volunteers cover the whole months the range touches ('volunteer_months').
+"""
+
+from collections import defaultdict
+from datetime import date as Date
+from functools import partial, reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .models import DailyVisitStats, MonthlyVolunteerStats, Visit
+
+FILLED_STATUSES = ('Scheduled', 'Completed')
+TOP_VOLUNTEERS = 10
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return Date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def _wait_seconds(created_at, assigned_at):
+    if created_at is None or assigned_at is None or assigned_at < created_at:
+        return None
+    return int((assigned_at - created_at).total_seconds())
+
+
+def _roll_up(rows):
+    """Rollup model instances from (date, status, priority, risk_level,
+    volunteer_id, created_at, assigned_at) rows."""
+    daily = defaultdict(lambda: [0, 0, 0])       # key -> [visits, assigned, seconds]
+    monthly = defaultdict(int)                   # (month, volunteer_id, status) -> visits
+    for day, status, priority, risk_level, volunteer_id, created_at, assigned_at in rows:
+        totals = daily[(day, status, priority, risk_level or '')]
+        totals[0] += 1
+        wait = _wait_seconds(created_at, assigned_at)
+        if wait is not None:
+            totals[1] += 1
+            totals[2] += wait
+        if volunteer_id is not None:
+            monthly[(_month(day), volunteer_id, status)] += 1
+    return (
+        [
+            DailyVisitStats(
+                date=day, status=status, priority=priority, risk_level=risk_level,
+                visits=visits, assigned=assigned, assignment_seconds=seconds,
+            )
+            for (day, status, priority, risk_level), (visits, assigned, seconds) in daily.items()
+        ],
+        [
+            MonthlyVolunteerStats(month=month, volunteer_id=vid, status=status, visits=visits)
+            for (month, vid, status), visits in monthly.items()
+        ],
+    )
+
+
+ROLLUP_FIELDS = (
+    'date', 'status', 'priority', 'mother__risk_level', 'volunteer_id', 'created_at', 'assigned_at',
+)
+
+
+def refresh_stats(keys):
+    """Recompute the rollups of the visit dates and volunteer months in `keys`."""
+    to_date = Visit._meta.get_field('date').to_python
+    keys = {(to_date(day), vid) for day, vid in keys}
+    if not keys:
+        return
+    days = {day for day, _ in keys}
+    months = defaultdict(set)                    # month -> {volunteer_id}
+    for day, vid in keys:
+        if vid is not None:
+            months[_month(day)].add(vid)
+
+    visits = Q(date__in=days)
+    volunteer_months = None
+    if months:
+        volunteer_months = reduce(or_, (
+            Q(month=month, volunteer_id__in=vids) for month, vids in months.items()
+        ))
+        visits |= reduce(or_, (
+            Q(date__gte=month, date__lt=_next_month(month), volunteer_id__in=vids)
+            for month, vids in months.items()
+        ))
+    daily, monthly = _roll_up(Visit.objects.filter(visits).values_list(*ROLLUP_FIELDS))
+
+    # The query also returned other days of the refreshed volunteer months
+    daily = [row for row in daily if row.date in days]
+    monthly = [row for row in monthly if row.volunteer_id in months.get(row.month, ())]
+
+    with transaction.atomic():
+        DailyVisitStats.objects.filter(date__in=days).delete()
+        DailyVisitStats.objects.bulk_create(daily)
+        if volunteer_months is not None:
+            MonthlyVolunteerStats.objects.filter(volunteer_months).delete()
+            MonthlyVolunteerStats.objects.bulk_create(monthly)
+
+
+def schedule_stats_refresh(keys):
+    """refresh_stats(keys) once the current transaction commits."""
+    keys = [(day, vid) for day, vid in keys if day is not None]
+    if keys:
+        transaction.on_commit(partial(refresh_stats, keys), robust=True)
+
+
+def rebuild_stats(from_date=None, to_date=None):
+    """
+    Rebuild the rollups of visits dated within [from_date, to_date] (open
+    ends allowed), widened to whole months. Returns the number of rows.
+    """
+    visits = Visit.objects.all()
+    daily_rows = DailyVisitStats.objects.all()
+    monthly_rows = MonthlyVolunteerStats.objects.all()
+    if from_date:
+        from_date = _month(from_date)
+        visits = visits.filter(date__gte=from_date)
+        daily_rows = daily_rows.filter(date__gte=from_date)
+        monthly_rows = monthly_rows.filter(month__gte=from_date)
+    if to_date:
+        to_date = _next_month(to_date)
+        visits = visits.filter(date__lt=to_date)
+        daily_rows = daily_rows.filter(date__lt=to_date)
+        monthly_rows = monthly_rows.filter(month__lt=to_date)
+
+    daily, monthly = _roll_up(visits.values_list(*ROLLUP_FIELDS).iterator())
+    with transaction.atomic():
+        daily_rows.delete()
+        monthly_rows.delete()
+        DailyVisitStats.objects.bulk_create(daily, batch_size=1000)
+        MonthlyVolunteerStats.objects.bulk_create(monthly, batch_size=1000)
+    return len(daily), len(monthly)
+
+
+def visit_statistics(from_date, to_date):
+    """
+    Totals for visits dated within [from_date, to_date]:
+    {'visits', 'by_status', 'by_priority', 'by_risk_level', 'fill_rate',
+     'avg_assignment_hours', 'top_volunteers', 'volunteer_months'}.
+    top_volunteers counts the whole months of volunteer_months
+    (first month, last month), which may reach outside the dates.
+    """
+    rows = (
+        DailyVisitStats.objects
+        .filter(date__range=(from_date, to_date))
+        .values('status', 'priority', 'risk_level')
+        .annotate(
+            n=Sum('visits'), assigned_n=Sum('assigned'), seconds=Sum('assignment_seconds'),
+        )
+    )
+    by_status, by_priority, by_risk_level = defaultdict(int), defaultdict(int), defaultdict(int)
+    assigned = seconds = 0
+    for row in rows:
+        by_status[row['status']] += row['n']
+        by_priority[row['priority']] += row['n']
+        by_risk_level[row['risk_level']] += row['n']
+        assigned += row['assigned_n']
+        seconds += row['seconds']
+
+    total = sum(by_status.values())
+    requested = total - by_status.get('Cancelled', 0)
+    filled = sum(by_status.get(status, 0) for status in FILLED_STATUSES)
+
+    volunteer_months = (_month(from_date), _month(to_date))
+    top_volunteers = (
+        MonthlyVolunteerStats.objects
+        .filter(month__range=volunteer_months)
+        .values('volunteer_id', 'volunteer__user__username')
+        .annotate(
+            total=Sum('visits'),
+            completed=Sum('visits', filter=Q(status='Completed')),
+        )
+        .order_by('-total', 'volunteer_id')[:TOP_VOLUNTEERS]
+    )
+
+    return {
+        'visits': total,
+        'by_status': dict(by_status),
+        'by_priority': dict(by_priority),
+        'by_risk_level': dict(by_risk_level),
+        'fill_rate': filled / requested if requested else None,
+        'avg_assignment_hours': seconds / assigned / 3600 if assigned else None,
+        'top_volunteers': list(top_volunteers),
+        'volunteer_months': volunteer_months,
+    }
@@ -0,0 +1,138 @@
+"""
+Query-plan regression tests for the hot queries on visits tables.
+
+Each test runs EXPLAIN QUERY PLAN on a query the app issues on a hot path and
+fails if SQLite would answer it with a full table scan, so a change to the
+query or a dropped index cannot quietly regress it.
+"""
+
+import re
+from datetime import date
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from accounts.pagination import KeysetPage
+from accounts.views import QUEUE_ORDERING
+from visits.jobs import CLAIM_ORDERING, claim_candidates
+from visits.models import Availability, MatchingJob, Notification, Visit
+from visits.notifications import unread_for
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite syntax")
+class HotQueryPlanTest(TestCase):
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScan(self, queryset):
+        plan = self.explain(queryset)
+        scans = [line for line in plan if FULL_SCAN.match(line)]
+        self.assertFalse(scans, "Full table scan in plan:\n" + "\n".join(plan))
+        return plan
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.assertNoFullScan(queryset)
+        self.assertTrue(
+            any(f'INDEX {index_name} ' in line for line in plan),
+            f"{index_name} not used:\n" + "\n".join(plan),
+        )
+        return plan
+
+    def assertIndexOrder(self, queryset, index_name):
+        """Rows come in ORDER BY order straight from the index, unsorted."""
+        plan = self.assertUsesIndex(queryset, index_name)
+        self.assertNotIn(SORT, plan, "Sort in plan:\n" + "\n".join(plan))
+
+    # -------------------------------------------------
+    # Dashboards (accounts.views.dashboard)
+    # -------------------------------------------------
+    def test_admin_queue_page(self):
+        self.assertIndexOrder(
+            Visit.objects.filter(status='Pending').order_by(*QUEUE_ORDERING)[:21],
+            'visit_queue_idx',
+        )
+
+    def test_admin_queue_next_page(self):
+        pending = Visit.objects.filter(status='Pending')
+        page = KeysetPage(RequestFactory().get('/'), 'pending', pending, QUEUE_ORDERING)
+        self.assertIndexOrder(
+            pending.filter(page._seek_filter([1, date(2025, 12, 15), 100]))
+            .order_by(*QUEUE_ORDERING)[:21],
+            'visit_queue_idx',
+        )
+
+    def test_admin_queue_seek_page(self):
+        day = date(2025, 12, 15)
+        self.assertUsesIndex(
+            Visit.objects.filter(status='Completed')
+            .filter(Q(date__lt=day) | Q(date=day, id__lt=100))
+            .order_by('-date', '-id')[:21],
+            'visit_status_date_idx',
+        )
+
+    def test_mother_visit_list(self):
+        self.assertUsesIndex(
+            Visit.objects.filter(mother_id=1).order_by('-date', '-id')[:21],
+            'visit_mother_date_idx',
+        )
+
+    def test_volunteer_visit_list(self):
+        self.assertNoFullScan(Visit.objects.filter(volunteer_id=1).order_by('-date', '-id')[:21])
+
+    # -------------------------------------------------
+    # Matching, assignment and workload
+    # -------------------------------------------------
+    def test_volunteer_active_visits(self):
+        self.assertUsesIndex(
+            Visit.objects.filter(volunteer_id=1, status__in=Visit.ACTIVE_STATUSES),
+            'visit_volunteer_status_idx',
+        )
+
+    def test_workload_recount(self):
+        self.assertNoFullScan(
+            Visit.objects
+            .filter(status__in=Visit.ACTIVE_STATUSES, volunteer__isnull=False)
+            .values('volunteer_id').annotate(n=Count('id'))
+        )
+
+    def test_suggested_visits(self):
+        self.assertNoFullScan(Visit.objects.filter(suggested_volunteer_id=1))
+
+    def test_batch_open_visits(self):
+        self.assertNoFullScan(
+            Visit.objects.filter(status__in=['Pending', 'Awaiting Approval'], volunteer__isnull=True)
+        )
+
+    def test_availability_free_at(self):
+        self.assertUsesIndex(
+            Availability.objects.volunteer_ids_free_at(0, 600), 'availability_interval_idx'
+        )
+
+    def test_matching_job_claim(self):
+        for queryset in claim_candidates(timezone.now()):
+            self.assertEqual(queryset.query.order_by, CLAIM_ORDERING)
+            self.assertIndexOrder(queryset, 'matchingjob_priority_idx')
+
+    # -------------------------------------------------
+    # Notifications
+    # -------------------------------------------------
+    def test_unread_inbox(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(user_id=1, is_read=False).order_by('-created_at')[:10],
+            'notification_inbox_idx',
+        )
+
+    def test_unread_with_broadcasts(self):
+        user = CustomUser(pk=1, role='admin', date_joined=timezone.now())
+        self.assertNoFullScan(unread_for(user).order_by('-created_at')[:10])
@@ -1,7 +1,51 @@
-from django.test import TestCase
-from django.urls import reverse
-from accounts.models import CustomUser, MotherProfile
-from visits.models import Visit
+import csv
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from accounts.models import CustomUser, MotherProfile, VolunteerProfile
+from perinatal_support_scheduler.middleware import profile_log, query_shape
+from visits.models import (
+    Availability, DailyVisitStats, MatchingJob, MedicalReport, MonthlyVolunteerStats, Notification,
+    Visit, VisitSeries,
+)
+from visits.assignment import run_batch_assignment
+from visits.bookings import booked_slots, booking_conflicts, visit_mask
+from visits.candidates import (
+    GENERATION_KEY, NEAREST_K, candidate_pool_stats, nearby_candidates, reset_candidate_pool_stats,
+)
+from visits.jobs import claim_next_job, run_job
+from visits.reports import store_report
+from visits.series import create_series
+from visits.sla import percentile, sla_report
+from visits.services import (
+    VisitNotAssignable, VolunteerAtCapacity, VolunteerDoubleBooked, approve_suggestions,
+    assign_visit,
+)
+from visits.notifications import (
+    INBOX_SIZE, broadcast, inbox, mark_all_read, mark_broadcasts_read, notify_users, unread_count,
+    unread_for,
+)
+from visits.stats import rebuild_stats, visit_statistics
+from visits.utils import suggest_volunteer
+from visits.workload import recount_workload
 
 class VisitRequestTest(TestCase):
     def setUp(self):
@@ -25,3 +69,1382 @@ class VisitRequestTest(TestCase):
         })
         self.assertEqual(response.status_code, 302)
         self.assertEqual(Visit.objects.count(), 1)
+
+
+class SuggestVolunteerQueryTest(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create(username='mother2', role='mother')
+        self.mother = MotherProfile.objects.create(user=user, risk_level='High')
+        # 2025-12-15 is a Monday
+        self.visit = Visit.objects.create(
+            mother=self.mother, date=date(2025, 12, 15), time=time(10, 0)
+        )
+        self.volunteer_count = 0
+
+    def add_volunteers(self, n):
+        for _ in range(n):
+            self.volunteer_count += 1
+            user = CustomUser.objects.create(
+                username=f'vol{self.volunteer_count}', role='volunteer'
+            )
+            volunteer = VolunteerProfile.objects.create(user=user, skills='nurse')
+            Availability.objects.create(volunteer=volunteer, day='Monday', time_slot='9:00-11:00')
+            Availability.objects.create(volunteer=volunteer, day='Monday', time_slot='')
+
+    def count_queries(self):
+        visit = Visit.objects.select_related('mother').get(pk=self.visit.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            suggested = suggest_volunteer(visit)
+        self.assertIsNotNone(suggested)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_flat_as_volunteers_grow(self):
+        self.add_volunteers(2)
+        small = self.count_queries()
+        self.add_volunteers(40)
+        self.assertEqual(self.count_queries(), small)
+
+    def test_full_volunteers_are_skipped(self):
+        self.add_volunteers(1)
+        volunteer = VolunteerProfile.objects.get()
+        volunteer.service_limit = 1
+        volunteer.save()
+        Visit.objects.create(
+            mother=self.mother, volunteer=volunteer, status='Scheduled',
+            date=date(2025, 12, 1), time=time(9, 0)
+        )
+        self.assertIsNone(suggest_volunteer(self.visit))
+
+
+class CandidatePoolCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_pool', role='mother'),
+            risk_level='Low',
+        )
+        # 2025-12-15 is a Monday
+        self.visit = Visit.objects.create(mother=mother, date=date(2025, 12, 15), time=time(10, 0))
+        self.volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_pool', role='volunteer'),
+            service_limit=1,
+        )
+        self.slot = Availability.objects.create(
+            volunteer=self.volunteer, day='Monday', time_slot='9:00-11:00'
+        )
+        reset_candidate_pool_stats()
+
+    def test_second_call_hits_the_cache(self):
+        self.assertEqual(suggest_volunteer(self.visit), self.volunteer)
+        with self.assertNumQueries(1):  # live workload only
+            self.assertEqual(suggest_volunteer(self.visit), self.volunteer)
+        self.assertEqual(candidate_pool_stats(), {'hits': 1, 'misses': 1})
+
+    def test_availability_change_invalidates(self):
+        suggest_volunteer(self.visit)
+        self.slot.day = 'Tuesday'
+        self.slot.save()
+        self.assertIsNone(suggest_volunteer(self.visit))
+        self.assertEqual(candidate_pool_stats()['misses'], 2)
+
+    def test_lost_generation_is_not_reused(self):
+        cache.delete(GENERATION_KEY)  # culled or cleared
+        suggest_volunteer(self.visit)
+        self.slot.day = 'Tuesday'
+        self.slot.save()
+        cache.delete(GENERATION_KEY)
+        self.assertIsNone(suggest_volunteer(self.visit))
+        self.assertEqual(candidate_pool_stats()['misses'], 2)
+
+    def test_workload_is_read_live(self):
+        suggest_volunteer(self.visit)
+        Visit.objects.create(
+            mother=self.visit.mother, volunteer=self.volunteer, status='Scheduled',
+            date=date(2025, 12, 8), time=time(9, 0),
+        )
+        self.assertIsNone(suggest_volunteer(self.visit))
+        self.assertEqual(candidate_pool_stats()['hits'], 1)
+
+
+class SkillMatchingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create(username='mother_skill', role='mother')
+        self.mother = MotherProfile.objects.create(user=user, risk_level='High')
+        # 2025-12-15 is a Monday
+        self.visit = Visit.objects.create(mother=self.mother, date=date(2025, 12, 15), time=time(10, 0))
+        # The unskilled volunteer outscores the skilled one (spare capacity)
+        self.skilled = self.add_volunteer('vol_skill_b', 'Midwife', '18:00-20:00', 1)
+        self.unskilled = self.add_volunteer('vol_skill_a', 'doula', '9:00-11:00', 20)
+
+    def add_volunteer(self, username, skills, slot, service_limit):
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username=username, role='volunteer'),
+            skills=skills, service_limit=service_limit,
+        )
+        Availability.objects.create(volunteer=volunteer, day='Monday', time_slot=slot)
+        return volunteer
+
+    def test_high_risk_requires_matching_skill(self):
+        self.assertEqual(suggest_volunteer(self.visit), self.skilled)
+
+    def test_falls_back_when_no_skilled_volunteer_has_capacity(self):
+        Visit.objects.create(
+            mother=self.mother, volunteer=self.skilled, status='Scheduled',
+            date=date(2025, 12, 8), time=time(9, 0),
+        )
+        self.assertEqual(suggest_volunteer(self.visit), self.unskilled)
+
+    def test_low_risk_ignores_skills(self):
+        self.mother.risk_level = 'Low'
+        self.mother.save()
+        self.visit.mother = self.mother
+        self.assertEqual(suggest_volunteer(self.visit), self.unskilled)
+
+
+class DistanceMatchingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = CustomUser.objects.create(username='mother_geo', role='mother')
+        self.mother = MotherProfile.objects.create(user=user, location='Nashua, NH')
+        # 2025-12-15 is a Monday
+        self.visit = Visit.objects.create(mother=self.mother, date=date(2025, 12, 15), time=time(10, 0))
+        self.count = 0
+
+    def add_volunteer(self, location, service_limit=5):
+        self.count += 1
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username=f'vol_geo_{self.count}', role='volunteer'),
+            location=location, service_limit=service_limit,
+        )
+        Availability.objects.create(volunteer=volunteer, day='Monday', time_slot='9:00-11:00')
+        return volunteer
+
+    def test_nearest_volunteer_preferred(self):
+        far = self.add_volunteer('Chennai', service_limit=20)
+        near = self.add_volunteer('Manchester')
+        self.assertEqual(suggest_volunteer(self.visit), near)
+
+        near.service_limit = 0
+        near.save()
+        self.assertEqual(suggest_volunteer(self.visit), far)
+
+    def test_search_stays_within_max_ring(self):
+        for _ in range(3):
+            self.add_volunteer('Hyderabad')
+        local = [self.add_volunteer('Nashua') for _ in range(3)]
+
+        found = nearby_candidates(0, 600, self.mother.latitude, self.mother.longitude)
+        self.assertEqual({c.id for _, c in found}, {v.id for v in local})
+
+    def test_unknown_location_uses_whole_pool(self):
+        self.mother.location = 'Atlantis'
+        self.mother.save()
+        volunteer = self.add_volunteer('Chennai')
+        self.assertEqual(suggest_volunteer(self.visit), volunteer)
+
+    def test_whole_pool_is_not_cut_to_nearest_k(self):
+        self.mother.location = 'Atlantis'
+        self.mother.save()
+        volunteers = [self.add_volunteer('Atlantis') for _ in range(NEAREST_K + 5)]
+        # everyone but the last (highest id) is nearly at their service_limit
+        VolunteerProfile.objects.exclude(pk=volunteers[-1].pk).update(active_visit_count=4)
+        self.assertEqual(suggest_volunteer(self.visit), volunteers[-1])
+
+
+class BatchAssignmentTest(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create(username='mother3', role='mother')
+        self.mother = MotherProfile.objects.create(user=user, risk_level='Low')
+
+    def add_volunteer(self, name, days, service_limit=1):
+        user = CustomUser.objects.create(username=name, role='volunteer')
+        volunteer = VolunteerProfile.objects.create(user=user, service_limit=service_limit)
+        for day in days:
+            Availability.objects.create(volunteer=volunteer, day=day, time_slot='')
+        return volunteer
+
+    def add_visit(self, day, priority):
+        return Visit.objects.create(
+            mother=self.mother, date=date(2025, 12, day), time=time(10, 0), priority=priority
+        )
+
+    def test_global_matching_serves_both_visits(self):
+        both = self.add_volunteer('both', ['Monday', 'Tuesday'])
+        monday_only = self.add_volunteer('monday', ['Monday'])
+        monday_visit = self.add_visit(15, 'High')    # Monday
+        tuesday_visit = self.add_visit(16, 'Low')    # Tuesday
+
+        result = run_batch_assignment()
+
+        self.assertEqual(result['unmatched'], 0)
+        monday_visit.refresh_from_db()
+        tuesday_visit.refresh_from_db()
+        self.assertEqual(monday_visit.suggested_volunteer, monday_only)
+        self.assertEqual(tuesday_visit.suggested_volunteer, both)
+        self.assertEqual(tuesday_visit.status, 'Awaiting Approval')
+
+    def test_capacity_goes_to_higher_priority(self):
+        self.add_volunteer('only', ['Monday'])
+        low = self.add_visit(15, 'Low')
+        high = self.add_visit(22, 'High')
+
+        run_batch_assignment()
+
+        low.refresh_from_db()
+        high.refresh_from_db()
+        self.assertIsNotNone(high.suggested_volunteer)
+        self.assertIsNone(low.suggested_volunteer)
+        self.assertEqual(low.status, 'Pending')
+
+    def test_booked_volunteers_are_not_suggested(self):
+        booked = self.add_volunteer('booked', ['Monday'], service_limit=10)
+        free = self.add_volunteer('free', ['Monday'])
+        Visit.objects.create(
+            mother=self.mother, volunteer=booked, status='Scheduled',
+            date=date(2025, 12, 15), time=time(10, 0),
+        )
+        visit = self.add_visit(15, 'Low')
+
+        run_batch_assignment()
+
+        visit.refresh_from_db()
+        self.assertEqual(visit.suggested_volunteer, free)
+
+    def test_skilled_volunteers_preferred_for_risk(self):
+        self.mother.risk_level = 'High'
+        self.mother.save()
+        self.add_volunteer('unskilled', ['Monday'], service_limit=20)
+        skilled = self.add_volunteer('skilled', ['Monday'])
+        skilled.skills = 'Midwife'
+        skilled.save()
+        visit = self.add_visit(15, 'High')
+
+        run_batch_assignment()
+
+        visit.refresh_from_db()
+        self.assertEqual(visit.suggested_volunteer, skilled)
+
+
+class AvailabilityIntervalTest(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create(username='vol_interval', role='volunteer')
+        self.volunteer = VolunteerProfile.objects.create(user=user)
+
+    def test_time_slot_is_parsed_on_save(self):
+        a = Availability.objects.create(volunteer=self.volunteer, day='tue', time_slot='2pm to 4:30pm')
+        self.assertEqual((a.weekday, a.start_minute, a.end_minute), (1, 840, 990))
+
+        a = Availability.objects.create(volunteer=self.volunteer, day='Monday', time_slot='someday')
+        self.assertIsNone(a.weekday)
+
+    def test_free_at_finds_time_inside_range(self):
+        Availability.objects.create(volunteer=self.volunteer, day='Monday', time_slot='9:00-11:00')
+        free = Availability.objects.volunteer_ids_free_at(0, 10 * 60 + 30)
+        self.assertEqual(list(free), [self.volunteer.id])
+        self.assertFalse(Availability.objects.free_at(0, 11 * 60).exists())
+        self.assertFalse(Availability.objects.free_at(1, 10 * 60).exists())
+
+
+class ActiveVisitCountTest(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create(username='mother4', role='mother')
+        self.mother = MotherProfile.objects.create(user=user)
+        user = CustomUser.objects.create(username='vol_count', role='volunteer')
+        self.volunteer = VolunteerProfile.objects.create(user=user, service_limit=2)
+
+    def count(self):
+        self.volunteer.refresh_from_db()
+        return self.volunteer.active_visit_count
+
+    def test_counter_follows_visit_changes(self):
+        visit = Visit.objects.create(mother=self.mother, date=date(2025, 12, 15), time=time(10, 0))
+        self.assertEqual(self.count(), 0)
+
+        visit.volunteer = self.volunteer
+        visit.status = 'Scheduled'
+        visit.save()
+        self.assertEqual(self.count(), 1)
+
+        # A deferred load still finds the previous state
+        visit = Visit.objects.only('id').get(pk=visit.pk)
+        visit.status = 'Completed'
+        visit.save()
+        self.assertEqual(self.count(), 0)
+
+        other = Visit.objects.create(
+            mother=self.mother, volunteer=self.volunteer, status='Scheduled',
+            date=date(2025, 12, 16), time=time(10, 0)
+        )
+        self.assertEqual(self.count(), 1)
+        other.delete()
+        self.assertEqual(self.count(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        Visit.objects.create(
+            mother=self.mother, volunteer=self.volunteer, status='Scheduled',
+            date=date(2025, 12, 15), time=time(10, 0)
+        )
+        VolunteerProfile.objects.filter(pk=self.volunteer.pk).update(active_visit_count=7)
+
+        call_command('reconcile_workload', stdout=StringIO())
+
+        self.assertEqual(self.count(), 1)
+
+
+class MatchingJobTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='mother5', role='mother')
+        self.mother = MotherProfile.objects.create(user=self.user, risk_level='High')
+        user = CustomUser.objects.create(username='vol_job', role='volunteer')
+        self.volunteer = VolunteerProfile.objects.create(user=user)
+        Availability.objects.create(volunteer=self.volunteer, day='Monday', time_slot='9-17')
+        CustomUser.objects.create(username='admin_job', role='admin')
+
+    def request_visit(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('request_visit'), {'date': '2025-12-15', 'time': '10:30'})
+        return Visit.objects.get()
+
+    def test_request_visit_only_enqueues(self):
+        visit = self.request_visit()
+        self.assertEqual(visit.status, 'Pending')
+        self.assertIsNone(visit.suggested_volunteer)
+        self.assertEqual(MatchingJob.objects.filter(visit=visit, status='Queued').count(), 1)
+
+        call_command('run_matching_worker', '--once', stdout=StringIO())
+
+        visit.refresh_from_db()
+        self.assertEqual(visit.status, 'Awaiting Approval')
+        self.assertEqual(visit.suggested_volunteer, self.volunteer)
+        self.assertEqual(MatchingJob.objects.get().status, 'Done')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_job_is_claimed_by_one_worker(self):
+        self.request_visit()
+        self.assertIsNotNone(claim_next_job('worker-a'))
+        self.assertIsNone(claim_next_job('worker-b'))
+
+    def test_failed_job_is_retried_with_backoff(self):
+        self.request_visit()
+        job = claim_next_job('worker-a')
+        with mock.patch('visits.jobs.suggest_volunteer', side_effect=RuntimeError('boom')):
+            run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Queued')
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim_next_job('worker-a'))
+
+
+class NotificationFanOutTest(TestCase):
+    def setUp(self):
+        self.admins = [
+            CustomUser.objects.create(username=f'admin_fan{i}', role='admin') for i in range(5)
+        ]
+
+    def test_notify_users_is_one_insert(self):
+        with self.assertNumQueries(1):
+            notify_users(self.admins, "Hello")
+        self.assertEqual(Notification.objects.filter(user__role='admin').count(), 5)
+
+    def test_broadcast_is_stored_once_with_per_user_reads(self):
+        with self.assertNumQueries(1):
+            note = broadcast('admin', "Suggested: vol for Visit #1.")
+
+        first, second = self.admins[:2]
+        self.assertIn(note, unread_for(first))
+        mark_broadcasts_read(first, [note])
+        self.assertNotIn(note, unread_for(first))
+        self.assertIn(note, unread_for(second))
+
+        mother = CustomUser.objects.create(username='mother_fan', role='mother')
+        self.assertNotIn(note, unread_for(mother))
+
+
+class NotificationInboxTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username='admin_inbox', role='admin')
+        self.client.force_login(self.user)
+
+    def test_unread_count_is_cached_and_invalidated(self):
+        notify_users([self.user], "one")
+        self.assertEqual(unread_count(self.user), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user), 1)
+
+        broadcast('admin', "two")
+        self.assertEqual(unread_count(self.user), 2)
+
+    def test_inbox_is_capped_to_most_recent(self):
+        notify_users([self.user] * (INBOX_SIZE + 5), "note")
+        notes = inbox(self.user)
+        self.assertEqual(len(notes), INBOX_SIZE)
+        self.assertEqual(notes[0].pk, Notification.objects.latest('id').pk)
+
+    def test_mark_all_read(self):
+        notify_users([self.user] * 3, "direct")
+        broadcast('admin', "broadcast")
+        self.assertEqual(unread_count(self.user), 4)
+
+        response = self.client.post(reverse('mark_notifications_read'))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(unread_count(self.user), 0)
+        self.assertFalse(Notification.objects.filter(user=self.user, is_read=False).exists())
+
+
+class SeedAndBenchCommandTest(TestCase):
+    def test_seed_then_bench(self):
+        call_command(
+            'seed_load', mothers=20, volunteers=10, admins=2, years=1,
+            prefix='t', stdout=StringIO()
+        )
+        self.assertEqual(CustomUser.objects.filter(username__startswith='t_').count(), 32)
+        self.assertTrue(Visit.objects.exists())
+        self.assertFalse(
+            Visit.objects.filter(date__lt=date.today())
+            .exclude(status__in=('Completed', 'Cancelled')).exists()
+        )
+        self.assertFalse(Visit.objects.filter(
+            volunteer__isnull=False, status__in=('Pending', 'Awaiting Approval')
+        ).exists())
+        self.assertFalse(Availability.objects.filter(weekday__isnull=True).exists())
+        self.assertEqual(recount_workload(commit=False), [])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bench.json')
+            call_command('bench', iterations=2, output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)['results']
+
+        self.assertIn('dashboard_admin', results)
+        self.assertGreater(results['dashboard_admin']['queries'], 0)
+
+
+def volunteer_names(request):
+    """A deliberate N+1 (one user query per volunteer) to profile."""
+    return HttpResponse(', '.join(v.user.username for v in VolunteerProfile.objects.all()))
+
+
+urlpatterns = [path('volunteer-names/', volunteer_names, name='volunteer_names')]
+
+
+@override_settings(ROOT_URLCONF='visits.tests')
+class QueryProfileMiddlewareTest(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create(username='admin_sql', role='admin')
+        for i in range(6):
+            VolunteerProfile.objects.create(
+                user=CustomUser.objects.create(username=f'vol_sql_{i}', role='volunteer')
+            )
+        self.client.force_login(self.admin)
+        self.url = reverse('volunteer_names')
+
+    def test_disabled_by_default(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_profiles_request_and_reports_repeated_queries(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        log = os.path.join(tmp.name, 'sql.log')
+        self.addCleanup(self.close_profile_log)
+
+        with override_settings(SQL_PROFILE=True, SQL_PROFILE_LOG=log):
+            with self.assertLogs('perinatal_support_scheduler.sql', 'WARNING'):
+                response = self.client.get(self.url)
+
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('n-plus-one', timing)
+
+        with open(log) as f:
+            entry = json.loads(f.readline())
+        self.assertEqual(entry['view'], 'volunteer_names')
+        self.assertGreaterEqual(entry['repeated'][0]['count'], 6)
+
+        out = StringIO()
+        call_command('sql_report', log=log, stdout=out)
+        self.assertIn('volunteer_names', out.getvalue())
+        self.assertIn('N+1:', out.getvalue())
+
+    def test_query_shape(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+    @staticmethod
+    def close_profile_log():
+        for handler in list(profile_log.handlers):
+            profile_log.removeHandler(handler)
+            handler.close()
+
+
+class AssignVisitTest(TestCase):
+    def setUp(self):
+        user = CustomUser.objects.create(username='mother_assign', role='mother')
+        self.mother = MotherProfile.objects.create(user=user)
+        self.volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_assign', role='volunteer'),
+            service_limit=1,
+        )
+        self.visit = Visit.objects.create(
+            mother=self.mother, date=date(2026, 1, 5), time=time(10, 0),
+            status='Awaiting Approval', suggested_volunteer=self.volunteer,
+        )
+
+    def test_choose_volunteer_queries_do_not_grow(self):
+        self.client.force_login(CustomUser.objects.create(username='admin_choose', role='admin'))
+        url = reverse('choose_volunteer', args=[self.visit.id])
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for i in range(3):
+            VolunteerProfile.objects.create(
+                user=CustomUser.objects.create(username=f'vol_choose_{i}', role='volunteer')
+            )
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertContains(response, 'vol_choose_2')
+        self.assertEqual(len(after), len(before))
+
+    def test_assign_claims_capacity(self):
+        assign_visit(self.visit, self.volunteer)
+        self.visit.refresh_from_db()
+        self.volunteer.refresh_from_db()
+        self.assertEqual(self.visit.status, 'Scheduled')
+        self.assertEqual(self.visit.volunteer, self.volunteer)
+        self.assertEqual(self.volunteer.active_visit_count, 1)
+
+        other = Visit.objects.create(mother=self.mother, date=date(2026, 1, 6), time=time(10, 0))
+        with self.assertRaises(VolunteerAtCapacity):
+            assign_visit(other, self.volunteer)
+        other.refresh_from_db()
+        self.assertIsNone(other.volunteer)
+
+    def test_reassign_releases_previous_volunteer(self):
+        assign_visit(self.visit, self.volunteer)
+        second = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_assign_2', role='volunteer')
+        )
+        assign_visit(self.visit, second)
+        self.assertEqual(recount_workload(commit=False), [])
+        self.assertEqual(VolunteerProfile.objects.get(pk=second.pk).active_visit_count, 1)
+
+    def test_closed_visit_is_not_assignable(self):
+        Visit.objects.filter(pk=self.visit.pk).update(status='Cancelled')
+        with self.assertRaises(VisitNotAssignable):
+            assign_visit(self.visit, self.volunteer)
+        self.assertEqual(VolunteerProfile.objects.get(pk=self.volunteer.pk).active_visit_count, 0)
+
+    def test_approve_view(self):
+        self.client.force_login(CustomUser.objects.create(username='admin_assign', role='admin'))
+        response = self.client.get(reverse('approve_suggested_volunteer', args=[self.visit.id]))
+        self.assertEqual(response.status_code, 302)
+        self.visit.refresh_from_db()
+        self.assertEqual(self.visit.status, 'Scheduled')
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class ApproveSuggestionsTest(TestCase):
+    def setUp(self):
+        self.mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_bulk', role='mother')
+        )
+        self.busy = self.add_volunteer('vol_bulk_busy', service_limit=2)
+        self.free = self.add_volunteer('vol_bulk_free', service_limit=5)
+        self.admin = CustomUser.objects.create(username='admin_bulk', role='admin')
+
+    def add_volunteer(self, username, service_limit):
+        return VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username=username, role='volunteer'),
+            service_limit=service_limit,
+        )
+
+    def add_visit(self, volunteer, day, priority='Low', status='Awaiting Approval'):
+        return Visit.objects.create(
+            mother=self.mother, date=date(2026, 1, day), time=time(10, 0),
+            priority=priority, status=status, suggested_volunteer=volunteer,
+        )
+
+    def test_capacity_checked_per_volunteer(self):
+        low = [self.add_visit(self.busy, day) for day in (5, 6)]
+        high = self.add_visit(self.busy, 7, priority='High')
+        other = self.add_visit(self.free, 8)
+        pending = self.add_visit(None, 9, status='Pending')
+
+        # load, capacity, bookings, one claim per distinct amount (2),
+        # schedule, refresh bookings (2), notify plus the savepoint pair
+        with self.assertNumQueries(11):
+            result = approve_suggestions()
+
+        self.assertEqual(result['approved'], sorted([high.id, low[0].id, other.id]))
+        self.assertEqual([vid for vid, _ in result['skipped']], [low[1].id])
+        self.assertIn('service limit', result['skipped'][0][1])
+        self.assertEqual(Visit.objects.get(pk=pending.pk).status, 'Pending')
+        self.assertEqual(recount_workload(commit=False), [])
+        self.assertEqual(Notification.objects.count(), 6)
+
+    def test_selected_visits_only(self):
+        first, second = self.add_visit(self.free, 5), self.add_visit(self.free, 6)
+        cancelled = self.add_visit(self.free, 7, status='Cancelled')
+
+        result = approve_suggestions([first.id, cancelled.id])
+
+        self.assertEqual(result['approved'], [first.id])
+        self.assertEqual([vid for vid, _ in result['skipped']], [cancelled.id])
+        self.assertEqual(Visit.objects.get(pk=second.pk).status, 'Awaiting Approval')
+
+    def test_dashboard_form(self):
+        visits = [self.add_visit(self.busy, day) for day in (5, 6, 7)]
+        self.client.force_login(self.admin)
+
+        response = self.client.post(
+            reverse('approve_suggestions'), {'scope': 'all'}, follow=True
+        )
+
+        text = [str(m) for m in response.context['messages']]
+        self.assertIn("Approved 2 suggested volunteer(s).", text)
+        self.assertTrue(any(f"Visit #{visits[2].id}" in m for m in text))
+
+
+class DoubleBookingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_book', role='mother')
+        )
+        self.volunteer = self.add_volunteer('vol_book_a')
+        # 2027-12-13 is a Monday (upcoming, for the conflict report)
+        self.day = date(2027, 12, 13)
+        self.booked = self.add_visit(time(10, 0), volunteer=self.volunteer, status='Scheduled')
+
+    def add_volunteer(self, username):
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username=username, role='volunteer'), service_limit=5,
+        )
+        Availability.objects.create(volunteer=volunteer, day='Monday', time_slot='8:00-18:00')
+        return volunteer
+
+    def add_visit(self, at, **fields):
+        return Visit.objects.create(mother=self.mother, date=self.day, time=at, **fields)
+
+    def slots(self):
+        return booked_slots([(self.volunteer.pk, self.day)]).get((self.volunteer.pk, self.day), 0)
+
+    def test_visit_mask(self):
+        self.assertEqual(visit_mask(time(0, 0)), 0b1111)
+        self.assertEqual(visit_mask(time(10, 30)), 0b1111 << 42)
+        self.assertEqual(visit_mask(time(23, 30)), 0b11 << 94)
+
+    def test_slots_follow_visit_changes(self):
+        self.assertEqual(self.slots(), visit_mask(time(10, 0)))
+        later = self.add_visit(time(14, 0), volunteer=self.volunteer, status='Scheduled')
+        self.assertEqual(self.slots(), visit_mask(time(10, 0)) | visit_mask(time(14, 0)))
+
+        self.booked.status = 'Cancelled'
+        self.booked.save()
+        self.assertEqual(self.slots(), visit_mask(time(14, 0)))
+        later.delete()
+        self.assertEqual(self.slots(), 0)
+
+    def test_assign_refuses_overlap(self):
+        overlapping = self.add_visit(time(10, 30))
+        with self.assertRaises(VolunteerDoubleBooked):
+            assign_visit(overlapping, self.volunteer)
+        self.assertEqual(VolunteerProfile.objects.get(pk=self.volunteer.pk).active_visit_count, 1)
+
+        assign_visit(self.add_visit(time(11, 0)), self.volunteer)
+        self.assertEqual(self.slots(), visit_mask(time(10, 0)) | visit_mask(time(11, 0)))
+
+    def test_reassign_moves_booking(self):
+        other = self.add_volunteer('vol_book_b')
+        assign_visit(self.booked, other)
+        self.assertEqual(self.slots(), 0)
+        self.assertEqual(booked_slots([(other.pk, self.day)]), {(other.pk, self.day): visit_mask(time(10, 0))})
+
+    def test_suggest_skips_booked_volunteer(self):
+        other = self.add_volunteer('vol_book_b')
+        other.service_limit = 1  # scores lower than the booked volunteer
+        other.save()
+        self.assertEqual(suggest_volunteer(self.add_visit(time(10, 45))), other)
+        self.assertEqual(suggest_volunteer(self.add_visit(time(11, 0))), self.volunteer)
+
+    def test_approve_skips_conflicts(self):
+        first = self.add_visit(time(15, 0), suggested_volunteer=self.volunteer, status='Awaiting Approval')
+        clash = self.add_visit(time(15, 30), suggested_volunteer=self.volunteer, status='Awaiting Approval')
+        busy = self.add_visit(time(9, 30), suggested_volunteer=self.volunteer, status='Awaiting Approval')
+
+        result = approve_suggestions()
+
+        self.assertEqual(result['approved'], [first.id])
+        self.assertEqual([vid for vid, _ in result['skipped']], [clash.id, busy.id])
+        self.assertIn('already booked', result['skipped'][0][1])
+
+    def test_conflict_report(self):
+        twin = self.add_visit(time(10, 15), volunteer=self.volunteer, status='Scheduled')
+        suggested = self.add_visit(time(10, 50), suggested_volunteer=self.volunteer, status='Awaiting Approval')
+
+        conflicts = booking_conflicts()
+
+        self.assertEqual(
+            [(c['kind'], c['visits']) for c in conflicts],
+            [('double-booked', [self.booked.id, twin.id]),
+             ('suggestion', [self.booked.id, twin.id, suggested.id])],
+        )
+        self.client.force_login(CustomUser.objects.create(username='admin_book', role='admin'))
+        response = self.client.get(reverse('booking_conflicts'))
+        self.assertContains(response, f'#{twin.id}')
+
+
+class ConcurrentApprovalTest(TransactionTestCase):
+    APPROVERS = 6
+
+    def test_parallel_approvals_respect_service_limit(self):
+        mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_race', role='mother')
+        )
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_race', role='volunteer'),
+            service_limit=2,
+        )
+        visits = [
+            Visit.objects.create(
+                mother=mother, date=date(2026, 1, 5 + i), time=time(10, 0),
+                status='Awaiting Approval', suggested_volunteer=volunteer,
+            )
+            for i in range(self.APPROVERS)
+        ]
+
+        barrier = threading.Barrier(self.APPROVERS)
+        outcomes = []
+
+        def approve(visit):
+            try:
+                barrier.wait()
+                assign_visit(visit, volunteer)
+                outcomes.append('assigned')
+            except VolunteerAtCapacity:
+                outcomes.append('full')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=approve, args=(v,)) for v in visits]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count('assigned'), 2)
+        self.assertEqual(outcomes.count('full'), self.APPROVERS - 2)
+        self.assertEqual(Visit.objects.filter(volunteer=volunteer, status='Scheduled').count(), 2)
+        self.assertEqual(VolunteerProfile.objects.get(pk=volunteer.pk).active_visit_count, 2)
+
+
+class SharedCacheTest(TransactionTestCase):
+    """The web server and run_matching_worker are separate processes; what
+    one invalidates in the cache must reach the other."""
+
+    def setUp(self):
+        cache.clear()
+        self.mother_user = CustomUser.objects.create(username='mother_shared', role='mother')
+        MotherProfile.objects.create(user=self.mother_user, risk_level='Low')
+        self.volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_shared', role='volunteer'),
+        )
+
+    def in_other_process(self, code):
+        script = (
+            "import sys, django\n"
+            "from django.conf import settings\n"
+            "django.setup()\n"
+            "settings.DATABASES['default']['NAME'] = sys.argv[1]\n" + code
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script, str(connection.settings_dict['NAME'])],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'CACHE_DIR': str(settings.CACHES['default']['LOCATION'])},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def request_visit(self, at):
+        self.client.force_login(self.mother_user)
+        self.client.post(reverse('request_visit'), {'date': '2025-12-15', 'time': at})
+        return Visit.objects.latest('id')
+
+    def test_availability_saved_elsewhere_reaches_the_worker_pools(self):
+        first = self.request_visit('10:00')
+        run_job(claim_next_job('worker'))  # caches the (empty) Monday pool here
+        first.refresh_from_db()
+        self.assertIsNone(first.suggested_volunteer)
+
+        self.in_other_process(
+            "from visits.models import Availability\n"
+            f"Availability.objects.create(volunteer_id={self.volunteer.pk}, "
+            "day='Monday', time_slot='9-17')\n"
+        )
+
+        second = self.request_visit('10:15')
+        run_job(claim_next_job('worker'))
+        second.refresh_from_db()
+        self.assertEqual(second.suggested_volunteer, self.volunteer)
+
+    def test_worker_broadcast_reaches_admin_unread_counts(self):
+        admin = CustomUser.objects.create(username='admin_shared', role='admin')
+        self.request_visit('10:00')
+        self.assertEqual(unread_count(admin), 0)  # cached here, in the web process
+
+        self.in_other_process(
+            "from django.core.management import call_command\n"
+            "call_command('run_matching_worker', '--once')\n"
+        )
+
+        self.assertEqual(MatchingJob.objects.get().status, 'Done')
+        self.assertEqual(unread_count(admin), 1)
+
+    def test_worker_job_changes_the_admin_dashboard_fragments(self):
+        Availability.objects.create(volunteer=self.volunteer, day='Monday', time_slot='9-17')
+        visit = self.request_visit('10:00')
+        admin = CustomUser.objects.create(username='admin_shared', role='admin')
+        self.client.force_login(admin)
+        approve_url = reverse('approve_suggested_volunteer', args=[visit.id])
+        before = self.client.get(reverse('dashboard'))  # fragments cached here
+        self.assertContains(before, 'No visits waiting for approval.')
+        self.assertNotContains(before, approve_url)
+
+        self.in_other_process(
+            "from django.core.management import call_command\n"
+            "call_command('run_matching_worker', '--once')\n"
+        )
+
+        after = self.client.get(reverse('dashboard'))
+        self.assertNotContains(after, 'No visits waiting for approval.')
+        self.assertContains(after, approve_url)
+        self.assertContains(after, f'Suggested: vol_shared for Visit #{visit.id}.')
+
+
+class MedicalReportTest(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.owner = self.add_mother('mother_report')
+        self.content = b'scan-' + bytes(range(256)) * 4
+
+    def add_mother(self, username):
+        return MotherProfile.objects.create(
+            user=CustomUser.objects.create(username=username, role='mother')
+        )
+
+    def upload(self, mother, content, name='scan.pdf'):
+        self.client.force_login(mother.user)
+        return self.client.post(
+            reverse('upload_medical_report'), {'file': SimpleUploadedFile(name, content)}
+        )
+
+    def stored_files(self):
+        return [
+            os.path.join(root, f) for root, _, files in os.walk(self.media_root) for f in files
+        ]
+
+    def test_identical_content_is_stored_once(self):
+        self.upload(self.owner, self.content)
+        self.upload(self.owner, self.content, name='again.pdf')
+        self.upload(self.add_mother('mother_report_2'), self.content)
+
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        reports = MedicalReport.objects.order_by('id')
+        self.assertEqual(reports.count(), 2)
+        self.assertEqual({r.sha256 for r in reports}, {sha256})
+        self.assertEqual(reports[0].file.name, f'medical_reports/{sha256[:2]}/{sha256}')
+        self.assertEqual((reports[0].original_name, reports[0].size), ('scan.pdf', len(self.content)))
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_upload_is_hashed_while_streamed_with_csrf_checked(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.owner.user)
+        url = reverse('upload_medical_report')
+        self.assertEqual(
+            client.post(url, {'file': SimpleUploadedFile('scan.pdf', self.content)}).status_code,
+            403,
+        )
+
+        client.get(url)
+        with mock.patch('visits.views.store_report', wraps=store_report) as stored:
+            client.post(url, {
+                'file': SimpleUploadedFile('scan.pdf', self.content),
+                'csrfmiddlewaretoken': client.cookies['csrftoken'].value,
+            })
+        uploaded = stored.call_args.args[1]
+        self.assertEqual(uploaded.sha256, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(MedicalReport.objects.count(), 1)
+
+    @override_settings(MEDICAL_REPORT_MAX_BYTES=100)
+    def test_size_limit(self):
+        response = self.upload(self.owner, self.content)
+        self.assertContains(response, 'at most')
+        self.assertFalse(MedicalReport.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_download_with_ranges(self):
+        self.upload(self.owner, self.content)
+        url = reverse('download_medical_report', args=[MedicalReport.objects.get().id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=5-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[5:10])
+        self.assertEqual(response['Content-Range'], f'bytes 5-9/{len(self.content)}')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_missing_file_is_not_found(self):
+        self.upload(self.owner, self.content)
+        report = MedicalReport.objects.get()
+        os.remove(os.path.join(self.media_root, report.file.name))
+
+        url = reverse('download_medical_report', args=[report.id])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-9').status_code, 404)
+
+    def test_one_report_per_mother_and_content(self):
+        self.upload(self.owner, self.content)
+        report = MedicalReport.objects.get()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MedicalReport.objects.create(mother=self.owner, sha256=report.sha256, file=report.file.name)
+
+        # A report added concurrently after store_report's check is returned
+        with mock.patch.object(MedicalReport.objects, 'filter') as check:
+            check.return_value.first.return_value = None
+            stored, created = store_report(self.owner, SimpleUploadedFile('b.pdf', self.content))
+        self.assertEqual((stored, created), (report, False))
+
+    def test_download_permissions(self):
+        self.upload(self.owner, self.content)
+        url = reverse('download_medical_report', args=[MedicalReport.objects.get().id])
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_report', role='volunteer')
+        )
+
+        self.client.force_login(self.add_mother('mother_report_other').user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(volunteer.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        Visit.objects.create(
+            mother=self.owner, volunteer=volunteer, status='Scheduled',
+            date=date(2026, 1, 5), time=time(10, 0),
+        )
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class VisitStatisticsTest(TestCase):
+    def setUp(self):
+        self.mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_stats', role='mother'), risk_level='High'
+        )
+        self.volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_stats', role='volunteer'), service_limit=5,
+        )
+        self.day = date(2026, 3, 10)
+
+    def add_visit(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Visit.objects.create(
+                mother=self.mother, date=self.day, time=time(10, 0), priority='High', **fields
+            )
+
+    def rollups(self):
+        return (
+            sorted(DailyVisitStats.objects.values_list('date', 'status', 'priority', 'risk_level', 'visits')),
+            sorted(MonthlyVolunteerStats.objects.values_list('month', 'volunteer_id', 'status', 'visits')),
+        )
+
+    def test_transitions_keep_rollups_current(self):
+        first = self.add_visit()
+        second = self.add_visit()
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_visit(first, self.volunteer)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.status = 'Cancelled'
+            second.save()
+
+        self.assertEqual(self.rollups(), (
+            [(self.day, 'Cancelled', 'High', 'High', 1), (self.day, 'Scheduled', 'High', 'High', 1)],
+            [(date(2026, 3, 1), self.volunteer.id, 'Scheduled', 1)],
+        ))
+        incremental = self.rollups()
+        rebuild_stats()
+        self.assertEqual(self.rollups(), incremental)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.rollups(), ([(self.day, 'Cancelled', 'High', 'High', 1)], []))
+
+    def test_statistics(self):
+        visit = self.add_visit()
+        Visit.objects.filter(pk=visit.pk).update(created_at=timezone.now() - timedelta(hours=6))
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_visit(Visit.objects.get(pk=visit.pk), self.volunteer)
+        self.add_visit(status='Cancelled')
+        self.add_visit()
+
+        with self.assertNumQueries(2):
+            stats = visit_statistics(date(2026, 3, 1), date(2026, 3, 31))
+
+        self.assertEqual(stats['visits'], 3)
+        self.assertEqual(stats['by_status'], {'Scheduled': 1, 'Cancelled': 1, 'Pending': 1})
+        self.assertEqual(stats['fill_rate'], 0.5)
+        self.assertAlmostEqual(stats['avg_assignment_hours'], 6, places=1)
+        self.assertEqual([row['total'] for row in stats['top_volunteers']], [1])
+        self.assertEqual(stats['volunteer_months'], (date(2026, 3, 1), date(2026, 3, 1)))
+
+    def test_nightly_command_repairs_drift(self):
+        visit = self.add_visit()
+        Visit.objects.filter(pk=visit.pk).update(status='Completed', volunteer=self.volunteer)
+
+        call_command('rollup_stats', '--from', '2026-03-01', '--to', '2026-03-31', stdout=StringIO())
+
+        self.assertEqual(self.rollups(), (
+            [(self.day, 'Completed', 'High', 'High', 1)],
+            [(date(2026, 3, 1), self.volunteer.id, 'Completed', 1)],
+        ))
+
+    def test_page_reads_rollups_only(self):
+        self.add_visit()
+        self.client.force_login(CustomUser.objects.create(username='admin_stats', role='admin'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('visit_statistics'), {'from': '2026-03-10', 'to': '2026-04-05'}
+            )
+        self.assertContains(response, 'Pending')
+        self.assertContains(response, 'Whole months: March 2026 to April 2026')
+        self.assertFalse([q for q in queries if '"visits_visit"' in q['sql']])
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_export', role='mother')
+        )
+        self.volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_export', role='volunteer')
+        )
+        for day, status in ((5, 'Pending'), (6, 'Scheduled'), (20, 'Scheduled')):
+            Visit.objects.create(
+                mother=self.mother, date=date(2026, 1, day), time=time(10, 0), status=status,
+                volunteer=self.volunteer if status == 'Scheduled' else None,
+            )
+        self.client.force_login(CustomUser.objects.create(username='admin_export', role='admin'))
+
+    def export(self, name, **params):
+        response = self.client.get(reverse('export_data', args=[name]), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_filtered_by_date_and_status(self):
+        response, body = self.export('visits', status='Scheduled', to='2026-01-10')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(body)))
+        self.assertEqual(rows[0][:4], ['id', 'date', 'time', 'status'])
+        self.assertEqual([(r[1], r[3], r[7]) for r in rows[1:]], [('2026-01-06', 'Scheduled', 'vol_export')])
+
+    def test_csv_escapes_formulas(self):
+        self.volunteer.skills = '=HYPERLINK("http://example.com","Doula")'
+        self.volunteer.certifications = '@SUM(A1)'
+        self.volunteer.location = '-2+3'
+        self.volunteer.save()
+        _, body = self.export('volunteers')
+        row = dict(zip(*csv.reader(StringIO(body))))
+        self.assertEqual(row['skills'], '\'=HYPERLINK("http://example.com","Doula")')
+        self.assertEqual(row['certifications'], "'@SUM(A1)")
+        self.assertEqual(row['location'], "'-2+3")
+        self.assertEqual(row['username'], 'vol_export')
+        self.assertEqual(row['service_limit'], '5')
+
+        _, body = self.export('volunteers', format='json')
+        self.assertEqual(json.loads(body)[0]['location'], '-2+3')
+
+    def test_json(self):
+        _, body = self.export('volunteers', format='json')
+        self.assertEqual([row['username'] for row in json.loads(body)], ['vol_export'])
+
+        notify_users([self.mother.user], "Hello")
+        _, body = self.export('notifications', format='json', status='unread')
+        self.assertEqual([row['message'] for row in json.loads(body)], ['Hello'])
+
+    def test_streams_in_blocks(self):
+        with mock.patch('visits.exports.EXPORT_BLOCK_BYTES', 10):
+            response = self.client.get(reverse('export_data', args=['visits']))
+            self.assertGreater(len(list(response.streaming_content)), 3)
+
+    def test_rejects_unknown_status(self):
+        response = self.client.get(reverse('export_data', args=['visits']), {'status': 'Nope'})
+        self.assertEqual(response.status_code, 302)
+
+
+class JsonApiTest(TestCase):
+    def setUp(self):
+        self.mother = MotherProfile.objects.create(
+            user=CustomUser.objects.create(username='mother_api', role='mother')
+        )
+        self.visit = Visit.objects.create(mother=self.mother, date=date(2026, 2, 2), time=time(10, 0))
+        self.admin = CustomUser.objects.create(username='admin_api', role='admin')
+
+    def get(self, name, user, **headers):
+        self.client.force_login(user)
+        return self.client.get(reverse(name), headers=headers)
+
+    def test_unchanged_poll_gets_304_without_loading(self):
+        first = self.get('api_visits', self.mother.user)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([v['id'] for v in first.json()['visits']], [self.visit.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.get('api_visits', self.mother.user, if_none_match=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        self.assertEqual(
+            [q['sql'] for q in queries if '"visits_visit"' in q['sql'] and 'COUNT' not in q['sql']], []
+        )
+
+        self.visit.status = 'Cancelled'
+        self.visit.save()
+        changed = self.get('api_visits', self.mother.user, if_none_match=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_bulk_writes_change_the_version(self):
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_api', role='volunteer')
+        )
+        before = self.get('api_queues', self.admin)
+        self.assertEqual([v['id'] for v in before.json()['pending']], [self.visit.id])
+
+        run_batch_assignment()
+        Availability.objects.create(volunteer=volunteer, day='Monday', time_slot='9:00-11:00')
+        run_batch_assignment()
+        after = self.get('api_queues', self.admin, if_none_match=before['ETag'])
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual([v['id'] for v in after.json()['awaiting_approval']], [self.visit.id])
+
+        approve_suggestions()
+        self.assertEqual(self.get('api_queues', self.admin, if_none_match=after['ETag']).status_code, 200)
+
+    def test_notifications(self):
+        notify_users([self.mother.user], "Hello")
+        first = self.get('api_notifications', self.mother.user)
+        self.assertEqual(first.json()['unread_count'], 1)
+        self.assertEqual(
+            self.get('api_notifications', self.mother.user, if_none_match=first['ETag']).status_code, 304
+        )
+        mark_all_read(self.mother.user)
+        self.assertEqual(
+            self.get('api_notifications', self.mother.user, if_none_match=first['ETag']).status_code, 200
+        )
+
+    def test_access(self):
+        self.assertEqual(self.client.get(reverse('api_visits')).status_code, 401)
+        self.assertEqual(self.get('api_queues', self.mother.user).status_code, 403)
+        self.assertEqual(self.get('api_visits', self.admin).status_code, 403)
+
+
+class VisitSeriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create(username='mother_series', role='mother')
+        self.mother = MotherProfile.objects.create(user=self.user, risk_level='Medium')
+        CustomUser.objects.create(username='admin_series', role='admin')
+
+    def add_volunteer(self, name, limit):
+        volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username=name, role='volunteer'), service_limit=limit,
+        )
+        Availability.objects.create(volunteer=volunteer, day='Monday', time_slot='9-17')
+        return volunteer
+
+    def make_series(self, count=4):
+        # 2030-01-02 is a Wednesday: the first Monday is 2030-01-07
+        series = VisitSeries(
+            mother=self.mother, weekday=0, time=time(10, 0), start_date=date(2030, 1, 2), count=count,
+        )
+        return series, create_series(series)
+
+    def run_jobs(self):
+        call_command('run_matching_worker', '--once', stdout=StringIO())
+
+    def test_occurrences_created_in_one_insert_with_one_job(self):
+        with CaptureQueriesContext(connection) as queries:
+            series, visits = self.make_series()
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "visits_visit"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            [v.date for v in series.visits.order_by('date')],
+            [date(2030, 1, 7), date(2030, 1, 14), date(2030, 1, 21), date(2030, 1, 28)],
+        )
+        self.assertEqual({v.priority for v in visits}, {'Medium'})
+        self.assertEqual(MatchingJob.objects.get().series, series)
+
+    def test_end_date_bounds_the_series(self):
+        series = VisitSeries(weekday=0, start_date=date(2030, 1, 2), end_date=date(2030, 1, 21))
+        self.assertEqual(series.dates(), [date(2030, 1, 7), date(2030, 1, 14), date(2030, 1, 21)])
+
+    def test_one_volunteer_with_capacity_takes_the_whole_series(self):
+        self.add_volunteer('vol_small', limit=2)
+        big = self.add_volunteer('vol_big', limit=10)
+        series, _ = self.make_series()
+        self.run_jobs()
+
+        self.assertEqual(
+            set(series.visits.values_list('status', 'suggested_volunteer')),
+            {('Awaiting Approval', big.pk)},
+        )
+        self.assertEqual(MatchingJob.objects.get().status, 'Done')
+
+    def test_volunteer_booked_on_one_date_is_not_chosen(self):
+        busy = self.add_volunteer('vol_busy', limit=10)
+        free = self.add_volunteer('vol_free', limit=5)
+        other = Visit.objects.create(mother=self.mother, date=date(2030, 1, 21), time=time(10, 30))
+        assign_visit(other, busy)
+        series, _ = self.make_series()
+        self.run_jobs()
+
+        self.assertEqual(set(series.visits.values_list('suggested_volunteer', flat=True)), {free.pk})
+
+    def test_series_is_shared_out_when_nobody_can_take_it_all(self):
+        self.add_volunteer('vol_a', limit=2)
+        self.add_volunteer('vol_b', limit=2)
+        series, _ = self.make_series()
+        self.run_jobs()
+
+        suggested = list(series.visits.values_list('suggested_volunteer', flat=True))
+        self.assertNotIn(None, suggested)
+        self.assertEqual(len(set(suggested)), 2)
+
+    def test_mother_requests_series(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('request_visit_series'), {
+            'weekday': 0, 'time': '10:00', 'start_date': '2030-01-02', 'end_date': '2030-02-28',
+        })
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(Visit.objects.filter(series__mother=self.mother).count(), 8)
+
+    def test_series_needs_an_end(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('request_visit_series'), {
+            'weekday': 0, 'time': '10:00', 'start_date': '2030-01-02',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(VisitSeries.objects.exists())
+
+
+class PriorityQueueAndSlaTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mothers = {
+            risk: MotherProfile.objects.create(
+                user=CustomUser.objects.create(username=f'mother_sla_{risk}', role='mother'),
+                risk_level=risk,
+            )
+            for risk in ('Low', 'High')
+        }
+        self.volunteer = VolunteerProfile.objects.create(
+            user=CustomUser.objects.create(username='vol_sla', role='volunteer'), service_limit=1,
+        )
+        Availability.objects.create(volunteer=self.volunteer, day='Monday', time_slot='9-17')
+        CustomUser.objects.create(username='admin_sla', role='admin')
+
+    def request_visit(self, risk, day):
+        self.client.force_login(self.mothers[risk].user)
+        self.client.post(reverse('request_visit'), {'date': day, 'time': '10:00'})
+        return Visit.objects.latest('id')
+
+    def test_high_priority_job_claimed_first(self):
+        low = self.request_visit('Low', '2030-01-07')
+        high = self.request_visit('High', '2030-01-14')
+        self.assertEqual(high.priority_rank, 0)
+
+        job = claim_next_job('worker-a')
+        self.assertEqual(job.visit_id, high.id)
+        run_job(job)
+        self.assertEqual(claim_next_job('worker-a').visit_id, low.id)
+
+        high.refresh_from_db()
+        self.assertEqual(high.suggested_volunteer, self.volunteer)
+        self.assertIsNotNone(high.suggested_at)
+
+    def test_expired_lock_competes_on_priority(self):
+        self.request_visit('Low', '2030-01-07')
+        high = self.request_visit('High', '2030-01-14')
+        MatchingJob.objects.filter(visit=high).update(
+            status='Running', locked_by='dead-worker',
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+        job = claim_next_job('worker-a')
+        self.assertEqual((job.visit_id, job.locked_by), (high.id, 'worker-a'))
+
+    def test_admin_queue_lists_high_priority_first(self):
+        low = self.request_visit('Low', '2030-01-07')
+        high = self.request_visit('High', '2030-01-14')
+        self.client.force_login(CustomUser.objects.get(username='admin_sla'))
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual([v.id for v in response.context['pending_visits']], [high.id, low.id])
+
+    def test_batch_run_records_suggested_at(self):
+        visit = self.request_visit('High', '2030-01-07')
+        run_batch_assignment()
+        visit.refresh_from_db()
+        self.assertEqual(visit.status, 'Awaiting Approval')
+        self.assertIsNotNone(visit.suggested_at)
+
+    def test_sla_report_percentiles_and_breaches(self):
+        now = timezone.now()
+        requested = now - timedelta(days=10)
+        for hours in (1, 2, 3, 4, 30):
+            Visit.objects.create(
+                mother=self.mothers['High'], date=date(2030, 1, 7), time=time(10, 0),
+                priority='High', status='Scheduled',
+            )
+            Visit.objects.filter(pk=Visit.objects.latest('id').pk).update(
+                created_at=requested, suggested_at=requested + timedelta(minutes=30),
+                assigned_at=requested + timedelta(hours=hours),
+            )
+        overdue = Visit.objects.create(
+            mother=self.mothers['High'], date=date(2030, 1, 7), time=time(11, 0), priority='High',
+        )
+        Visit.objects.filter(pk=overdue.pk).update(created_at=requested)
+
+        (row,) = sla_report(requested.date(), now.date(), now=now)
+        self.assertEqual(row['priority'], 'High')
+        self.assertEqual(row['requests'], 6)
+        self.assertEqual(row['assigned'], 5)
+        self.assertAlmostEqual(row['assignment_p50'], 3)
+        self.assertAlmostEqual(row['assignment_p95'], 30)
+        self.assertAlmostEqual(row['suggestion_p95'], 0.5)
+        self.assertEqual(row['breached'], 1)
+        self.assertEqual(row['overdue'], 1)
+
+        self.client.force_login(CustomUser.objects.get(username='admin_sla'))
+        response = self.client.get(reverse('matching_sla'), {'from': requested.date().isoformat()})
+        self.assertContains(response, '<strong>1</strong> of 5', html=False)
+
+    def test_percentile_nearest_rank(self):
+        self.assertIsNone(percentile([], 95))
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
@@ -0,0 +1,86 @@
+# visits/timeslots.py
+"""
+Parsing helpers for volunteer availability.
+
+Exports:
+    parse_weekday(text) -> int | None        (Monday = 0 ... Sunday = 6)
+    parse_time(text) -> int | None           (minutes after midnight)
+    parse_time_slot(text) -> (start, end) | None
+    minute_of_day(t) -> int
+
+Accepted time slot formats (case-insensitive):
+    ''                      -> whole day (0, 1440)
+    '9:00-11:00', '9-11'    -> (540, 660)
+    '9am to 1:30pm'         -> (540, 810)
+    '10:00'                 -> one hour starting at 10:00 (600, 660)
+An end before the start is read as afternoon when that makes sense
+('9:30 to 5:30' -> 9:30-17:30); otherwise (e.g. '22:00-02:00') the slot runs
+to midnight.
+Anything else is unparseable and returns None.
+"""
+
+import re
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_SLOT_MINUTES = 60
+
+_TIME_RE = re.compile(r'^(\d{1,2})(?:[:.](\d{2}))?(?::\d{2})?\s*([ap]\.?m\.?)?$')
+_RANGE_RE = re.compile(r'\s*(?:-|–|—|\bto\b)\s*')
+
+
+def parse_weekday(text):
+    """Return 0-6 for a weekday name or 3+ letter abbreviation, else None."""
+    word = (text or '').strip().lower().rstrip('.')
+    if len(word) < 3:
+        return None
+    for index, name in enumerate(WEEKDAYS):
+        if name.startswith(word):
+            return index
+    return None
+
+
+def parse_time(text):
+    """Return minutes after midnight for '9', '09:30', '2:30 pm', '14:00:00'."""
+    match = _TIME_RE.match((text or '').strip().lower())
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.startswith('p') else 0)
+    if hour > 24 or minute > 59 or (hour == 24 and minute):
+        return None
+    return hour * 60 + minute
+
+
+def parse_time_slot(text):
+    """Return (start_minute, end_minute) for a free-text slot, or None."""
+    text = (text or '').strip().lower()
+    if not text:
+        return 0, MINUTES_PER_DAY
+
+    parts = _RANGE_RE.split(text)
+    if len(parts) == 1:
+        start = parse_time(parts[0])
+        if start is None or start >= MINUTES_PER_DAY:
+            return None
+        return start, min(start + DEFAULT_SLOT_MINUTES, MINUTES_PER_DAY)
+
+    if len(parts) != 2:
+        return None
+    start, end = parse_time(parts[0]), parse_time(parts[1])
+    if start is None or end is None or start >= MINUTES_PER_DAY:
+        return None
+    if end <= start and end < 12 * 60 and end + 12 * 60 > start:
+        end += 12 * 60    # '9:30 to 5:30' means 5:30 pm
+    if end <= start:
+        end = MINUTES_PER_DAY
+    return start, end
+
+
+def minute_of_day(t):
+    """Return minutes after midnight for a datetime.time."""
+    return t.hour * 60 + t.minute
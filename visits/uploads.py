@@ -0,0 +1,47 @@
+# visits/uploads.py
+"""
+Streaming upload handler for medical reports.
+
+Exports:
+    HashingUploadHandler
+
+Behavior:
+ - Installed for one request by visits.views.upload_medical_report; every
+   other upload keeps Django's default handlers.
+ - Every chunk (FILE_UPLOAD_CHUNK_BYTES) is written straight to a temporary
+   file on disk and fed to a SHA-256 digest, so memory per upload stays at
+   one chunk whatever the file size, and the content hash is known when the
+   upload completes without reading the file again.
+ - The finished file carries .sha256 (hex digest) and .exceeds_limit.
+ - Past settings.MEDICAL_REPORT_MAX_BYTES the rest of the file is read but
+   discarded; .exceeds_limit is set and the form rejects the file.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+FILE_UPLOAD_CHUNK_BYTES = 256 * 1024
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    chunk_size = FILE_UPLOAD_CHUNK_BYTES
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MEDICAL_REPORT_MAX_BYTES:
+            return None
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.digest.hexdigest()
+        uploaded.exceeds_limit = self.received > settings.MEDICAL_REPORT_MAX_BYTES
+        return uploaded
@@ -7,6 +7,7 @@ urlpatterns = [
     # Mother actions
     # -----------------------------------------------------
     path('request/', views.request_visit, name='request_visit'),
+    path('request-series/', views.request_visit_series, name='request_visit_series'),
     path('upload-report/', views.upload_medical_report, name='upload_medical_report'),
     path('cancel/<int:visit_id>/', views.cancel_visit, name='cancel_visit'),
     path('reschedule/<int:visit_id>/', views.reschedule_visit, name='reschedule_visit'),
@@ -17,6 +18,12 @@ urlpatterns = [
     path('availability/', views.submit_availability, name='submit_availability'),
     path('complete/<int:visit_id>/', views.mark_visit_completed, name='mark_visit_completed'),
 
+    # -----------------------------------------------------
+    # All roles
+    # -----------------------------------------------------
+    path('notifications/mark-read/', views.mark_notifications_read, name='mark_notifications_read'),
+    path('reports/<int:report_id>/', views.download_medical_report, name='download_medical_report'),
+
     # -----------------------------------------------------
     # Admin actions
     # -----------------------------------------------------
@@ -40,4 +47,22 @@ urlpatterns = [
         views.assign_volunteer,
         name='assign_volunteer'
     ),
+
+    # 4. Suggest volunteers for every open visit at once
+    path('batch-assign/', views.batch_assign_visits, name='batch_assign_visits'),
+
+    # 5. Approve many suggested volunteers at once
+    path('approve-suggestions/', views.approve_suggestions_bulk, name='approve_suggestions'),
+
+    # 6. Upcoming double bookings
+    path('booking-conflicts/', views.booking_conflict_report, name='booking_conflicts'),
+
+    # 7. Visit statistics
+    path('statistics/', views.statistics_report, name='visit_statistics'),
+
+    # 8. CSV / JSON exports (visits, volunteers, notifications)
+    path('export/<str:name>/', views.export_data, name='export_data'),
+
+    # 9. Time to suggestion / assignment per priority (p50 / p95)
+    path('sla/', views.matching_sla_report, name='matching_sla'),
 ]
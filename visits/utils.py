@@ -1,127 +1,215 @@
 # visits/utils.py
 """
-Volunteer suggestion utility (Option B — no distance).
+Volunteer suggestion utility.
 
 Exports:
     suggest_volunteer(visit) -> VolunteerProfile | None
+    suggest_series_volunteer(visits) -> VolunteerProfile | None
+    score_candidate(volunteer, active_count, mother_risk, time_match,
+                    distance_km=None) -> int
 
 Behavior:
- - Finds volunteers who declared availability on the visit weekday.
- - Excludes volunteers who reached their service_limit.
+ - Finds volunteers who declared availability on the visit weekday
+   (using the parsed Availability.weekday / start_minute / end_minute,
+   cached per weekday and time bucket by visits.candidates).
+ - When the mother's location is geocoded, only the NEAREST_K closest
+   geocoded volunteers with capacity are considered; everyone available
+   that weekday is the fallback (and the pool for mothers with no known
+   location).
+ - Excludes volunteers who reached their service_limit and those already
+   booked at the visit time (visits.bookings slot map, read in the same
+   query as the workload).
  - Scores candidates by:
      * workload (fewer assigned visits => higher score)
      * remaining capacity (more remaining => higher score)
-     * risk compatibility (skills give bonus for Medium/High risk)
+     * risk compatibility (skill flags give bonus for Medium/High risk)
+     * proximity (closer => higher score, when the distance is known)
+ - For Medium/High risk mothers, only volunteers with a matching skill
+   (accounts.skills.RISK_SKILLS) are considered when any has capacity.
  - Returns the single best VolunteerProfile or None if no candidate.
+ - suggest_series_volunteer() scores the visits of a series (same weekday,
+   time and mother) once, as a whole: only volunteers with room for all of
+   them and booked at none of them compete.
+ - Runs a fixed number of queries regardless of the volunteer pool size.
 """
 
-from datetime import datetime
-from django.db.models import Count
-from .models import Availability, Visit
+from django.db import router
+from django.db.models import F, OuterRef, Subquery
+from .bookings import slots_from_bytes, visit_mask
+from .candidates import NEAREST_K, candidate_pool, nearby_candidates
+from .models import VolunteerBooking
+from .timeslots import minute_of_day
 from accounts.models import VolunteerProfile
-
-def _weekday_from_date(d):
-    """Return weekday name (e.g., 'Monday') for a date object."""
-    return d.strftime('%A')
-
-def _normalize_time_str(t):
-    """Return a short time string for comparison like '10:00' from time/time-string."""
-    if t is None:
-        return ''
-    if isinstance(t, str):
-        # assume already 'HH:MM' or 'HH:MM:SS'
-        return t[:5]
-    # assume datetime.time
-    return t.strftime('%H:%M')
+from accounts.skills import RISK_SKILLS, flag_values_matching
+
+def score_candidate(volunteer, active_count, mother_risk, time_match, distance_km=None):
+    """Score one candidate volunteer for a visit; higher is better."""
+    service_limit = volunteer.service_limit or 0
+    score = 0
+
+    # workload: fewer assigned visits => higher score
+    score += max(0, 50 - (active_count * 5))
+
+    # remaining capacity bonus
+    remaining = service_limit - active_count
+    score += remaining * 3
+
+    # risk-level compatibility (accounts.skills flags)
+    skill_flags = volunteer.skill_flags
+
+    # if mother high risk and volunteer has relevant skills -> boost
+    if mother_risk == 'high':
+        if skill_flags & RISK_SKILLS['high']:
+            score += 25
+    elif mother_risk == 'medium':
+        if skill_flags & RISK_SKILLS['medium']:
+            score += 10
+
+    # proximity: up to +20, one point less per 5 km
+    if distance_km is not None:
+        score += max(0, 20 - int(distance_km // 5))
+
+    if time_match:
+        score += 8
+    else:
+        score -= 5  # small penalty if no precise time match
+
+    # tie-breaker: prefer lower id (stable)
+    score += (1000 - (volunteer.id % 100))
+    return score
+
+def _candidate_profile(candidate, active_count):
+    """A VolunteerProfile holding only the fields scoring and assignment use."""
+    values = candidate._asdict()
+    values['active_visit_count'] = active_count
+    names = [f.attname for f in VolunteerProfile._meta.concrete_fields if f.attname in values]
+    return VolunteerProfile.from_db(
+        router.db_for_read(VolunteerProfile), names, [values[n] for n in names]
+    )
+
+def _with_capacity(pool, mother_risk, visit):
+    """
+    {volunteer_id: active_visit_count} for pool members below their
+    service_limit (live) and not booked at the visit time. For High and
+    Medium risk only volunteers with a matching skill count, unless none of
+    them is left.
+    """
+    booked = VolunteerBooking.objects.filter(volunteer=OuterRef('pk'), date=visit.date)
+    with_capacity = VolunteerProfile.objects.filter(
+        id__in=[c.id for _, c in pool], active_visit_count__lt=F('service_limit')
+    ).annotate(booked=Subquery(booked.values('slots')[:1]))
+    mask = visit_mask(visit.time)
+
+    def free(queryset):
+        return {
+            vid: active
+            for vid, active, slots in queryset.values_list('id', 'active_visit_count', 'booked')
+            if not slots_from_bytes(slots) & mask
+        }
+
+    required = RISK_SKILLS.get(mother_risk)
+    if required:
+        active = free(with_capacity.filter(skill_flags__in=flag_values_matching(required)))
+        if active:
+            return active
+    return free(with_capacity)
+
+def _series_capacity(pool, mother_risk, visits):
+    """
+    {volunteer_id: active_visit_count} for pool members with room for every
+    visit of the series and booked at none of them; skills as _with_capacity.
+    """
+    candidates = {c.id: c for _, c in pool}
+    with_capacity = list(
+        VolunteerProfile.objects
+        .filter(id__in=candidates, active_visit_count__lte=F('service_limit') - len(visits))
+        .values_list('id', 'active_visit_count')
+    )
+    if not with_capacity:
+        return {}
+    mask = visit_mask(visits[0].time)
+    busy = {
+        vid
+        for vid, slots in VolunteerBooking.objects.filter(
+            volunteer_id__in=[vid for vid, _ in with_capacity], date__in={v.date for v in visits}
+        ).values_list('volunteer_id', 'slots')
+        if slots_from_bytes(slots) & mask
+    }
+    free = {vid: active for vid, active in with_capacity if vid not in busy}
+
+    required = RISK_SKILLS.get(mother_risk)
+    if required:
+        skilled = {vid: a for vid, a in free.items() if candidates[vid].skill_flags & required}
+        if skilled:
+            return skilled
+    return free
+
+def _candidate_pools(visit, weekday, minute):
+    """
+    (pool, limit) to try in order: pools of (distance_km or None, Candidate)
+    and how many of their members with capacity compete (None for all).
+    """
+    mother = visit.mother
+    if mother.latitude is not None:
+        nearby = nearby_candidates(weekday, minute, mother.latitude, mother.longitude)
+        if nearby:
+            yield nearby, NEAREST_K
+    yield [(None, c) for c in candidate_pool(weekday, minute)], None
 
 def suggest_volunteer(visit):
     """
-    Suggest the best volunteer for a Visit (no distance).
+    Suggest the best volunteer for a Visit.
     Returns: VolunteerProfile instance or None.
+
+    The candidate pools come from the cache (visits/candidates.py); only the
+    volunteers' active_visit_count is read from the database, one query per
+    pool tried, so the number of queries does not grow with the number of
+    volunteers.
     """
-    # 1) Determine weekday and time for matching
-    weekday = _weekday_from_date(visit.date)
-    visit_time_str = _normalize_time_str(visit.time)
+    return _suggest(visit, lambda pool, risk: _with_capacity(pool, risk, visit))
 
-    # 2) Find volunteer IDs who have availability for that weekday
-    avail_qs = Availability.objects.filter(day__iexact=weekday)
-    volunteer_ids = set(avail_qs.values_list('volunteer_id', flat=True))
+def suggest_series_volunteer(visits):
+    """
+    Suggest one volunteer for all of `visits` (the open visits of a series:
+    same mother, weekday and time). Returns None when nobody has the
+    capacity and the time free for every one of them.
+    """
+    return _suggest(visits[0], lambda pool, risk: _series_capacity(pool, risk, visits))
+
+def _suggest(visit, with_capacity):
+    # 1) Determine weekday, minute of day and risk for matching (read once)
+    weekday = visit.date.weekday()
+    minute = minute_of_day(visit.time)
+    mother_risk = (visit.mother.risk_level or '').lower()
+
+    # 2) Nearest volunteers available that weekday first (if the mother's
+    #    location is known), then everyone available that weekday
+    for pool, limit in _candidate_pools(visit, weekday, minute):
+        if not pool:
+            continue
 
-    if not volunteer_ids:
-        return None
+        # 3) Live workload, skipping anyone at their service_limit or
+        #    already booked at that time
+        active = with_capacity(pool, mother_risk)
+        if not active:
+            continue
 
-    # 3) Load candidate VolunteerProfile objects
-    candidates = VolunteerProfile.objects.filter(id__in=volunteer_ids)
+        # Only the NEAREST_K closest of those with capacity compete; the
+        # fallback pool is not ordered by distance, so all of it does
+        pool = [(km, c) for km, c in pool if c.id in active][:limit]
 
-    scored_candidates = []
+        scored_candidates = []
 
-    for v in candidates:
-        # 4) Compute current assigned (active) visits count
-        # Consider Pending and Scheduled as active load
-        active_count = Visit.objects.filter(
-            volunteer=v,
-            status__in=['Pending', 'Awaiting Approval', 'Scheduled']
-        ).count()
+        for km, c in pool:
+            # small bonus if one of the volunteer's slots covers the visit time
+            time_match = c.is_free_at(minute)
+            score = score_candidate(c, active[c.id], mother_risk, time_match, km)
+            scored_candidates.append((c, score, active[c.id]))
 
-        # 5) Skip volunteers at or above their service limit
-        service_limit = v.service_limit or 0
-        if active_count >= service_limit:
-            continue
+        # 4) Sort by score desc, then active_count asc
+        scored_candidates.sort(key=lambda x: (-x[1], x[2]))
+
+        best, _, active_count = scored_candidates[0]
+        return _candidate_profile(best, active_count)
 
-        # 6) Basic scoring
-        score = 0
-
-        # workload: fewer assigned visits => higher score
-        score += max(0, 50 - (active_count * 5))
-
-        # remaining capacity bonus
-        remaining = service_limit - active_count
-        score += remaining * 3
-
-        # risk-level compatibility
-        mother_risk = (visit.mother.risk_level or '').lower()
-        skills = (v.skills or '').lower()
-
-        # if mother high risk and volunteer has relevant keywords -> boost
-        if mother_risk == 'high':
-            if any(k in skills for k in ('first aid', 'nurse', 'midwife', 'obgyn')):
-                score += 25
-            elif 'first aid' in skills:
-                score += 12
-        elif mother_risk == 'medium':
-            if any(k in skills for k in ('first aid', 'midwife', 'nurse')):
-                score += 10
-
-        # Optional: match time_slot more precisely if Availability.time_slot used consistently
-        # If there's an availability record for this volunteer that includes the visit time_str,
-        # give a small bonus.
-        vol_avails = avail_qs.filter(volunteer=v)
-        time_match = False
-        for a in vol_avails:
-            ts = (a.time_slot or '').strip().lower()
-            if not ts:
-                # if volunteer left time_slot empty, treat as available whole day
-                time_match = True
-                break
-            # simple contains match: '10:00' in '9:00-11:00' or '10:00' == '10:00'
-            if visit_time_str and (visit_time_str in ts or visit_time_str == ts):
-                time_match = True
-                break
-        if time_match:
-            score += 8
-        else:
-            score -= 5  # small penalty if no precise time match
-
-        # tie-breaker: prefer lower id (stable)
-        score += (1000 - (v.id % 100))
-
-        scored_candidates.append((v, score, active_count))
-
-    if not scored_candidates:
-        return None
-
-    # 7) Sort by score desc, then active_count asc
-    scored_candidates.sort(key=lambda x: (-x[1], x[2]))
-
-    best_volunteer = scored_candidates[0][0]
-    return best_volunteer
+    return None
@@ -1,22 +1,36 @@
+from datetime import date, timedelta
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from accounts.models import MotherProfile, VolunteerProfile, CustomUser
-from .models import Visit, Availability, Notification, MedicalReport
-from .forms import VisitRequestForm, AvailabilityForm, MedicalReportForm
-from .utils import suggest_volunteer
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from accounts.models import VolunteerProfile
+from accounts.roles import admin_required, role_required, volunteer_required
+from .models import Visit, Availability, MedicalReport
+from .forms import VisitRequestForm, VisitSeriesForm, AvailabilityForm, MedicalReportForm
+from .assignment import run_batch_assignment
+from .bookings import booking_conflicts
+from .jobs import enqueue_matching
+from .notifications import bulk_notify, mark_all_read, notify
+from .exports import EXPORTS, FORMATS, export_rows, stream_export
+from .reports import can_view_report, report_response, store_report
+from .series import create_series, visit_priority
+from .sla import sla_report
+from .stats import visit_statistics
+from .uploads import HashingUploadHandler
+from .services import (
+    AssignmentError, VolunteerAtCapacity, approve_suggestions, assign_visit,
+)
 
 
 # ======================================================
 #  MOTHER — REQUEST A VISIT
 # ======================================================
-@login_required
+@role_required('mother', message="Only mothers can request visits.")
 def request_visit(request):
-    try:
-        mother = MotherProfile.objects.get(user=request.user)
-    except MotherProfile.DoesNotExist:
-        messages.error(request, "Only mothers can request visits.")
-        return redirect('dashboard')
+    mother = request.profile
 
     if request.method == "POST":
         form = VisitRequestForm(request.POST)
@@ -25,33 +39,13 @@ def request_visit(request):
             visit.mother = mother
 
             # Set priority (risk-based)
-            risk = mother.risk_level
-            visit.priority = "High" if risk == "High" else "Medium" if risk == "Medium" else "Low"
+            visit.priority = visit_priority(mother)
             visit.status = "Pending"
-            visit.save()
-
-            # Auto-suggestion
-            try:
-                suggested = suggest_volunteer(visit)
-            except Exception:
-                suggested = None
 
-            if suggested:
-                visit.suggested_volunteer = suggested
-                visit.status = "Awaiting Approval"
+            # Matching runs in the background (manage.py run_matching_worker)
+            with transaction.atomic():
                 visit.save()
-
-                for admin in CustomUser.objects.filter(role='admin'):
-                    Notification.objects.create(
-                        user=admin,
-                        message=f"Suggested: {suggested.user.username} for Visit #{visit.id}."
-                    )
-            else:
-                for admin in CustomUser.objects.filter(role='admin'):
-                    Notification.objects.create(
-                        user=admin,
-                        message=f"No volunteer found for Visit #{visit.id}. Manual assignment needed."
-                    )
+                enqueue_matching(visit)
 
             messages.success(request, "Visit request submitted.")
             return redirect('dashboard')
@@ -62,17 +56,35 @@ def request_visit(request):
     return render(request, 'visits/request_visit.html', {'form': form})
 
 
+# ======================================================
+#  MOTHER — REQUEST WEEKLY VISITS (one series, matched as a whole)
+# ======================================================
+@role_required('mother', message="Only mothers can request visits.")
+def request_visit_series(request):
+    if request.method == "POST":
+        form = VisitSeriesForm(request.POST)
+        if form.is_valid():
+            series = form.save(commit=False)
+            series.mother = request.profile
+            visits = create_series(series)
+
+            messages.success(request, f"{len(visits)} weekly visits requested.")
+            return redirect('dashboard')
+
+    else:
+        form = VisitSeriesForm()
+
+    return render(request, 'visits/request_visit_series.html', {'form': form})
+
+
 # ======================================================
 #  ADMIN — APPROVE SUGGESTED VOLUNTEER
 # ======================================================
-@login_required
+@admin_required
 def approve_suggested_volunteer(request, visit_id):
-    visit = get_object_or_404(Visit, id=visit_id)
-
-    # Correct role check
-    if not request.user.role == "admin":
-        messages.error(request, "Permission denied.")
-        return redirect('dashboard')
+    visit = get_object_or_404(
+        Visit.objects.select_related('mother__user', 'suggested_volunteer__user'), id=visit_id
+    )
 
     if not visit.suggested_volunteer:
         messages.error(request, "No suggested volunteer exists.")
@@ -80,22 +92,19 @@ def approve_suggested_volunteer(request, visit_id):
 
     volunteer = visit.suggested_volunteer
 
-    if not visit.volunteer_has_capacity(volunteer):
+    try:
+        assign_visit(visit, volunteer)
+    except VolunteerAtCapacity:
         messages.error(request, f"{volunteer.user.username} has reached service limit.")
         return redirect('dashboard')
+    except AssignmentError as exc:
+        messages.error(request, str(exc))
+        return redirect('dashboard')
 
-    visit.volunteer = volunteer
-    visit.status = "Scheduled"
-    visit.save()
-
-    Notification.objects.create(
-        user=visit.mother.user,
-        message=f"Volunteer {volunteer.user.username} assigned to Visit #{visit.id}."
-    )
-    Notification.objects.create(
-        user=volunteer.user,
-        message=f"You have been assigned to Visit #{visit.id}."
-    )
+    bulk_notify([
+        (visit.mother.user, f"Volunteer {volunteer.user.username} assigned to Visit #{visit.id}."),
+        (volunteer.user, f"You have been assigned to Visit #{visit.id}."),
+    ])
 
     messages.success(request, "Suggested volunteer approved.")
     return redirect('dashboard')
@@ -104,32 +113,24 @@ def approve_suggested_volunteer(request, visit_id):
 # ======================================================
 #  ADMIN — MANUAL ASSIGNMENT
 # ======================================================
-@login_required
+@admin_required
 def assign_volunteer(request, visit_id, volunteer_id):
-    visit = get_object_or_404(Visit, id=visit_id)
-
-    if not request.user.role == "admin":
-        messages.error(request, "Permission denied.")
-        return redirect('dashboard')
+    visit = get_object_or_404(Visit.objects.select_related('mother__user'), id=visit_id)
+    volunteer = get_object_or_404(VolunteerProfile.objects.select_related('user'), id=volunteer_id)
 
-    volunteer = get_object_or_404(VolunteerProfile, id=volunteer_id)
-
-    if not visit.volunteer_has_capacity(volunteer):
+    try:
+        assign_visit(visit, volunteer)
+    except VolunteerAtCapacity:
         messages.error(request, f"{volunteer.user.username} reached service limit.")
         return redirect('dashboard')
+    except AssignmentError as exc:
+        messages.error(request, str(exc))
+        return redirect('dashboard')
 
-    visit.volunteer = volunteer
-    visit.status = "Scheduled"
-    visit.save()
-
-    Notification.objects.create(
-        user=volunteer.user,
-        message=f"You have been assigned to Visit #{visit.id}."
-    )
-    Notification.objects.create(
-        user=visit.mother.user,
-        message=f"Volunteer {volunteer.user.username} assigned to Visit #{visit.id}."
-    )
+    bulk_notify([
+        (volunteer.user, f"You have been assigned to Visit #{visit.id}."),
+        (visit.mother.user, f"Volunteer {volunteer.user.username} assigned to Visit #{visit.id}."),
+    ])
 
     messages.success(request, "Volunteer assigned successfully.")
     return redirect('dashboard')
@@ -138,20 +139,10 @@ def assign_volunteer(request, visit_id, volunteer_id):
 # ======================================================
 #  ADMIN — CHOOSE VOLUNTEER SCREEN
 # ======================================================
-@login_required
+@admin_required
 def choose_volunteer(request, visit_id):
-    if not request.user.role == "admin":
-        messages.error(request, "Permission denied.")
-        return redirect('dashboard')
-
-    visit = get_object_or_404(Visit, id=visit_id)
-    volunteers = VolunteerProfile.objects.all()
-
-    for v in volunteers:
-        v.current_workload = Visit.objects.filter(
-            volunteer=v,
-            status__in=["Pending", "Scheduled"]
-        ).count()
+    visit = get_object_or_404(Visit.objects.select_related('mother__user'), id=visit_id)
+    volunteers = VolunteerProfile.objects.select_related('user')
 
     return render(request, 'visits/choose_volunteer.html', {
         'visit': visit,
@@ -160,23 +151,176 @@ def choose_volunteer(request, visit_id):
 
 
 # ======================================================
-#  MOTHER — UPLOAD MEDICAL REPORT
+#  ADMIN — BATCH ASSIGNMENT OF ALL OPEN VISITS
 # ======================================================
-@login_required
-def upload_medical_report(request):
+@admin_required
+def batch_assign_visits(request):
+    if request.method == "POST":
+        result = run_batch_assignment()
+        messages.success(
+            request,
+            f"Batch assignment: {result['suggested']} of {result['visits']} open visits "
+            f"have a suggested volunteer ({result['unmatched']} unmatched)."
+        )
+
+    return redirect('dashboard')
+
+
+# ======================================================
+#  ADMIN — APPROVE MANY SUGGESTED VOLUNTEERS AT ONCE
+# ======================================================
+SKIPPED_SHOWN = 10
+
+
+@admin_required
+def approve_suggestions_bulk(request):
+    if request.method != "POST":
+        return redirect('dashboard')
+
+    visit_ids = None
+    if request.POST.get('scope') != 'all':
+        visit_ids = [int(v) for v in request.POST.getlist('visit_ids') if v.isdigit()]
+        if not visit_ids:
+            messages.error(request, "Select at least one visit to approve.")
+            return redirect('dashboard')
+
     try:
-        mother = MotherProfile.objects.get(user=request.user)
-    except MotherProfile.DoesNotExist:
-        messages.error(request, "Only mothers can upload reports.")
+        result = approve_suggestions(visit_ids)
+    except AssignmentError as exc:
+        messages.error(request, str(exc))
         return redirect('dashboard')
 
+    messages.success(request, f"Approved {len(result['approved'])} suggested volunteer(s).")
+    skipped = result['skipped']
+    if skipped:
+        details = "; ".join(f"Visit #{vid}: {reason}" for vid, reason in skipped[:SKIPPED_SHOWN])
+        if len(skipped) > SKIPPED_SHOWN:
+            details += f"; and {len(skipped) - SKIPPED_SHOWN} more"
+        messages.warning(request, f"Skipped {len(skipped)} visit(s). {details}.")
+    return redirect('dashboard')
+
+
+# ======================================================
+#  ADMIN — DOUBLE-BOOKING REPORT
+# ======================================================
+@admin_required
+def booking_conflict_report(request):
+    return render(request, 'visits/booking_conflicts.html', {
+        'conflicts': booking_conflicts(),
+    })
+
+
+# ======================================================
+#  ADMIN — STATISTICS (rollups only, see visits/stats.py)
+# ======================================================
+STATISTICS_DEFAULT_DAYS = 365
+
+
+def _date_param(request, name, default):
+    try:
+        return date.fromisoformat(request.GET.get(name, ''))
+    except ValueError:
+        return default
+
+
+@admin_required
+def statistics_report(request):
+    today = date.today()
+    to_date = _date_param(request, 'to', today)
+    from_date = _date_param(request, 'from', to_date - timedelta(days=STATISTICS_DEFAULT_DAYS))
+
+    return render(request, 'visits/statistics.html', {
+        'from_date': from_date,
+        'to_date': to_date,
+        'stats': visit_statistics(from_date, to_date),
+    })
+
+
+# ======================================================
+#  ADMIN — MATCHING SLA (time to suggestion / assignment, see visits/sla.py)
+# ======================================================
+SLA_DEFAULT_DAYS = 30
+
+
+@admin_required
+def matching_sla_report(request):
+    today = date.today()
+    to_date = _date_param(request, 'to', today)
+    from_date = _date_param(request, 'from', to_date - timedelta(days=SLA_DEFAULT_DAYS))
+
+    return render(request, 'visits/matching_sla.html', {
+        'from_date': from_date,
+        'to_date': to_date,
+        'rows': sla_report(from_date, to_date),
+    })
+
+
+# ======================================================
+#  ADMIN — STREAMING EXPORTS (CSV / JSON)
+# ======================================================
+EXPORT_CONTENT_TYPES = {'csv': 'text/csv', 'json': 'application/json'}
+
+
+@admin_required
+def export_data(request, name):
+    fmt = request.GET.get('format', 'csv')
+    if name not in EXPORTS or fmt not in FORMATS:
+        messages.error(request, "Unknown export.")
+        return redirect('dashboard')
+
+    try:
+        headers, rows = export_rows(
+            name,
+            from_date=_date_param(request, 'from', None),
+            to_date=_date_param(request, 'to', None),
+            status=request.GET.get('status') or None,
+        )
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect('dashboard')
+
+    response = StreamingHttpResponse(
+        stream_export(headers, rows, fmt), content_type=EXPORT_CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}-{date.today():%Y%m%d}.{fmt}"'
+    return response
+
+
+# ======================================================
+#  ALL ROLES — MARK ALL NOTIFICATIONS READ
+# ======================================================
+@login_required
+def mark_notifications_read(request):
+    if request.method == "POST":
+        mark_all_read(request.user)
+        messages.info(request, "All notifications marked as read.")
+    return redirect('dashboard')
+
+
+# ======================================================
+#  MOTHER — UPLOAD MEDICAL REPORT
+# ======================================================
+@csrf_exempt
+def upload_medical_report(request):
+    # Swap the upload handlers before anything reads request.POST / FILES;
+    # CsrfViewMiddleware would, so the CSRF check runs inside instead
+    request.upload_handlers = [HashingUploadHandler(request)]
+    return _upload_medical_report(request)
+
+
+@csrf_protect
+@role_required('mother', message="Only mothers can upload reports.")
+def _upload_medical_report(request):
+    mother = request.profile
+
     if request.method == "POST":
         form = MedicalReportForm(request.POST, request.FILES)
         if form.is_valid():
-            obj = form.save(commit=False)
-            obj.mother = mother
-            obj.save()
-            messages.success(request, "Medical report uploaded.")
+            _, created = store_report(mother, form.cleaned_data['file'])
+            if created:
+                messages.success(request, "Medical report uploaded.")
+            else:
+                messages.info(request, "You already uploaded this report.")
             return redirect('dashboard')
     else:
         form = MedicalReportForm()
@@ -185,13 +329,27 @@ def upload_medical_report(request):
 
 
 # ======================================================
-#  MOTHER — CANCEL VISIT
+#  ALL ROLES — DOWNLOAD MEDICAL REPORT
 # ======================================================
 @login_required
+def download_medical_report(request, report_id):
+    report = get_object_or_404(MedicalReport.objects.select_related('mother'), id=report_id)
+
+    if not can_view_report(request.user, report):
+        messages.error(request, "Permission denied.")
+        return redirect('dashboard')
+
+    return report_response(request, report)
+
+
+# ======================================================
+#  MOTHER — CANCEL VISIT
+# ======================================================
+@role_required('mother')
 def cancel_visit(request, visit_id):
-    visit = get_object_or_404(Visit, id=visit_id)
+    visit = get_object_or_404(Visit.objects.select_related('volunteer__user'), id=visit_id)
 
-    if request.user != visit.mother.user:
+    if visit.mother_id != request.profile.pk:
         messages.error(request, "Permission denied.")
         return redirect('dashboard')
 
@@ -199,10 +357,7 @@ def cancel_visit(request, visit_id):
     visit.save()
 
     if visit.volunteer:
-        Notification.objects.create(
-            user=visit.volunteer.user,
-            message=f"Visit #{visit.id} was cancelled."
-        )
+        notify(visit.volunteer.user, f"Visit #{visit.id} was cancelled.")
 
     messages.info(request, "Visit cancelled.")
     return redirect('dashboard')
@@ -211,11 +366,11 @@ def cancel_visit(request, visit_id):
 # ======================================================
 #  MOTHER — RESCHEDULE
 # ======================================================
-@login_required
+@role_required('mother')
 def reschedule_visit(request, visit_id):
-    visit = get_object_or_404(Visit, id=visit_id)
+    visit = get_object_or_404(Visit.objects.select_related('volunteer__user'), id=visit_id)
 
-    if request.user != visit.mother.user:
+    if visit.mother_id != request.profile.pk:
         messages.error(request, "Permission denied.")
         return redirect('dashboard')
 
@@ -224,10 +379,7 @@ def reschedule_visit(request, visit_id):
         if form.is_valid():
             form.save()
             if visit.volunteer:
-                Notification.objects.create(
-                    user=visit.volunteer.user,
-                    message=f"Visit #{visit.id} rescheduled to {visit.date}."
-                )
+                notify(visit.volunteer.user, f"Visit #{visit.id} rescheduled to {visit.date}.")
             messages.success(request, "Visit rescheduled.")
             return redirect('dashboard')
 
@@ -240,13 +392,9 @@ def reschedule_visit(request, visit_id):
 # ======================================================
 #  VOLUNTEER — SUBMIT AVAILABILITY
 # ======================================================
-@login_required
+@volunteer_required
 def submit_availability(request):
-    try:
-        volunteer = VolunteerProfile.objects.get(user=request.user)
-    except VolunteerProfile.DoesNotExist:
-        messages.error(request, "Permission denied.")
-        return redirect('dashboard')
+    volunteer = request.profile
 
     if request.method == "POST":
         form = AvailabilityForm(request.POST)
@@ -265,21 +413,18 @@ def submit_availability(request):
 # ======================================================
 #  VOLUNTEER — MARK COMPLETED
 # ======================================================
-@login_required
+@volunteer_required
 def mark_visit_completed(request, visit_id):
-    visit = get_object_or_404(Visit, id=visit_id)
+    visit = get_object_or_404(Visit.objects.select_related('mother__user'), id=visit_id)
 
-    if request.user != visit.volunteer.user:
+    if visit.volunteer_id != request.profile.pk:
         messages.error(request, "Permission denied.")
         return redirect('dashboard')
 
     visit.status = "Completed"
     visit.save()
 
-    Notification.objects.create(
-        user=visit.mother.user,
-        message=f"Visit #{visit.id} completed."
-    )
+    notify(visit.mother.user, f"Visit #{visit.id} completed.")
 
     messages.success(request, "Visit marked as completed.")
     return redirect('dashboard')
@@ -0,0 +1,61 @@
+# visits/workload.py
+"""
+Maintenance of VolunteerProfile.active_visit_count.
+
+Exports:
+    move_workload(previous_volunteer_id, current_volunteer_id)
+    recount_workload(commit=True) -> list[(volunteer_id, stored, actual)]
+
+Visit.save() and the post_delete signal call move_workload() with the
+volunteer the visit counted towards before and after the change (None when
+the visit is not active or unassigned). Updates are F-expressions run inside
+the caller's transaction, so concurrent changes never lose an increment.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F
+from accounts.models import VolunteerProfile
+
+
+def adjust_workload(volunteer_id, delta):
+    if volunteer_id is None or not delta:
+        return
+    VolunteerProfile.objects.filter(pk=volunteer_id).update(
+        active_visit_count=F('active_visit_count') + delta
+    )
+
+
+def move_workload(previous_volunteer_id, current_volunteer_id):
+    if previous_volunteer_id == current_volunteer_id:
+        return
+    with transaction.atomic():
+        adjust_workload(previous_volunteer_id, -1)
+        adjust_workload(current_volunteer_id, 1)
+
+
+def recount_workload(commit=True):
+    """
+    Recount every volunteer's active visits and repair drifted counters.
+    Returns the drifted rows as (volunteer_id, stored, actual).
+    """
+    from .models import Visit
+
+    actual = dict(
+        Visit.objects
+        .filter(status__in=Visit.ACTIVE_STATUSES, volunteer__isnull=False)
+        .values('volunteer_id')
+        .annotate(n=Count('id'))
+        .values_list('volunteer_id', 'n')
+    )
+    stored = VolunteerProfile.objects.values_list('id', 'active_visit_count')
+    drift = [
+        (vid, count, actual.get(vid, 0))
+        for vid, count in stored
+        if count != actual.get(vid, 0)
+    ]
+
+    if commit and drift:
+        with transaction.atomic():
+            for vid, _, count in drift:
+                VolunteerProfile.objects.filter(pk=vid).update(active_visit_count=count)
+    return drift